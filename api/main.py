@@ -1,24 +1,49 @@
 # api/main.py
 # uvicorn api.main:app --reload
 
+import asyncio
+import json
 import logging
 import os
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from core.cache import LRUTTLCache, QueryEmbeddingCache, SemanticAnswerCache, SQLiteVectorCache
 from core.llm import OpenAILLM
 from core.prompts import RAGPromptBuilder
 from core.reranker import SimpleReranker
-from ingest.embeddings.openai import embed_texts
-from ingest.vectorstore.qdrant import search
+from ingest.embeddings.openai import aembed_texts
+from ingest.vectorstore.qdrant import (
+    _aensure_collection_exists,
+    afetch_payloads,
+    aget_corpus_version,
+    asearch,
+    asearch_batch,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Contexta API", description="API for Contexta RAG application")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Check the vector store collection once at startup."""
+    try:
+        await _aensure_collection_exists()
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.warning(f"Could not check Qdrant collection at startup, will retry on first use: {e}")
+    yield
+
+
+app = FastAPI(title="Contexta API", description="API for Contexta RAG application", lifespan=lifespan)
 
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = os.getenv(
@@ -34,10 +59,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Query embedding cache configuration
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+QUERY_EMBEDDING_CACHE_TTL = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+# Optional SQLite file shared by all API workers on the host (empty disables it)
+QUERY_EMBEDDING_CACHE_PATH = os.getenv("QUERY_EMBEDDING_CACHE_PATH", "")
+
+# Semantic answer cache configuration
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "4096"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+
+# Batch query configuration
+QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "500"))
+QUERY_BATCH_CONCURRENCY = int(os.getenv("QUERY_BATCH_CONCURRENCY", "8"))
+
+# Token budget for the prompt context of requests that set neither
+# max_context_tokens nor max_context_length (0 budgets max_context_length
+# characters)
+MAX_CONTEXT_TOKENS = int(os.getenv("MAX_CONTEXT_TOKENS", "0"))
+
+NO_RESULTS_ANSWER = "I couldn't find any relevant information in the documents."
+
+# Payload fields fetched for every search candidate; the chunk text is only
+# fetched for the results that survive re-ranking (see _hydrate_results)
+SEARCH_PAYLOAD_FIELDS = ["document_id", "chunk_index"]
+# Fields filled in for those results: the text and, for documents chunked by
+# structure, the page and section the chunk comes from
+HYDRATE_PAYLOAD_FIELDS = ["text", "page", "section"]
+
 # Lazy initialization for components
 _llm = None
 _prompt_builder = None
 _reranker = None
+_embedding_cache = None
+_answer_cache = None
+
+# Marks a corpus version that could not be read; the answer cache is bypassed
+_VERSION_UNAVAILABLE = object()
 
 
 def _get_llm() -> OpenAILLM:
@@ -64,6 +125,34 @@ def _get_reranker() -> SimpleReranker:
     return _reranker
 
 
+def _get_embedding_cache() -> QueryEmbeddingCache:
+    """Get or create the query embedding cache with lazy initialization."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        shared = None
+        if QUERY_EMBEDDING_CACHE_PATH:
+            shared = SQLiteVectorCache(QUERY_EMBEDDING_CACHE_PATH, ttl=QUERY_EMBEDDING_CACHE_TTL)
+        _embedding_cache = QueryEmbeddingCache(
+            model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large"),
+            memory=LRUTTLCache(max_entries=QUERY_EMBEDDING_CACHE_SIZE, ttl=QUERY_EMBEDDING_CACHE_TTL),
+            shared=shared,
+        )
+    return _embedding_cache
+
+
+def _get_answer_cache() -> SemanticAnswerCache:
+    """Get or create the semantic answer cache with lazy initialization."""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = SemanticAnswerCache(
+            threshold=ANSWER_CACHE_THRESHOLD,
+            max_entries_per_tenant=ANSWER_CACHE_SIZE,
+            ttl=ANSWER_CACHE_TTL,
+            max_entries=ANSWER_CACHE_MAX_ENTRIES,
+        )
+    return _answer_cache
+
+
 class QueryRequest(BaseModel):
     """Request model for query endpoint."""
 
@@ -72,6 +161,7 @@ class QueryRequest(BaseModel):
     top_k: int = 10
     rerank_top_k: int = 5
     max_context_length: int = 3000
+    max_context_tokens: Optional[int] = None
 
 
 class QueryResponse(BaseModel):
@@ -81,6 +171,32 @@ class QueryResponse(BaseModel):
     sources: List[Dict[str, Any]]
     query: str
     tenant_id: int
+    # LLM token usage; cached_tokens counts prompt tokens served from the provider's prefix cache
+    usage: Optional[Dict[str, int]] = None
+
+
+class BatchQueryRequest(BaseModel):
+    """Request model for batch query endpoint."""
+
+    queries: List[str]
+    tenant_id: int
+    top_k: int = 10
+    rerank_top_k: int = 5
+    max_context_length: int = 3000
+    max_context_tokens: Optional[int] = None
+
+
+class BatchQueryResult(QueryResponse):
+    """Result for a single query of a batch."""
+
+    error: Optional[str] = None
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for batch query endpoint."""
+
+    results: List[BatchQueryResult]
+    tenant_id: int
 
 
 @app.get("/")
@@ -88,13 +204,277 @@ def read_root():
     return {"message": "Contexta RAG API", "version": "1.0.0"}
 
 
+async def _embed_queries(queries: List[str]) -> List[List[float]]:
+    """
+    Embed queries, reusing cached embeddings for repeated queries.
+
+    All cache misses are embedded together in a single API call.
+    """
+    cache = _get_embedding_cache()
+    embeddings: Dict[str, List[float]] = {}
+
+    for query in dict.fromkeys(queries):
+        query_embedding = await cache.aget(query)
+        if query_embedding is not None:
+            embeddings[query] = query_embedding
+
+    misses = [query for query in dict.fromkeys(queries) if query not in embeddings]
+    if len(misses) < len(queries):
+        logger.debug(f"{len(queries) - len(misses)} query embedding(s) served from cache")
+
+    if misses:
+        for query, query_embedding in zip(misses, await aembed_texts(misses)):
+            embeddings[query] = query_embedding
+            await cache.aset(query, query_embedding)
+
+    return [embeddings[query] for query in queries]
+
+
+async def _embed_query(query: str) -> List[float]:
+    """Embed a single query, reusing cached embeddings for repeated queries."""
+    return (await _embed_queries([query]))[0]
+
+
+async def _get_corpus_version(tenant_id: int):
+    """Read the tenant's corpus version, or _VERSION_UNAVAILABLE if it can't be read."""
+    if not ANSWER_CACHE_ENABLED:
+        return _VERSION_UNAVAILABLE
+
+    try:
+        return await aget_corpus_version(tenant_id)
+    except Exception as e:
+        logger.warning(f"Could not read corpus version for tenant {tenant_id}, bypassing answer cache: {e}")
+        return _VERSION_UNAVAILABLE
+
+
+async def _prepare_query(request: QueryRequest) -> Tuple[List[float], Any]:
+    """Embed the query and read the tenant's corpus version concurrently."""
+    logger.debug("Generating query embedding")
+    return await asyncio.gather(_embed_query(request.query), _get_corpus_version(request.tenant_id))
+
+
+def _answer_params_key(request: QueryRequest) -> str:
+    """Request parameters that change the answer for the same query."""
+    return f"{request.top_k}:{request.rerank_top_k}:{request.max_context_length}:{_context_token_budget(request)}"
+
+
+def _context_token_budget(request: QueryRequest) -> Optional[int]:
+    """
+    Token budget for the request's context, or None to budget in max_context_length characters.
+
+    A limit set by the client wins over the server's MAX_CONTEXT_TOKENS:
+    max_context_tokens first, then an explicit max_context_length.
+    """
+    if request.max_context_tokens is not None:
+        return request.max_context_tokens
+    if "max_context_length" in request.model_fields_set:
+        return None
+    return MAX_CONTEXT_TOKENS or None
+
+
+def _lookup_answer(request: QueryRequest, query_embedding: List[float], corpus_version) -> Optional[Dict[str, Any]]:
+    """Look up a cached answer for a semantically similar query."""
+    if corpus_version is _VERSION_UNAVAILABLE:
+        return None
+
+    cached = _get_answer_cache().lookup(
+        tenant_id=request.tenant_id,
+        embedding=query_embedding,
+        corpus_version=corpus_version,
+        params_key=_answer_params_key(request),
+    )
+    if cached is not None:
+        logger.info(f"Answer served from cache for tenant {request.tenant_id}")
+    return cached
+
+
+def _store_answer(
+    request: QueryRequest,
+    query_embedding: List[float],
+    corpus_version,
+    answer: str,
+    sources: List[Dict[str, Any]],
+):
+    """Cache a generated answer for later similar queries."""
+    if corpus_version is _VERSION_UNAVAILABLE:
+        return
+
+    _get_answer_cache().store(
+        tenant_id=request.tenant_id,
+        embedding=query_embedding,
+        corpus_version=corpus_version,
+        value={"answer": answer, "sources": sources},
+        params_key=_answer_params_key(request),
+    )
+
+
+async def _retrieve(request: QueryRequest, query_embedding: List[float]) -> List[Dict[str, Any]]:
+    """
+    Run the retrieval half of the RAG pipeline.
+
+    Pipeline:
+    1. Search in vector store (projected payload, no chunk text)
+    2. Re-rank results
+    3. Fetch the chunk text for the re-ranked results only
+
+    Returns:
+        Re-ranked search results (empty if nothing matched)
+    """
+    # 1. Search in vector store
+    logger.debug(f"Searching vector store (top_k={request.top_k})")
+    search_results = await asearch(
+        query_embedding=query_embedding,
+        tenant_id=request.tenant_id,
+        top_k=request.top_k,
+        payload_fields=_search_payload_fields(),
+    )
+
+    # 2. Re-rank results
+    reranked_results = _rerank(request, search_results)
+
+    # 3. Fetch text for the survivors
+    await _hydrate_results(reranked_results)
+    return reranked_results
+
+
+def _search_payload_fields() -> List[str]:
+    """Payload fields to fetch for search candidates: ours plus the reranker's."""
+    fields = list(SEARCH_PAYLOAD_FIELDS)
+    for field in _get_reranker().required_fields:
+        if field not in fields:
+            fields.append(field)
+    # Results fetched with their text aren't hydrated, so they need their provenance too
+    if "text" in fields:
+        fields.extend(field for field in HYDRATE_PAYLOAD_FIELDS if field not in fields)
+    return fields
+
+
+async def _hydrate_results(results: List[Dict[str, Any]]) -> None:
+    """
+    Fill in the chunk text, page and section of search results fetched without them.
+
+    Results are updated in place with a single retrieve call. Results that
+    already carry their text (e.g. because the reranker needed it) are skipped.
+    """
+    missing = [result for result in results if "text" not in result["payload"]]
+    if not missing:
+        return
+
+    payloads = await afetch_payloads([result["id"] for result in missing], payload_fields=HYDRATE_PAYLOAD_FIELDS)
+    for result in missing:
+        payload = payloads.get(result["id"], {})
+        text = payload.get("text", result["text"])
+        result["payload"] = {**result["payload"], **payload, "text": text}
+        result["text"] = text
+        result["page"] = payload.get("page")
+        result["section"] = payload.get("section")
+
+
+def _rerank(request: QueryRequest, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Re-rank search results, returning an empty list if nothing matched."""
+    if not search_results:
+        logger.info(f"No results found for tenant {request.tenant_id} query: {request.query}")
+        return []
+
+    logger.debug(f"Found {len(search_results)} search results")
+
+    logger.debug(f"Re-ranking results (top_k={request.rerank_top_k})")
+    reranked_results = _get_reranker().rerank(query=request.query, results=search_results, top_k=request.rerank_top_k)
+
+    logger.debug(f"Selected {len(reranked_results)} results after re-ranking")
+    return reranked_results
+
+
+async def _answer(
+    request: QueryRequest,
+    query_embedding: List[float],
+    corpus_version,
+    reranked_results: List[Dict[str, Any]],
+) -> QueryResponse:
+    """
+    Run the generation half of the RAG pipeline.
+
+    Pipeline:
+    1. Build prompt with context
+    2. Generate answer using LLM
+    3. Return answer with sources
+    """
+    if not reranked_results:
+        return QueryResponse(
+            answer=NO_RESULTS_ANSWER,
+            sources=[],
+            query=request.query,
+            tenant_id=request.tenant_id,
+        )
+
+    # 1. Build prompt with context
+    messages = _build_messages(request, reranked_results)
+
+    # 2. Generate answer using LLM
+    logger.debug("Generating answer with LLM")
+    completion = await _get_llm().acomplete(prompt=messages, temperature=0.7, max_tokens=1000)
+    answer = completion.text
+    usage = asdict(completion.usage) if completion.usage is not None else None
+    if usage is not None:
+        logger.info(
+            f"LLM usage for tenant {request.tenant_id}: {usage['prompt_tokens']} prompt tokens "
+            f"({usage['cached_tokens']} cached), {usage['completion_tokens']} completion tokens"
+        )
+
+    # 3. Prepare sources
+    sources = _build_sources(reranked_results)
+    _store_answer(request, query_embedding, corpus_version, answer, sources)
+
+    return QueryResponse(
+        answer=answer,
+        sources=sources,
+        query=request.query,
+        tenant_id=request.tenant_id,
+        usage=usage,
+    )
+
+
+def _build_messages(request: QueryRequest, results: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Build the RAG chat messages for the re-ranked results."""
+    logger.debug("Building RAG prompt")
+    return _get_prompt_builder().build_messages(
+        question=request.query,
+        context_chunks=results,
+        max_context_length=request.max_context_length,
+        include_sources=True,
+        max_context_tokens=_context_token_budget(request),
+    )
+
+
+def _build_sources(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Build the source list returned alongside an answer."""
+    return [
+        {
+            "document_id": result.get("document_id"),
+            "chunk_index": result.get("chunk_index"),
+            "page": result.get("page"),
+            "section": result.get("section"),
+            "score": result.get("score"),
+            "text_preview": (
+                result.get("text", "")[:200] + "..." if len(result.get("text", "")) > 200 else result.get("text", "")
+            ),
+        }
+        for result in results
+    ]
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.post("/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     """
     Query documents using RAG pipeline.
 
     Pipeline:
-    1. Generate embedding for query
+    1. Generate embedding for query (and serve a cached answer if one matches)
     2. Search in vector store
     3. Re-rank results
     4. Build prompt with context
@@ -104,89 +484,210 @@ async def query_documents(request: QueryRequest):
     try:
         logger.info(f"Processing query for tenant {request.tenant_id}: {request.query[:50]}...")
 
-        # 1. Generate query embedding
-        logger.debug("Generating query embedding")
-        query_embeddings = embed_texts([request.query])
-        query_embedding = query_embeddings[0]
+        # 1. Embed the query and check the answer cache
+        query_embedding, corpus_version = await _prepare_query(request)
 
-        # 2. Search in vector store
-        logger.debug(f"Searching vector store (top_k={request.top_k})")
-        search_results = search(
-            query_embedding=query_embedding,
-            tenant_id=request.tenant_id,
-            top_k=request.top_k,
-        )
+        cached = _lookup_answer(request, query_embedding, corpus_version)
+        if cached is not None:
+            return QueryResponse(**cached, query=request.query, tenant_id=request.tenant_id)
 
-        if not search_results:
-            logger.info(f"No results found for tenant {request.tenant_id} query: {request.query}")
-            return QueryResponse(
-                answer="I couldn't find any relevant information in the documents.",
-                sources=[],
-                query=request.query,
-                tenant_id=request.tenant_id,
-            )
+        # 2-3. Search and re-rank
+        reranked_results = await _retrieve(request, query_embedding)
 
-        logger.debug(f"Found {len(search_results)} search results")
+        # 4-6. Build prompt, generate answer and prepare sources
+        response = await _answer(request, query_embedding, corpus_version, reranked_results)
 
-        # 3. Re-rank results
-        logger.debug(f"Re-ranking results (top_k={request.rerank_top_k})")
-        reranked_results = _get_reranker().rerank(
-            query=request.query, results=search_results, top_k=request.rerank_top_k
+        logger.info(f"Query completed successfully for tenant {request.tenant_id}")
+        return response
+
+    except Exception as e:
+        logger.error(f"Error processing query: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+
+
+@app.post("/query/stream")
+async def query_documents_stream(request: QueryRequest, http_request: Request):
+    """
+    Query documents using RAG pipeline and stream the answer as server-sent events.
+
+    Events:
+    - sources: retrieved sources, sent before generation starts
+    - token: a piece of the generated answer
+    - error: generation failed after the stream started
+    - done: the answer is complete
+
+    Generation stops, and the upstream OpenAI stream is closed, as soon as
+    the client disconnects. Cached answers are sent as a single token event.
+    """
+    try:
+        logger.info(f"Processing streaming query for tenant {request.tenant_id}: {request.query[:50]}...")
+        query_embedding, corpus_version = await _prepare_query(request)
+
+        cached = _lookup_answer(request, query_embedding, corpus_version)
+        reranked_results = [] if cached is not None else await _retrieve(request, query_embedding)
+    except Exception as e:
+        logger.error(f"Error processing query: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+
+    async def event_stream():
+        sources = cached["sources"] if cached is not None else _build_sources(reranked_results)
+        yield _sse_event(
+            "sources",
+            {
+                "sources": sources,
+                "query": request.query,
+                "tenant_id": request.tenant_id,
+            },
         )
 
-        logger.debug(f"Selected {len(reranked_results)} results after re-ranking")
+        if cached is not None:
+            yield _sse_event("token", {"text": cached["answer"]})
+            yield _sse_event("done", {})
+            return
+
+        if not reranked_results:
+            yield _sse_event("token", {"text": NO_RESULTS_ANSWER})
+            yield _sse_event("done", {})
+            return
+
+        messages = _build_messages(request, reranked_results)
+        tokens = _get_llm().agenerate_stream(prompt=messages, temperature=0.7, max_tokens=1000)
+        answer_parts = []
+
+        try:
+            async for token in tokens:
+                if await http_request.is_disconnected():
+                    logger.info(f"Client disconnected, stopping stream for tenant {request.tenant_id}")
+                    return
+                answer_parts.append(token)
+                yield _sse_event("token", {"text": token})
+
+            _store_answer(request, query_embedding, corpus_version, "".join(answer_parts), sources)
+            logger.info(f"Streaming query completed successfully for tenant {request.tenant_id}")
+            yield _sse_event("done", {})
+        except Exception as e:
+            logger.error(f"Error streaming answer: {e}", exc_info=True)
+            yield _sse_event("error", {"detail": str(e)})
+        finally:
+            # Closing the generator closes the upstream OpenAI stream
+            await tokens.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_documents_batch(request: BatchQueryRequest):
+    """
+    Answer many queries for one tenant with as few round trips as possible.
 
-        # 4. Build prompt with context
-        logger.debug("Building RAG prompt")
-        prompt = _get_prompt_builder().build_with_sources(
-            question=request.query,
-            context_chunks=reranked_results,
-            max_context_length=request.max_context_length,
-            include_sources=True,
+    Pipeline:
+    1. Embed all queries in a single embeddings call (cache misses only)
+    2. Serve cached answers where possible
+    3. Search for all remaining queries in a single Qdrant batch query
+    4. Re-rank, then fetch the text of every surviving chunk in one call
+    5. Build prompts and generate answers concurrently, at most
+       QUERY_BATCH_CONCURRENCY LLM calls at a time
+
+    Results are returned in input order. A failed generation is reported
+    in that result's error field instead of failing the whole batch.
+    """
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="At least one query is required")
+    if len(request.queries) > QUERY_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many queries in batch ({len(request.queries)} > {QUERY_BATCH_MAX_SIZE})",
         )
 
-        # 5. Generate answer using LLM
-        logger.debug("Generating answer with LLM")
-        answer = _get_llm().generate(prompt=prompt, temperature=0.7, max_tokens=1000)
+    item_requests = [
+        QueryRequest(
+            query=query,
+            tenant_id=request.tenant_id,
+            top_k=request.top_k,
+            rerank_top_k=request.rerank_top_k,
+            # Only the limits the client set, so unset ones keep their defaults
+            **request.model_dump(include={"max_context_length", "max_context_tokens"} & request.model_fields_set),
+        )
+        for query in request.queries
+    ]
 
-        # 6. Prepare sources
-        sources = [
-            {
-                "document_id": result.get("document_id"),
-                "chunk_index": result.get("chunk_index"),
-                "score": result.get("score"),
-                "text_preview": (
-                    result.get("text", "")[:200] + "..."
-                    if len(result.get("text", "")) > 200
-                    else result.get("text", "")
-                ),
-            }
-            for result in reranked_results
-        ]
+    try:
+        logger.info(f"Processing batch of {len(item_requests)} queries for tenant {request.tenant_id}")
 
-        logger.info(f"Query completed successfully for tenant {request.tenant_id}")
+        # 1. Embed all queries and read the corpus version concurrently
+        query_embeddings, corpus_version = await asyncio.gather(
+            _embed_queries(request.queries), _get_corpus_version(request.tenant_id)
+        )
 
-        return QueryResponse(
-            answer=answer,
-            sources=sources,
-            query=request.query,
+        # 2. Serve cached answers
+        results: List[Optional[BatchQueryResult]] = [None] * len(item_requests)
+        pending = []
+        for idx, item in enumerate(item_requests):
+            cached = _lookup_answer(item, query_embeddings[idx], corpus_version)
+            if cached is not None:
+                results[idx] = BatchQueryResult(**cached, query=item.query, tenant_id=item.tenant_id)
+            else:
+                pending.append(idx)
+
+        # 3. Search for every remaining query in one round trip
+        logger.debug(f"Batch searching vector store for {len(pending)} queries (top_k={request.top_k})")
+        search_results = await asearch_batch(
+            query_embeddings=[query_embeddings[idx] for idx in pending],
             tenant_id=request.tenant_id,
+            top_k=request.top_k,
+            payload_fields=_search_payload_fields(),
         )
 
+        # 4. Re-rank, then fetch text for all survivors in one round trip
+        reranked = [_rerank(item_requests[idx], item_results) for idx, item_results in zip(pending, search_results)]
+        await _hydrate_results([result for item_results in reranked for result in item_results])
     except Exception as e:
-        logger.error(f"Error processing query: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+        logger.error(f"Error processing batch query: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error processing batch query: {str(e)}")
+
+    # 5. Generate with bounded concurrency
+    semaphore = asyncio.Semaphore(QUERY_BATCH_CONCURRENCY)
+
+    async def answer_one(idx: int, reranked_results: List[Dict[str, Any]]):
+        item = item_requests[idx]
+        try:
+            async with semaphore:
+                response = await _answer(item, query_embeddings[idx], corpus_version, reranked_results)
+            results[idx] = BatchQueryResult(**response.model_dump())
+        except Exception as e:
+            logger.error(f"Error answering batch query {idx}: {e}", exc_info=True)
+            results[idx] = BatchQueryResult(
+                answer="", sources=[], query=item.query, tenant_id=item.tenant_id, error=str(e)
+            )
+
+    await asyncio.gather(*(answer_one(idx, item_results) for idx, item_results in zip(pending, reranked)))
+
+    logger.info(f"Batch of {len(item_requests)} queries completed for tenant {request.tenant_id}")
+    return BatchQueryResponse(results=results, tenant_id=request.tenant_id)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters for the query-side caches."""
+    return {
+        "query_embedding": _get_embedding_cache().stats(),
+        "answer": _get_answer_cache().stats(),
+    }
 
 
 @app.get("/health")
-def health():
+async def health():
     """Health check endpoint."""
     try:
-        from ingest.vectorstore.qdrant import COLLECTION, _get_client
+        from ingest.vectorstore.qdrant import COLLECTION, _get_async_client
 
         # Check Qdrant connection
-        client = _get_client()
-        _ = client.get_collections()  # noqa: F841
+        client = _get_async_client()
+        _ = await client.get_collections()  # noqa: F841
         qdrant_status = "connected"
 
         # Check OpenAI (basic check - just verify key is set)
@@ -0,0 +1,19 @@
+"""
+Caches for embeddings and other expensive lookups.
+"""
+
+from .base import CacheBackend
+from .chunk import ChunkEmbeddingCache
+from .embedding import QueryEmbeddingCache
+from .memory import LRUTTLCache
+from .semantic import SemanticAnswerCache
+from .sqlite import SQLiteVectorCache
+
+__all__ = [
+    "CacheBackend",
+    "LRUTTLCache",
+    "SQLiteVectorCache",
+    "QueryEmbeddingCache",
+    "ChunkEmbeddingCache",
+    "SemanticAnswerCache",
+]
@@ -0,0 +1,49 @@
+"""
+Base interface for cache backends.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+
+class CacheBackend(ABC):
+    """Abstract base class for key/value cache backends."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value in the cache.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Remove a value from the cache.
+
+        Args:
+            key: Cache key
+        """
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every value from the cache."""
+        pass
@@ -0,0 +1,63 @@
+"""
+Content-addressed cache for document chunk embeddings.
+"""
+
+import hashlib
+from typing import List, Optional
+
+from .sqlite import SQLiteVectorCache
+
+
+class ChunkEmbeddingCache:
+    """
+    Embedding cache keyed by chunk content.
+
+    Keys are the sha256 of the exact chunk text together with the model and
+    vector dimensions, so identical chunks share one entry across documents,
+    re-ingests and tenants, and switching models never returns stale vectors.
+    """
+
+    def __init__(self, model: str, dimensions: int, store: SQLiteVectorCache):
+        """
+        Initialize the cache.
+
+        Args:
+            model: Embedding model name, part of every cache key
+            dimensions: Vector dimensions, part of every cache key
+            store: Persistent vector store holding the embeddings
+        """
+        self.model = model
+        self.dimensions = dimensions
+        self.store = store
+
+    def _make_key(self, text: str) -> str:
+        """Build the cache key from the model, dimensions and chunk text."""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model}:{self.dimensions}:{text_hash}"
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up embeddings for chunks.
+
+        Args:
+            texts: Chunk texts
+
+        Returns:
+            Embeddings in input order, None for chunks not in the cache
+        """
+        keys = [self._make_key(text) for text in texts]
+        found = self.store.get_many(list(dict.fromkeys(keys)))
+        return [found.get(key) for key in keys]
+
+    def set_many(self, texts: List[str], embeddings: List[List[float]]) -> None:
+        """
+        Store embeddings for chunks.
+
+        Args:
+            texts: Chunk texts
+            embeddings: Embeddings in the same order
+        """
+        if len(texts) != len(embeddings):
+            raise ValueError("texts and embeddings must have the same length")
+
+        self.store.set_many({self._make_key(text): embedding for text, embedding in zip(texts, embeddings)})
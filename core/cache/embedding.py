@@ -0,0 +1,122 @@
+"""
+Two-tier cache for query embeddings.
+"""
+
+import asyncio
+import hashlib
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from .base import CacheBackend
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize query text so trivially different spellings share a cache entry.
+
+    Applies Unicode NFKC normalization, case folding and whitespace collapsing.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Query embedding cache with an in-process tier and an optional shared tier.
+
+    Lookups check the in-process tier first, then the shared tier (e.g. a
+    SQLite file used by every API worker on the host). Shared hits are
+    promoted into the in-process tier.
+    """
+
+    def __init__(self, model: str, memory: CacheBackend, shared: Optional[CacheBackend] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            model: Embedding model name, part of every cache key
+            memory: In-process cache tier
+            shared: Optional cache tier shared between processes
+        """
+        self.model = model
+        self.memory = memory
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "shared_hits": 0, "misses": 0}
+
+    def _make_key(self, query: str) -> str:
+        """Build the cache key from the embedding model and normalized query."""
+        raw = f"{self.model}\x00{normalize_query(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def get(self, query: str) -> Optional[List[float]]:
+        """
+        Look up the embedding for a query.
+
+        Args:
+            query: Raw query text
+
+        Returns:
+            Cached embedding, or None on a miss
+        """
+        key = self._make_key(query)
+
+        embedding = self.memory.get(key)
+        if embedding is not None:
+            self._count("memory_hits")
+            return embedding
+
+        if self.shared is not None:
+            embedding = self.shared.get(key)
+            if embedding is not None:
+                self.memory.set(key, embedding)
+                self._count("shared_hits")
+                return embedding
+
+        self._count("misses")
+        return None
+
+    def set(self, query: str, embedding: List[float]) -> None:
+        """
+        Store the embedding for a query in every tier.
+
+        Args:
+            query: Raw query text
+            embedding: Embedding vector
+        """
+        key = self._make_key(query)
+        self.memory.set(key, embedding)
+        if self.shared is not None:
+            self.shared.set(key, embedding)
+
+    async def aget(self, query: str) -> Optional[List[float]]:
+        """Async variant of get that keeps shared-tier I/O off the event loop."""
+        if self.shared is None:
+            return self.get(query)
+        return await asyncio.to_thread(self.get, query)
+
+    async def aset(self, query: str, embedding: List[float]) -> None:
+        """Async variant of set that keeps shared-tier I/O off the event loop."""
+        if self.shared is None:
+            self.set(query, embedding)
+            return
+        await asyncio.to_thread(self.set, query, embedding)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters.
+
+        Returns:
+            Dictionary with per-tier hits, misses and overall hit rate
+        """
+        with self._lock:
+            counters = dict(self._counters)
+
+        lookups = counters["memory_hits"] + counters["shared_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["shared_hits"]
+        counters["hit_rate"] = hits / lookups if lookups else 0.0
+        return counters
@@ -0,0 +1,229 @@
+"""
+Tenant-scoped semantic cache for final answers.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class _TenantEntries:
+    """Cached answers for one tenant at one corpus version."""
+
+    corpus_version: Optional[str]
+    vectors: Optional[np.ndarray] = None
+    values: List[Any] = field(default_factory=list)
+    params_keys: List[str] = field(default_factory=list)
+    created_at: List[float] = field(default_factory=list)
+
+
+class SemanticAnswerCache:
+    """
+    Cache of final answers matched by query embedding similarity.
+
+    A lookup hits when a cached query embedding from the same tenant, with
+    the same request parameters, has cosine similarity at or above the
+    threshold. Every entry is tied to the tenant's corpus version: as soon
+    as a lookup or store sees a different version (the tenant ingested or
+    deleted a document), all of that tenant's entries are dropped.
+
+    Memory is bounded per tenant and in total: once more than max_entries
+    answers are cached, the oldest entries of the least recently used
+    tenants are evicted.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries_per_tenant: int = 256,
+        ttl: Optional[float] = None,
+        max_entries: int = 4096,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit (0.0 to 1.0)
+            max_entries_per_tenant: Entries kept per tenant (oldest evicted first)
+            ttl: Time-to-live in seconds (None disables expiry)
+            max_entries: Entries kept across all tenants (least recently
+                used tenants evicted first)
+        """
+        if max_entries_per_tenant <= 0:
+            raise ValueError("max_entries_per_tenant must be positive")
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+
+        self.threshold = threshold
+        self.max_entries_per_tenant = max_entries_per_tenant
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Least recently used tenant first
+        self._tenants: "OrderedDict[int, _TenantEntries]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _entries_for(
+        self, tenant_id: int, corpus_version: Optional[str], create: bool = True
+    ) -> Optional[_TenantEntries]:
+        """Get the tenant's entries, dropping them if the corpus changed, and mark the tenant as used."""
+        entries = self._tenants.get(tenant_id)
+        if entries is not None and entries.corpus_version != corpus_version:
+            if entries.values:
+                self._counters["invalidations"] += 1
+            self._remove_tenant(tenant_id)
+            entries = None
+
+        if entries is None:
+            if not create:
+                return None
+            entries = _TenantEntries(corpus_version=corpus_version)
+            self._tenants[tenant_id] = entries
+        self._tenants.move_to_end(tenant_id)
+        return entries
+
+    def _remove_tenant(self, tenant_id: int) -> Optional[_TenantEntries]:
+        entries = self._tenants.pop(tenant_id, None)
+        if entries is not None:
+            self._size -= len(entries.values)
+        return entries
+
+    def _expire(self, entries: _TenantEntries) -> None:
+        """Drop entries older than the TTL (they are ordered oldest first)."""
+        if self.ttl is None or not entries.created_at:
+            return
+
+        cutoff = time.time() - self.ttl
+        expired = 0
+        while expired < len(entries.created_at) and entries.created_at[expired] <= cutoff:
+            expired += 1
+
+        if expired:
+            self._drop_oldest(entries, expired)
+
+    def _drop_oldest(self, entries: _TenantEntries, count: int) -> None:
+        entries.vectors = entries.vectors[count:] if len(entries.values) > count else None
+        self._size -= min(count, len(entries.values))
+        del entries.values[:count]
+        del entries.params_keys[:count]
+        del entries.created_at[:count]
+
+    def _evict(self) -> None:
+        """Drop the oldest entries of the least recently used tenants until the cache fits."""
+        while self._size > self.max_entries:
+            tenant_id, entries = next(iter(self._tenants.items()))
+            self._drop_oldest(entries, self._size - self.max_entries)
+            if not entries.values:
+                self._remove_tenant(tenant_id)
+
+    def lookup(
+        self,
+        tenant_id: int,
+        embedding: List[float],
+        corpus_version: Optional[str],
+        params_key: str = "",
+    ) -> Optional[Any]:
+        """
+        Find a cached answer for a semantically similar query.
+
+        Args:
+            tenant_id: Tenant identifier
+            embedding: Embedding of the new query
+            corpus_version: Tenant's current corpus version
+            params_key: Request parameters that must match exactly
+
+        Returns:
+            Cached value of the most similar entry, or None on a miss
+        """
+        query = self._normalize(embedding)
+
+        with self._lock:
+            entries = self._entries_for(tenant_id, corpus_version, create=False)
+            if entries is not None:
+                self._expire(entries)
+                if not entries.values:
+                    self._remove_tenant(tenant_id)
+
+            if entries is not None and entries.vectors is not None:
+                similarities = entries.vectors @ query
+                for idx in np.argsort(similarities)[::-1]:
+                    if similarities[idx] < self.threshold:
+                        break
+                    if entries.params_keys[idx] == params_key:
+                        self._counters["hits"] += 1
+                        return entries.values[idx]
+
+            self._counters["misses"] += 1
+            return None
+
+    def store(
+        self,
+        tenant_id: int,
+        embedding: List[float],
+        corpus_version: Optional[str],
+        value: Any,
+        params_key: str = "",
+    ) -> None:
+        """
+        Cache an answer.
+
+        Args:
+            tenant_id: Tenant identifier
+            embedding: Embedding of the query that produced the answer
+            corpus_version: Tenant's corpus version the answer was built from
+            value: Answer to cache
+            params_key: Request parameters the answer depends on
+        """
+        vector = self._normalize(embedding)[np.newaxis, :]
+
+        with self._lock:
+            entries = self._entries_for(tenant_id, corpus_version)
+            entries.vectors = vector if entries.vectors is None else np.vstack([entries.vectors, vector])
+            entries.values.append(value)
+            entries.params_keys.append(params_key)
+            entries.created_at.append(time.time())
+            self._size += 1
+
+            overflow = len(entries.values) - self.max_entries_per_tenant
+            if overflow > 0:
+                self._drop_oldest(entries, overflow)
+            self._evict()
+
+    def invalidate(self, tenant_id: int) -> None:
+        """
+        Drop every cached answer for a tenant.
+
+        Args:
+            tenant_id: Tenant identifier
+        """
+        with self._lock:
+            if self._remove_tenant(tenant_id) is not None:
+                self._counters["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters.
+
+        Returns:
+            Dictionary with hits, misses, invalidations, entry and tenant counts and hit rate
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            counters["entries"] = self._size
+            counters["tenants"] = len(self._tenants)
+
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        return counters
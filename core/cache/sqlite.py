@@ -0,0 +1,235 @@
+"""
+SQLite-backed vector cache shared between processes on one host.
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .base import CacheBackend
+
+# Keys per lookup query, well below SQLite's limit on query parameters
+_MAX_KEYS_PER_QUERY = 500
+
+
+class SQLiteVectorCache(CacheBackend):
+    """
+    Cache of embedding vectors stored in a SQLite file.
+
+    Vectors are stored as compact float32 blobs. The database runs in WAL
+    mode so several worker processes can read and write the same file.
+    With max_bytes set, the least recently used vectors are evicted once
+    the stored vectors grow past that size. Their total size is kept in a
+    metadata row, updated in the same transaction as every write, so
+    checking it doesn't scan the table.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = None,
+        timeout: float = 5.0,
+        max_bytes: Optional[int] = None,
+    ):
+        """
+        Initialize the cache, creating the database file if needed.
+
+        Args:
+            path: Path to the SQLite database file
+            ttl: Time-to-live in seconds (None disables expiry)
+            timeout: Seconds to wait for a lock held by another process
+            max_bytes: Maximum total size of the stored vectors (None disables eviction)
+        """
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Add the access-time column and the size total to databases created before eviction existed."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(vectors)")}
+        if "accessed_at" not in columns:
+            self._conn.execute("ALTER TABLE vectors ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS vectors_accessed_at ON vectors (accessed_at)")
+
+        self._conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        with self._transaction():
+            # Computed once per database; afterwards every write keeps it up to date
+            self._conn.execute(
+                "INSERT OR IGNORE INTO cache_meta (name, value) "
+                "SELECT 'total_bytes', COALESCE(SUM(LENGTH(vector)), 0) FROM vectors"
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Run the block in a write transaction, rolled back if it raises."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _total_bytes(self) -> int:
+        (total,) = self._conn.execute("SELECT value FROM cache_meta WHERE name = 'total_bytes'").fetchone()
+        return total
+
+    def _add_to_total(self, delta: int) -> None:
+        if delta:
+            self._conn.execute("UPDATE cache_meta SET value = value + ? WHERE name = 'total_bytes'", (delta,))
+
+    def _stored_bytes(self, keys: List[str]) -> int:
+        """Size of the vectors currently stored under keys."""
+        total = 0
+        for start in range(0, len(keys), _MAX_KEYS_PER_QUERY):
+            end = start + _MAX_KEYS_PER_QUERY
+            batch = keys[start:end]
+            placeholders = ",".join("?" * len(batch))
+            (size,) = self._conn.execute(
+                f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM vectors WHERE key IN ({placeholders})", batch
+            ).fetchone()
+            total += size
+        return total
+
+    def _delete_keys(self, keys: Iterable[str]) -> None:
+        """Delete vectors and their size from the total (caller holds the lock, inside a transaction)."""
+        keys = list(keys)
+        self._add_to_total(-self._stored_bytes(keys))
+        self._conn.executemany("DELETE FROM vectors WHERE key = ?", [(key,) for key in keys])
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and created_at + self.ttl <= now
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Look up a vector by key."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up several vectors in one query.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of key to vector for the keys that were found
+        """
+        if not keys:
+            return {}
+
+        now = time.time()
+        found = {}
+        expired = []
+        with self._lock:
+            for start in range(0, len(keys), _MAX_KEYS_PER_QUERY):
+                end = start + _MAX_KEYS_PER_QUERY
+                batch = keys[start:end]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector, created_at FROM vectors WHERE key IN ({placeholders})", batch
+                ).fetchall()
+
+                for key, vector, created_at in rows:
+                    if self._is_expired(created_at, now):
+                        expired.append(key)
+                    else:
+                        found[key] = vector
+
+            if expired:
+                with self._transaction():
+                    self._delete_keys(expired)
+            if found and self.max_bytes is not None:
+                self._conn.executemany(
+                    "UPDATE vectors SET accessed_at = ? WHERE key = ?", [(now, key) for key in found]
+                )
+
+        return {key: np.frombuffer(vector, dtype=np.float32).tolist() for key, vector in found.items()}
+
+    def set(self, key: str, value: List[float]) -> None:
+        """Store a vector as a float32 blob."""
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, List[float]]) -> None:
+        """
+        Store several vectors in one transaction.
+
+        Args:
+            items: Mapping of key to vector
+        """
+        if not items:
+            return
+
+        now = time.time()
+        rows = [(key, np.asarray(value, dtype=np.float32).tobytes(), now, now) for key, value in items.items()]
+        with self._lock:
+            with self._transaction():
+                added = sum(len(vector) for _, vector, _, _ in rows) - self._stored_bytes(list(items))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO vectors (key, vector, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._add_to_total(added)
+                if self.max_bytes is not None:
+                    self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used vectors until the cache is back under max_bytes (caller holds the lock)."""
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        # Evict down to 90% of the limit so every write doesn't trigger another eviction
+        excess = total - int(self.max_bytes * 0.9)
+        cursor = self._conn.execute("SELECT key, LENGTH(vector) FROM vectors ORDER BY accessed_at")
+        victims = []
+        freed = 0
+        for key, size in cursor:
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        cursor.close()
+
+        self._conn.executemany("DELETE FROM vectors WHERE key = ?", victims)
+        self._add_to_total(-freed)
+
+    def size_bytes(self) -> int:
+        """Total size of the stored vectors in bytes."""
+        with self._lock:
+            return self._total_bytes()
+
+    def delete(self, key: str) -> None:
+        """Remove a vector from the cache."""
+        with self._lock:
+            with self._transaction():
+                self._delete_keys([key])
+
+    def clear(self) -> None:
+        """Remove every vector from the cache."""
+        with self._lock:
+            with self._transaction():
+                self._conn.execute("DELETE FROM vectors")
+                self._conn.execute("UPDATE cache_meta SET value = 0 WHERE name = 'total_bytes'")
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
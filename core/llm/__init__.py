@@ -2,7 +2,7 @@
 LLM provider abstractions.
 """
 
-from .base import LLMProvider
+from .base import LLMProvider, LLMResponse, LLMUsage, Prompt
 from .openai import OpenAILLM
 
-__all__ = ["LLMProvider", "OpenAILLM"]
+__all__ = ["LLMProvider", "LLMResponse", "LLMUsage", "Prompt", "OpenAILLM"]
@@ -3,19 +3,42 @@ Base interface for LLM providers.
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+# A prompt is either plain text (sent as one user message) or a list of
+# chat messages ({"role": ..., "content": ...}) sent as-is
+Prompt = Union[str, List[Dict[str, str]]]
+
+
+@dataclass
+class LLMUsage:
+    """Token usage reported by the provider for one request."""
+
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Prompt tokens served from the provider's prefix cache
+    cached_tokens: int = 0
+
+
+@dataclass
+class LLMResponse:
+    """Generated text with the usage of the request that produced it."""
+
+    text: str
+    usage: Optional[LLMUsage] = None
 
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
     @abstractmethod
-    def generate(self, prompt: str, temperature: float = 0.7, max_tokens: Optional[int] = None, **kwargs) -> str:
+    def generate(self, prompt: Prompt, temperature: float = 0.7, max_tokens: Optional[int] = None, **kwargs) -> str:
         """
         Generate text completion from a prompt.
 
         Args:
-            prompt: Input prompt text
+            prompt: Input prompt text or list of chat messages
             temperature: Sampling temperature (0.0 to 2.0)
             max_tokens: Maximum tokens to generate
             **kwargs: Additional provider-specific parameters
@@ -26,12 +49,68 @@ class LLMProvider(ABC):
         pass
 
     @abstractmethod
-    def generate_stream(self, prompt: str, temperature: float = 0.7, max_tokens: Optional[int] = None, **kwargs):
+    async def agenerate(
+        self, prompt: Prompt, temperature: float = 0.7, max_tokens: Optional[int] = None, **kwargs
+    ) -> str:
+        """
+        Generate text completion from a prompt without blocking the event loop.
+
+        Args:
+            prompt: Input prompt text or list of chat messages
+            temperature: Sampling temperature (0.0 to 2.0)
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            Generated text response
+        """
+        pass
+
+    async def acomplete(
+        self, prompt: Prompt, temperature: float = 0.7, max_tokens: Optional[int] = None, **kwargs
+    ) -> LLMResponse:
+        """
+        Generate text completion and report token usage.
+
+        Providers that don't report usage return a response without it.
+
+        Args:
+            prompt: Input prompt text or list of chat messages
+            temperature: Sampling temperature (0.0 to 2.0)
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional provider-specific parameters
+
+        Returns:
+            Generated text with usage
+        """
+        return LLMResponse(text=await self.agenerate(prompt, temperature=temperature, max_tokens=max_tokens, **kwargs))
+
+    @abstractmethod
+    def generate_stream(self, prompt: Prompt, temperature: float = 0.7, max_tokens: Optional[int] = None, **kwargs):
         """
         Generate text completion with streaming.
 
         Args:
-            prompt: Input prompt text
+            prompt: Input prompt text or list of chat messages
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional provider-specific parameters
+
+        Yields:
+            Text chunks as they are generated
+        """
+        pass
+
+    @abstractmethod
+    def agenerate_stream(self, prompt: Prompt, temperature: float = 0.7, max_tokens: Optional[int] = None, **kwargs):
+        """
+        Generate text completion with streaming without blocking the event loop.
+
+        Implementations are async generators. Closing the generator early
+        (e.g. when the client disconnects) must release the upstream stream.
+
+        Args:
+            prompt: Input prompt text or list of chat messages
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             **kwargs: Additional provider-specific parameters
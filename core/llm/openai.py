@@ -3,11 +3,11 @@ OpenAI LLM provider implementation.
 """
 
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from .base import LLMProvider
+from .base import LLMProvider, LLMResponse, LLMUsage, Prompt
 
 
 class OpenAILLM(LLMProvider):
@@ -43,10 +43,11 @@ class OpenAILLM(LLMProvider):
             raise ValueError("OpenAI API key is required")
 
         self.client = OpenAI(api_key=self.api_key)
+        self.async_client = AsyncOpenAI(api_key=self.api_key)
 
     def generate(
         self,
-        prompt: str,
+        prompt: Prompt,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         **kwargs,
@@ -55,7 +56,7 @@ class OpenAILLM(LLMProvider):
         Generate text completion from a prompt.
 
         Args:
-            prompt: Input prompt text
+            prompt: Input prompt text or list of chat messages
             temperature: Sampling temperature (0.0 to 2.0)
             max_tokens: Maximum tokens to generate
             **kwargs: Additional OpenAI API parameters
@@ -66,7 +67,7 @@ class OpenAILLM(LLMProvider):
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=self._messages(prompt),
                 temperature=temperature,
                 max_tokens=max_tokens or self.default_max_tokens,
                 **kwargs,
@@ -76,9 +77,66 @@ class OpenAILLM(LLMProvider):
         except Exception as e:
             raise RuntimeError(f"OpenAI API error: {e}") from e
 
+    async def agenerate(
+        self,
+        prompt: Prompt,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> str:
+        """
+        Generate text completion from a prompt using the async client.
+
+        Args:
+            prompt: Input prompt text or list of chat messages
+            temperature: Sampling temperature (0.0 to 2.0)
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional OpenAI API parameters
+
+        Returns:
+            Generated text response
+        """
+        response = await self.acomplete(prompt, temperature=temperature, max_tokens=max_tokens, **kwargs)
+        return response.text
+
+    async def acomplete(
+        self,
+        prompt: Prompt,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ) -> LLMResponse:
+        """
+        Generate text completion and report token usage, using the async client.
+
+        OpenAI caches prompt prefixes automatically; usage.cached_tokens
+        reports how much of the prompt was served from that cache.
+
+        Args:
+            prompt: Input prompt text or list of chat messages
+            temperature: Sampling temperature (0.0 to 2.0)
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional OpenAI API parameters
+
+        Returns:
+            Generated text with usage
+        """
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt),
+                temperature=temperature,
+                max_tokens=max_tokens or self.default_max_tokens,
+                **kwargs,
+            )
+
+            return LLMResponse(text=response.choices[0].message.content, usage=self._usage(response))
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {e}") from e
+
     def generate_stream(
         self,
-        prompt: str,
+        prompt: Prompt,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
         **kwargs,
@@ -87,7 +145,7 @@ class OpenAILLM(LLMProvider):
         Generate text completion with streaming.
 
         Args:
-            prompt: Input prompt text
+            prompt: Input prompt text or list of chat messages
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             **kwargs: Additional OpenAI API parameters
@@ -98,7 +156,7 @@ class OpenAILLM(LLMProvider):
         try:
             stream = self.client.chat.completions.create(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
+                messages=self._messages(prompt),
                 temperature=temperature,
                 max_tokens=max_tokens or self.default_max_tokens,
                 stream=True,
@@ -111,6 +169,70 @@ class OpenAILLM(LLMProvider):
         except Exception as e:
             raise RuntimeError(f"OpenAI API streaming error: {e}") from e
 
+    async def agenerate_stream(
+        self,
+        prompt: Prompt,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs,
+    ):
+        """
+        Generate text completion with streaming using the async client.
+
+        Closing the generator closes the underlying HTTP response, which
+        stops generation on the OpenAI side.
+
+        Args:
+            prompt: Input prompt text or list of chat messages
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional OpenAI API parameters
+
+        Yields:
+            Text chunks as they are generated
+        """
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=self._messages(prompt),
+                temperature=temperature,
+                max_tokens=max_tokens or self.default_max_tokens,
+                stream=True,
+                **kwargs,
+            )
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API streaming error: {e}") from e
+
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API streaming error: {e}") from e
+        finally:
+            await stream.close()
+
+    @staticmethod
+    def _messages(prompt: Prompt) -> List[Dict[str, str]]:
+        """Chat messages for a prompt; plain text becomes a single user message."""
+        if isinstance(prompt, str):
+            return [{"role": "user", "content": prompt}]
+        return list(prompt)
+
+    @staticmethod
+    def _usage(response) -> Optional[LLMUsage]:
+        """Extract token usage, including cached prompt tokens, from a response."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        return LLMUsage(
+            prompt_tokens=usage.prompt_tokens or 0,
+            completion_tokens=usage.completion_tokens or 0,
+            cached_tokens=(getattr(details, "cached_tokens", None) or 0) if details is not None else 0,
+        )
+
     def get_model_name(self) -> str:
         """Get the name of the model being used."""
         return self.model
@@ -2,10 +2,15 @@
 RAG prompt builder for question answering.
 """
 
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from core.tokenizer import SimpleTokenizer, Tokenizer, get_tokenizer
 
 from .base import PromptBuilder
 
+CONTEXT_SEPARATOR = "\n\n"
+
 
 class RAGPromptBuilder(PromptBuilder):
     """
@@ -23,6 +28,9 @@ class RAGPromptBuilder(PromptBuilder):
         context_prefix: str = "Context:",
         question_prefix: str = "Question:",
         answer_prefix: str = "Answer:",
+        tokenizer: Optional[Tokenizer] = None,
+        tokenizer_model: str = "gpt-4o-mini",
+        token_cache_size: int = 4096,
     ):
         """
         Initialize RAG prompt builder.
@@ -32,11 +40,46 @@ class RAGPromptBuilder(PromptBuilder):
             context_prefix: Prefix for context section
             question_prefix: Prefix for question section
             answer_prefix: Prefix for answer section
+            tokenizer: Tokenizer for token budgets (loaded for tokenizer_model on first use if omitted)
+            tokenizer_model: Model whose tokenizer measures the context
+            token_cache_size: Number of chunk token counts to keep cached
         """
         self.system_instruction = system_instruction or self._default_system_instruction()
         self.context_prefix = context_prefix
         self.question_prefix = question_prefix
         self.answer_prefix = answer_prefix
+        self.tokenizer_model = tokenizer_model
+        self._tokenizer = tokenizer
+        # The same top chunks come back for many queries: count each one once
+        self._count_tokens = lru_cache(maxsize=token_cache_size)(self._count_tokens_uncached)
+
+    @property
+    def tokenizer(self) -> Tokenizer:
+        """Tokenizer used for token budgets, loaded on first use."""
+        if self._tokenizer is None:
+            tokenizer = get_tokenizer(self.tokenizer_model)
+            if isinstance(tokenizer, SimpleTokenizer):
+                # tiktoken couldn't load its encoding: count approximately until it can
+                return tokenizer
+            self._tokenizer = tokenizer
+            # Drop counts made with the approximate tokenizer
+            self._count_tokens.cache_clear()
+        return self._tokenizer
+
+    def _count_tokens_uncached(self, text: str) -> int:
+        return self.tokenizer.count(text)
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count the tokens in a text, caching the result.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Number of tokens
+        """
+        return self._count_tokens(text)
 
     def _default_system_instruction(self) -> str:
         """Default system instruction for RAG."""
@@ -77,7 +120,7 @@ class RAGPromptBuilder(PromptBuilder):
             context_parts.append(chunk_text)
             current_length += len(chunk_text)
 
-        context = "\n\n".join(context_parts)
+        context = CONTEXT_SEPARATOR.join(context_parts)
 
         # Build prompt
         prompt_parts = [
@@ -99,41 +142,26 @@ class RAGPromptBuilder(PromptBuilder):
         context_chunks: List[Dict[str, Any]],
         max_context_length: int = 3000,
         include_sources: bool = True,
+        max_context_tokens: Optional[int] = None,
     ) -> str:
         """
         Build RAG prompt with context, question, and source citations.
 
+        Chunks are taken in the given (relevance) order until the budget is
+        full; a chunk that doesn't fit is skipped so smaller, lower-ranked
+        chunks can still use the remaining space.
+
         Args:
             question: User's question
             context_chunks: List of context chunks with metadata
             max_context_length: Maximum characters for context section
             include_sources: Whether to include source information in prompt
+            max_context_tokens: Maximum tokens for context section (overrides max_context_length)
 
         Returns:
             Formatted prompt string
         """
-        # Build context with source citations
-        context_parts = []
-        current_length = 0
-
-        for idx, chunk in enumerate(context_chunks, 1):
-            chunk_text = chunk.get("text", "")
-            source_info = ""
-
-            if include_sources:
-                doc_id = chunk.get("document_id", "unknown")
-                chunk_idx = chunk.get("chunk_index", idx)
-                source_info = f" [Source: Document {doc_id}, Chunk {chunk_idx}]"
-
-            full_chunk = f"{chunk_text}{source_info}"
-
-            if current_length + len(full_chunk) > max_context_length:
-                break
-
-            context_parts.append(full_chunk)
-            current_length += len(full_chunk)
-
-        context = "\n\n".join(context_parts)
+        context = self._build_context(context_chunks, max_context_length, include_sources, max_context_tokens)
 
         # Build prompt
         prompt_parts = [
@@ -148,3 +176,95 @@ class RAGPromptBuilder(PromptBuilder):
         ]
 
         return "\n".join(prompt_parts)
+
+    def build_messages(
+        self,
+        question: str,
+        context_chunks: List[Dict[str, Any]],
+        max_context_length: int = 3000,
+        include_sources: bool = True,
+        max_context_tokens: Optional[int] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Build RAG chat messages laid out for provider-side prefix caching.
+
+        Messages go from most to least stable: the system instruction, then
+        the context block, then the question. Chunks are selected by
+        relevance like in build_with_sources, but written in document order
+        so the same set of chunks always yields the same prefix.
+
+        Args:
+            question: User's question
+            context_chunks: List of context chunks with metadata
+            max_context_length: Maximum characters for context section
+            include_sources: Whether to include source information in prompt
+            max_context_tokens: Maximum tokens for context section (overrides max_context_length)
+
+        Returns:
+            List of chat messages ({"role": ..., "content": ...})
+        """
+        context = self._build_context(
+            context_chunks, max_context_length, include_sources, max_context_tokens, document_order=True
+        )
+
+        return [
+            {"role": "system", "content": self.system_instruction},
+            {"role": "user", "content": f"{self.context_prefix}\n{context}"},
+            {"role": "user", "content": f"{self.question_prefix} {question}"},
+        ]
+
+    def _build_context(
+        self,
+        context_chunks: List[Dict[str, Any]],
+        max_context_length: int,
+        include_sources: bool,
+        max_context_tokens: Optional[int],
+        document_order: bool = False,
+    ) -> str:
+        """Build the context section with source citations within the budget."""
+        full_chunks = []
+        for idx, chunk in enumerate(context_chunks, 1):
+            chunk_text = chunk.get("text", "")
+            source_info = ""
+
+            if include_sources:
+                doc_id = chunk.get("document_id", "unknown")
+                chunk_idx = chunk.get("chunk_index", idx)
+                page = chunk.get("page")
+                page_info = f", Page {page}" if page is not None else ""
+                source_info = f" [Source: Document {doc_id}, Chunk {chunk_idx}{page_info}]"
+
+            full_chunks.append(f"{chunk_text}{source_info}")
+
+        if max_context_tokens is not None:
+            selected = self._pack(
+                full_chunks, max_context_tokens, self.count_tokens, self.count_tokens(CONTEXT_SEPARATOR)
+            )
+        else:
+            selected = self._pack(full_chunks, max_context_length, len, 0)
+
+        if document_order:
+            selected.sort(key=lambda idx: _document_position(context_chunks[idx]))
+
+        return CONTEXT_SEPARATOR.join(full_chunks[idx] for idx in selected)
+
+    @staticmethod
+    def _pack(chunks: List[str], budget: int, measure: Callable[[str], int], separator_cost: int) -> List[int]:
+        """Select chunks, in order, that fit within the budget together; returns their indices."""
+        selected = []
+        used = 0
+
+        for idx, chunk in enumerate(chunks):
+            cost = measure(chunk) + (separator_cost if selected else 0)
+            if used + cost > budget:
+                continue
+
+            selected.append(idx)
+            used += cost
+
+        return selected
+
+
+def _document_position(chunk: Dict[str, Any]) -> tuple:
+    """Sort key placing a chunk by document and position within it."""
+    return (str(chunk.get("document_id", "")), chunk.get("chunk_index") or 0)
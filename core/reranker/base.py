@@ -9,6 +9,11 @@ from typing import Any, Dict, List
 class Reranker(ABC):
     """Abstract base class for re-ranking strategies."""
 
+    # Payload fields (besides the score) the strategy reads from each result.
+    # Search only fetches these for the candidates; the rest, including the
+    # chunk text unless listed here, is fetched for the final results only.
+    required_fields: List[str] = []
+
     @abstractmethod
     def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int = 5) -> List[Dict[str, Any]]:
         """
@@ -15,6 +15,8 @@ class SimpleReranker(Reranker):
     more sophisticated re-ranking (CrossEncoder, LLM-based, etc.)
     """
 
+    required_fields: List[str] = []
+
     def rerank(self, query: str, results: List[Dict[str, Any]], top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Re-rank results by score (descending).
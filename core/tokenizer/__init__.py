@@ -0,0 +1,9 @@
+"""
+Tokenizers for counting and splitting text in model tokens.
+"""
+
+from .base import Tokenizer
+from .openai import TiktokenTokenizer, get_tokenizer
+from .simple import SimpleTokenizer
+
+__all__ = ["Tokenizer", "TiktokenTokenizer", "SimpleTokenizer", "get_tokenizer"]
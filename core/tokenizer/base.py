@@ -0,0 +1,68 @@
+"""
+Base tokenizer interface.
+"""
+
+from abc import ABC, abstractmethod
+from typing import List
+
+
+class Tokenizer(ABC):
+    """Abstract base class for tokenizers."""
+
+    @abstractmethod
+    def encode(self, text: str) -> List[int]:
+        """
+        Convert text into token IDs.
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            List of token IDs
+        """
+        pass
+
+    @abstractmethod
+    def decode(self, tokens: List[int]) -> str:
+        """
+        Convert token IDs back into text.
+
+        Args:
+            tokens: Token IDs to decode
+
+        Returns:
+            Decoded text
+        """
+        pass
+
+    def count(self, text: str) -> int:
+        """
+        Count the tokens in a text.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Number of tokens
+        """
+        return len(self.encode(text))
+
+    def offsets(self, text: str) -> List[int]:
+        """
+        Find where each token of a text starts.
+
+        The default decodes tokens one at a time; tokenizers that know
+        their token boundaries should override it.
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            Character offset in text of each token, in order
+        """
+        offsets = []
+        position = 0
+        for token in self.encode(text):
+            offsets.append(position)
+            position += len(self.decode([token]))
+        return offsets
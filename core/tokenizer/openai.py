@@ -0,0 +1,114 @@
+"""
+Tokenizer for OpenAI models backed by tiktoken.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List
+
+import tiktoken
+
+from .base import Tokenizer
+from .simple import SimpleTokenizer
+
+logger = logging.getLogger(__name__)
+
+# Encoding used for models tiktoken doesn't know yet
+DEFAULT_ENCODING = "o200k_base"
+# Seconds before an encoding that failed to load is tried again
+RETRY_INTERVAL = 60.0
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact token counts for OpenAI models."""
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        """
+        Initialize the tokenizer.
+
+        Args:
+            model: OpenAI model name used to pick the encoding
+        """
+        self.model = model
+        try:
+            self.encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self.encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+
+    def encode(self, text: str) -> List[int]:
+        """Convert text into token IDs."""
+        return self.encoding.encode(text, disallowed_special=())
+
+    def decode(self, tokens: List[int]) -> str:
+        """Convert token IDs back into text."""
+        return self.encoding.decode(tokens)
+
+    def offsets(self, text: str) -> List[int]:
+        """
+        Find where each token of a text starts.
+
+        Tokens are byte sequences and may split a multi-byte character; such
+        a token starts at the character it completes.
+        """
+        offsets = []
+        position = 0
+        for token in self.encoding.decode_tokens_bytes(self.encode(text)):
+            if token.isascii():
+                offsets.append(position)
+                position += len(token)
+                continue
+            # UTF-8 continuation bytes (0b10xxxxxx) don't start a character
+            offsets.append(max(position - (0x80 <= token[0] < 0xC0), 0))
+            position += sum(1 for byte in token if not 0x80 <= byte < 0xC0)
+        return offsets
+
+
+_tokenizers: Dict[str, TiktokenTokenizer] = {}
+# When loading each model's encoding last failed (time.monotonic())
+_failures: Dict[str, float] = {}
+_tokenizers_lock = threading.Lock()
+
+
+def get_tokenizer(model: str = "gpt-4o-mini") -> Tokenizer:
+    """
+    Get a shared tokenizer for an OpenAI model.
+
+    tiktoken downloads its encoding files on first use. If that fails, the
+    approximate SimpleTokenizer is returned so counting still works, but it
+    is not cached: loading is tried again RETRY_INTERVAL seconds later, so
+    a transient download failure doesn't leave token counts approximate
+    for the life of the process.
+
+    Args:
+        model: OpenAI model name
+
+    Returns:
+        Tokenizer instance (tiktoken tokenizers are cached per model)
+    """
+    tokenizer = _tokenizers.get(model)
+    if tokenizer is not None:
+        return tokenizer
+
+    with _tokenizers_lock:
+        tokenizer = _tokenizers.get(model)
+        if tokenizer is not None:
+            return tokenizer
+
+        failed_at = _failures.get(model)
+        if failed_at is not None and time.monotonic() - failed_at < RETRY_INTERVAL:
+            return SimpleTokenizer()
+
+        try:
+            tokenizer = TiktokenTokenizer(model)
+        except Exception as e:
+            _failures[model] = time.monotonic()
+            logger.error(
+                f"Could not load tiktoken encoding for {model}, using approximate token counts "
+                f"(retrying in {RETRY_INTERVAL:.0f}s): {e}"
+            )
+            return SimpleTokenizer()
+
+        _failures.pop(model, None)
+        _tokenizers[model] = tokenizer
+        return tokenizer
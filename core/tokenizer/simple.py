@@ -0,0 +1,53 @@
+"""
+Approximate tokenizer that needs no encoding files.
+"""
+
+import re
+import threading
+from typing import Dict, List
+
+from .base import Tokenizer
+
+# Words are split into pieces of up to four characters, roughly matching
+# the average token length of BPE encodings on English text
+_PIECE_PATTERN = re.compile(r"\s?\w{1,4}|\s?[^\w\s]|\s+")
+
+
+class SimpleTokenizer(Tokenizer):
+    """
+    Regex-based tokenizer approximating BPE token counts.
+
+    Used as a fallback when a model's real tokenizer is unavailable.
+    Pieces keep their leading whitespace, so decode(encode(text)) == text.
+    """
+
+    def __init__(self):
+        """Initialize the tokenizer with an empty vocabulary."""
+        self._vocab: Dict[str, int] = {}
+        self._pieces: List[str] = []
+        self._lock = threading.Lock()
+
+    def _piece_id(self, piece: str) -> int:
+        token = self._vocab.get(piece)
+        if token is None:
+            with self._lock:
+                token = self._vocab.setdefault(piece, len(self._pieces))
+                if token == len(self._pieces):
+                    self._pieces.append(piece)
+        return token
+
+    def encode(self, text: str) -> List[int]:
+        """Convert text into token IDs."""
+        return [self._piece_id(piece) for piece in _PIECE_PATTERN.findall(text)]
+
+    def decode(self, tokens: List[int]) -> str:
+        """Convert token IDs back into text."""
+        return "".join(self._pieces[token] for token in tokens)
+
+    def count(self, text: str) -> int:
+        """Count the tokens in a text."""
+        return len(_PIECE_PATTERN.findall(text))
+
+    def offsets(self, text: str) -> List[int]:
+        """Find where each token of a text starts."""
+        return [match.start() for match in _PIECE_PATTERN.finditer(text)]
@@ -0,0 +1,247 @@
+"""
+Bulk ingestion of files, directories and zip/tar archives.
+
+Archives are read member by member without extracting them to disk.
+Documents are ingested concurrently through the normal pipeline and
+share embedding batches, so many small documents don't each pay for
+their own embedding request.
+
+Usage:
+    python -m ingest.batch PATH [PATH ...] --tenant-id N [--concurrency N]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import BATCH_EMBEDDING_DELAY, BATCH_INGEST_CONCURRENCY
+from .embeddings.batcher import EmbeddingBatcher
+from .loaders.pdf import iter_pdf_pages
+from .tasks import _bump_corpus_version, _decode_text, _detect_file_type, _iter_document, ingest_pages
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+@dataclass
+class BatchSource:
+    """A document to ingest: a file on disk or the content of an archive member."""
+
+    # File path, or "<archive path>/<member name>" for archive members
+    name: str
+    path: Optional[str] = None
+    data: Optional[bytes] = None
+    # Set when the source could not be read (e.g. a corrupt archive)
+    error: Optional[str] = None
+
+
+def _is_archive(path: Path) -> bool:
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _iter_archive(path: Path) -> Iterator[BatchSource]:
+    """Yield the files of a zip or tar archive, reading one member at a time."""
+    if path.name.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    with archive.open(info) as member:
+                        yield BatchSource(name=f"{path}/{info.filename}", data=member.read())
+        return
+
+    # Stream mode reads the (possibly compressed) tar sequentially
+    with tarfile.open(path, mode="r|*") as archive:
+        for info in archive:
+            if info.isfile():
+                member = archive.extractfile(info)
+                yield BatchSource(name=f"{path}/{info.name}", data=member.read())
+
+
+def iter_sources(paths: Iterable[str]) -> Iterator[BatchSource]:
+    """
+    Expand files, directories and archives into the documents they contain.
+
+    Directories are walked recursively in name order; archives inside
+    directories are expanded too.
+
+    Args:
+        paths: File, directory or archive paths
+
+    Yields:
+        Documents to ingest
+    """
+    for raw_path in paths:
+        path = Path(raw_path)
+        if path.is_dir():
+            yield from iter_sources(str(child) for child in sorted(path.rglob("*")) if child.is_file())
+        elif _is_archive(path):
+            try:
+                yield from _iter_archive(path)
+            except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+                logger.error(f"Could not read archive {path}: {e}")
+                yield BatchSource(name=str(path), error=f"Could not read archive: {e}")
+        else:
+            yield BatchSource(name=str(path), path=str(path))
+
+
+def document_id_for(source_name: str, tenant_id: int) -> int:
+    """
+    Derive a stable document ID from a source name.
+
+    Ingesting the same file again under the same name maps to the same
+    document, so unchanged chunks are kept.
+
+    Batch documents have no Django Document row: Django doesn't list them
+    and can't delete them. Their IDs are negative (down to -2**53) so they
+    never collide with Django's positive IDs; delete one with
+    DELETE /documents/{id}, using the ID from the batch report or from
+    this function.
+    """
+    digest = hashlib.sha256(f"{tenant_id}:{source_name}".encode("utf-8")).digest()
+    return -(int.from_bytes(digest[:8], "big") >> 11) - 1
+
+
+def _iter_source_pages(source: BatchSource, file_type: str) -> Iterator[str]:
+    if source.path is not None:
+        # Files on disk get the same extraction as single-document ingest
+        yield from _iter_document(source.path, file_type)
+    elif file_type == "pdf":
+        yield from iter_pdf_pages(io.BytesIO(source.data))
+    elif file_type == "txt":
+        yield _decode_text(source.data, source.name)
+    elif file_type == "docx":
+        raise NotImplementedError("DOCX loading not yet implemented")
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+
+def _ingest_source(
+    source: BatchSource, tenant_id: int, metadata: dict, embed: EmbeddingBatcher
+) -> Tuple[Dict[str, Any], bool]:
+    """Ingest one document and report its status and whether the corpus changed."""
+    status: Dict[str, Any] = {"source": source.name}
+    if source.error is not None:
+        return {**status, "status": "failed", "error": source.error}, False
+    if source.path is not None and not Path(source.path).exists():
+        return {**status, "status": "failed", "error": f"File not found: {source.path}"}, False
+    try:
+        file_type = _detect_file_type(source.name)
+    except ValueError as e:
+        return {**status, "status": "skipped", "error": str(e)}, False
+
+    document_id = document_id_for(source.name, tenant_id)
+    status["document_id"] = document_id
+    document_metadata = {"title": Path(source.name).name, "source": source.name, **metadata}
+    try:
+        result = ingest_pages(
+            document_id,
+            _iter_source_pages(source, file_type),
+            document_metadata,
+            tenant_id,
+            embed=embed,
+            bump_version=False,
+        )
+    except Exception as e:
+        logger.error(f"Failed to ingest {source.name} (tenant {tenant_id}): {e}")
+        return {**status, "status": "failed", "error": str(e)}, False
+
+    status.update(status="completed", chunks=result["chunks"], new=result["new"], duplicates=result["duplicates"])
+    return status, result["changed"]
+
+
+def ingest_batch(
+    paths: Iterable[str],
+    tenant_id: int,
+    metadata: Optional[dict] = None,
+    concurrency: int = BATCH_INGEST_CONCURRENCY,
+) -> Dict[str, Any]:
+    """
+    Ingest every document in a set of files, directories and archives.
+
+    A failing document is reported and doesn't stop the others. Files
+    with unsupported extensions are skipped.
+
+    Args:
+        paths: File, directory or zip/tar archive paths
+        tenant_id: Tenant identifier for multi-tenant isolation
+        metadata: Metadata added to every document
+        concurrency: Documents ingested at the same time
+
+    Returns:
+        Per-file status, counts and throughput (documents and chunks per second)
+    """
+    metadata = metadata or {}
+    embed = EmbeddingBatcher(max_delay=BATCH_EMBEDDING_DELAY)
+    files: List[Dict[str, Any]] = []
+    changed = False
+    started = time.perf_counter()
+
+    # Bound the documents in flight so archive members aren't all read into memory
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-ingest") as executor:
+        pending: Deque[Future] = deque()
+        for source in iter_sources(paths):
+            if len(pending) >= concurrency * 2:
+                status, document_changed = pending.popleft().result()
+                files.append(status)
+                changed |= document_changed
+            pending.append(executor.submit(_ingest_source, source, tenant_id, metadata, embed))
+        for future in pending:
+            status, document_changed = future.result()
+            files.append(status)
+            changed |= document_changed
+
+    if changed:
+        _bump_corpus_version(tenant_id)
+
+    seconds = time.perf_counter() - started
+    completed = [f for f in files if f["status"] == "completed"]
+    chunks = sum(f["chunks"] for f in completed)
+    result = {
+        "files": files,
+        "completed": len(completed),
+        "failed": sum(f["status"] == "failed" for f in files),
+        "skipped": sum(f["status"] == "skipped" for f in files),
+        "chunks": chunks,
+        "duplicates": sum(f["duplicates"] for f in completed),
+        "seconds": round(seconds, 3),
+        "docs_per_second": round(len(completed) / seconds, 2) if seconds else 0.0,
+        "chunks_per_second": round(chunks / seconds, 2) if seconds else 0.0,
+    }
+    logger.info(
+        f"Batch ingest for tenant {tenant_id}: {result['completed']} documents ({chunks} chunks) in "
+        f"{seconds:.1f}s, {result['docs_per_second']} docs/s, {result['chunks_per_second']} chunks/s; "
+        f"{result['failed']} failed, {result['skipped']} skipped"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest files, directories and zip/tar archives")
+    parser.add_argument("paths", nargs="+", help="Files, directories or zip/tar archives")
+    parser.add_argument("--tenant-id", type=int, required=True, help="Tenant to ingest the documents for")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_INGEST_CONCURRENCY,
+        help=f"Documents ingested at the same time (default: {BATCH_INGEST_CONCURRENCY})",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = ingest_batch(args.paths, args.tenant_id, concurrency=args.concurrency)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
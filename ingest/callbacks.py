@@ -0,0 +1,430 @@
+"""
+Non-blocking delivery of ingestion status callbacks.
+
+Callbacks that could not be delivered are kept in a dead-letter store.
+Running this module sends them again.
+
+Usage:
+    python -m ingest.callbacks [--limit N]
+"""
+
+import argparse
+import asyncio
+import atexit
+import itertools
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from ingest.config import (
+    CALLBACK_BATCH_PATH,
+    CALLBACK_COALESCE_DELAY,
+    CALLBACK_DEAD_LETTER_PATH,
+    CALLBACK_MAX_ATTEMPTS,
+    CALLBACK_MAX_CONNECTIONS,
+    CALLBACK_MAX_RETRY_DELAY,
+    CALLBACK_RETRY_DELAY,
+    CALLBACK_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+# Responses that may succeed when retried; other errors are final
+_RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class Callback:
+    """A status update for one callback URL."""
+
+    url: str
+    payload: Dict[str, Any]
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+    @property
+    def origin(self) -> str:
+        parts = urlsplit(self.url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+
+def _batch_results(response: httpx.Response) -> Optional[Dict[str, Any]]:
+    """Per-update results of a batch response, keyed by document ID as a string (None if not reported)."""
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    results = body.get("results") if isinstance(body, dict) else None
+    if not isinstance(results, dict):
+        return None
+    return {str(document_id): result for document_id, result in results.items()}
+
+
+class DeadLetterStore:
+    """Callbacks that could not be delivered, kept in a SQLite file."""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        """
+        Open the store, creating the database file if needed.
+
+        Args:
+            path: Path to the SQLite database file
+            timeout: Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letters (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, "
+            "payload TEXT NOT NULL, attempts INTEGER NOT NULL, error TEXT, created_at REAL NOT NULL)"
+        )
+
+    def add(self, callback: Callback) -> None:
+        """Store an undeliverable callback."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO dead_letters (url, payload, attempts, error, created_at) VALUES (?, ?, ?, ?, ?)",
+                (callback.url, json.dumps(callback.payload), callback.attempts, callback.last_error, time.time()),
+            )
+
+    def take(self, limit: Optional[int] = None) -> List[Callback]:
+        """
+        Remove and return the oldest stored callbacks.
+
+        Args:
+            limit: Maximum number of callbacks (None takes all)
+
+        Returns:
+            Callbacks, oldest first
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, url, payload FROM dead_letters ORDER BY id LIMIT ?",
+                    (limit if limit is not None else -1,),
+                ).fetchall()
+                self._conn.executemany("DELETE FROM dead_letters WHERE id = ?", [(row[0],) for row in rows])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [Callback(url=url, payload=json.loads(payload)) for _, url, payload in rows]
+
+    def count(self) -> int:
+        """Number of stored callbacks."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+
+
+class CallbackSender:
+    """
+    Delivers callbacks from a background thread with its own event loop.
+
+    send() only hands the callback over, so ingestion never waits on the
+    receiver. Connections are pooled and kept alive between callbacks.
+    Callbacks to the same host that arrive within coalesce_delay of each
+    other are sent as one {"updates": [...]} request to batch_path, whose
+    response reports a result per document ({"results": {id: "ok", ...}});
+    if the receiver has no batch endpoint, or doesn't report results, they
+    are sent one by one. Failures are retried after exponentially growing,
+    fully jittered delays. Callbacks that still fail, or that the receiver
+    rejects (as a whole or per update), go to the dead-letter store.
+    """
+
+    def __init__(
+        self,
+        dead_letters: DeadLetterStore,
+        batch_path: Optional[str] = None,
+        coalesce_delay: float = 0.5,
+        max_attempts: int = 5,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        """
+        Initialize the sender. The background thread starts on the first send.
+
+        Args:
+            dead_letters: Store for undeliverable callbacks
+            batch_path: Path of the receiver's batch endpoint (None disables coalescing)
+            coalesce_delay: Seconds to wait for more callbacks to the same host
+            max_attempts: Delivery attempts per callback
+            retry_delay: Upper bound of the first retry delay, doubled per attempt
+            max_retry_delay: Upper bound of any retry delay
+            timeout: Request timeout in seconds
+            max_connections: Connections kept open across hosts
+            client: HTTP client to use instead of a pooled default
+        """
+        self.dead_letters = dead_letters
+        self.batch_path = batch_path
+        self.coalesce_delay = coalesce_delay
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._client = client or httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closing = False
+
+        # Only touched from the event loop thread
+        self._pending: Dict[str, List[Callback]] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._retrying: Dict[int, Tuple[asyncio.TimerHandle, Callback]] = {}
+        self._retry_ids = itertools.count()
+        self._tasks: set = set()
+
+    def send(self, url: str, payload: Dict[str, Any]) -> None:
+        """
+        Queue a callback for delivery without waiting for it.
+
+        Args:
+            url: Callback URL
+            payload: JSON payload
+        """
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="callback-sender", daemon=True)
+                self._thread.start()
+            self._loop.call_soon_threadsafe(self._add, Callback(url=url, payload=payload))
+
+    def close(self, timeout: float = 30.0) -> None:
+        """
+        Deliver pending callbacks once more and stop the sender.
+
+        Callbacks that are still undelivered (including those waiting for
+        a retry) go to the dead-letter store.
+
+        Args:
+            timeout: Seconds to wait for the final deliveries
+        """
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._drain(), loop).result(timeout)
+        except Exception as e:
+            logger.error(f"Could not deliver pending callbacks on shutdown: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout)
+
+    def _add(self, callback: Callback) -> None:
+        self._pending.setdefault(callback.origin, []).append(callback)
+        if callback.origin not in self._flush_handles:
+            self._flush_handles[callback.origin] = asyncio.get_running_loop().call_later(
+                self.coalesce_delay, self._flush, callback.origin
+            )
+
+    def _flush(self, origin: str) -> None:
+        del self._flush_handles[origin]
+        task = asyncio.get_running_loop().create_task(self._deliver(origin, self._pending.pop(origin)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _retry(self, retry_id: int) -> None:
+        _, callback = self._retrying.pop(retry_id)
+        self._add(callback)
+
+    async def _deliver(self, origin: str, callbacks: List[Callback]) -> None:
+        if self.batch_path and len(callbacks) > 1:
+            callbacks = await self._deliver_batch(origin, callbacks)
+
+        errors = await asyncio.gather(*(self._post(cb.url, cb.payload) for cb in callbacks))
+        for callback, error in zip(callbacks, errors):
+            if error is None:
+                logger.info(f"Callback delivered to {callback.url}")
+            else:
+                self._failed(callback, *error)
+
+    async def _deliver_batch(self, origin: str, callbacks: List[Callback]) -> List[Callback]:
+        """Send callbacks as one batch request; returns those to send one by one instead."""
+        response, error = await self._request(origin + self.batch_path, {"updates": [cb.payload for cb in callbacks]})
+        if error is not None:
+            message, retryable = error
+            if retryable:
+                for callback in callbacks:
+                    self._failed(callback, message, retryable)
+                return []
+            logger.warning(f"Batch callback to {origin} rejected ({message}), sending callbacks one by one")
+            return callbacks
+
+        results = _batch_results(response)
+        if results is None:
+            logger.warning(f"Batch callback to {origin} reported no per-update results, sending callbacks one by one")
+            return callbacks
+
+        delivered = 0
+        for callback in callbacks:
+            result = results.get(str(callback.payload.get("document_id")))
+            if result == "ok":
+                delivered += 1
+            elif result is None:
+                self._failed(callback, "No result for this update in the batch response", True)
+            else:
+                self._failed(callback, f"Batch update rejected: {result}", False)
+        logger.info(f"Delivered {delivered} of {len(callbacks)} callbacks to {origin} in one batch")
+        return []
+
+    async def _post(self, url: str, body: Dict[str, Any]) -> Optional[Tuple[str, bool]]:
+        """Send one request; returns None on success, else the error and whether to retry."""
+        _, error = await self._request(url, body)
+        return error
+
+    async def _request(
+        self, url: str, body: Dict[str, Any]
+    ) -> Tuple[Optional[httpx.Response], Optional[Tuple[str, bool]]]:
+        """Send one request; returns the response on success, else the error and whether to retry."""
+        try:
+            response = await self._client.post(url, json=body)
+        except httpx.TransportError as e:
+            return None, (f"{type(e).__name__}: {e}", True)
+        except httpx.HTTPError as e:
+            return None, (f"{type(e).__name__}: {e}", False)
+
+        if response.status_code in _RETRYABLE_STATUS:
+            return None, (f"HTTP {response.status_code}", True)
+        if response.is_error:
+            return None, (f"HTTP {response.status_code}", False)
+        return response, None
+
+    def _failed(self, callback: Callback, error: str, retryable: bool) -> None:
+        callback.attempts += 1
+        callback.last_error = error
+        if retryable and not self._closing and callback.attempts < self.max_attempts:
+            # Full jitter keeps retries from many callbacks from arriving together
+            delay = random.uniform(0, min(self.retry_delay * 2 ** (callback.attempts - 1), self.max_retry_delay))
+            retry_id = next(self._retry_ids)
+            handle = asyncio.get_running_loop().call_later(delay, self._retry, retry_id)
+            self._retrying[retry_id] = (handle, callback)
+            logger.warning(
+                f"Callback to {callback.url} failed (attempt {callback.attempts}/{self.max_attempts}): {error}. "
+                f"Retrying in {delay:.1f}s"
+            )
+            return
+
+        logger.error(f"Callback to {callback.url} undeliverable after {callback.attempts} attempts: {error}")
+        try:
+            self.dead_letters.add(callback)
+        except Exception as e:
+            logger.error(f"Could not store undeliverable callback to {callback.url}: {e}")
+
+    async def _drain(self) -> None:
+        """Make a last delivery attempt for everything not yet delivered."""
+        self._closing = True
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        for handle in self._flush_handles.values():
+            handle.cancel()
+        self._flush_handles.clear()
+        for handle, callback in self._retrying.values():
+            handle.cancel()
+            self._pending.setdefault(callback.origin, []).append(callback)
+        self._retrying.clear()
+
+        pending, self._pending = self._pending, {}
+        await asyncio.gather(*(self._deliver(origin, callbacks) for origin, callbacks in pending.items()))
+        await self._client.aclose()
+
+
+# Lazy initialization - the sender thread starts with the first callback
+_sender: Optional[CallbackSender] = None
+_sender_lock = threading.Lock()
+
+
+def _get_sender() -> CallbackSender:
+    """Get or create the process-wide callback sender, flushed at exit."""
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = CallbackSender(
+                DeadLetterStore(CALLBACK_DEAD_LETTER_PATH),
+                batch_path=CALLBACK_BATCH_PATH or None,
+                coalesce_delay=CALLBACK_COALESCE_DELAY,
+                max_attempts=CALLBACK_MAX_ATTEMPTS,
+                retry_delay=CALLBACK_RETRY_DELAY,
+                max_retry_delay=CALLBACK_MAX_RETRY_DELAY,
+                timeout=CALLBACK_TIMEOUT,
+                max_connections=CALLBACK_MAX_CONNECTIONS,
+            )
+            atexit.register(_sender.close)
+        return _sender
+
+
+def send_callback(url: str, payload: Dict[str, Any]) -> None:
+    """
+    Queue a status callback without blocking the caller.
+
+    Args:
+        url: Callback URL
+        payload: JSON payload
+    """
+    _get_sender().send(url, payload)
+
+
+def redeliver_dead_letters(limit: Optional[int] = None) -> Dict[str, int]:
+    """
+    Send stored undeliverable callbacks again.
+
+    Callbacks that fail again are stored again.
+
+    Args:
+        limit: Maximum number of callbacks to send (None sends all)
+
+    Returns:
+        Number of callbacks sent and number still undeliverable
+    """
+    store = DeadLetterStore(CALLBACK_DEAD_LETTER_PATH)
+    callbacks = store.take(limit)
+    before = store.count()
+
+    sender = CallbackSender(
+        store,
+        batch_path=CALLBACK_BATCH_PATH or None,
+        coalesce_delay=CALLBACK_COALESCE_DELAY,
+        max_attempts=CALLBACK_MAX_ATTEMPTS,
+        retry_delay=CALLBACK_RETRY_DELAY,
+        max_retry_delay=CALLBACK_MAX_RETRY_DELAY,
+        timeout=CALLBACK_TIMEOUT,
+        max_connections=CALLBACK_MAX_CONNECTIONS,
+    )
+    for callback in callbacks:
+        sender.send(callback.url, callback.payload)
+    sender.close()
+
+    return {"sent": len(callbacks), "undeliverable": store.count() - before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send undeliverable ingest callbacks again")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of callbacks to send (default: all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = redeliver_dead_letters(args.limit)
+    logger.info(f"Redelivery finished: {result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,19 @@ Chunking strategies for document processing.
 """
 
 from .base import Chunker
-from .semantic import semantic_chunk
+from .semantic import SemanticChunker, iter_semantic_chunks, semantic_chunk
+from .similarity import SimilarityChunker, iter_similarity_chunks
+from .structure import StructureChunker
+from .token import TokenChunker, iter_token_chunks
 
-__all__ = ["Chunker", "semantic_chunk"]
+__all__ = [
+    "Chunker",
+    "SemanticChunker",
+    "semantic_chunk",
+    "iter_semantic_chunks",
+    "TokenChunker",
+    "iter_token_chunks",
+    "SimilarityChunker",
+    "iter_similarity_chunks",
+    "StructureChunker",
+]
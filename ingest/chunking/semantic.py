@@ -1,12 +1,161 @@
-def semantic_chunk(text: str, max_tokens: int = 500, overlap: int = 100):
-    words = text.split()
-    chunks = []
-
-    start = 0
-    while start < len(words):
-        end = start + max_tokens
-        chunk = " ".join(words[start:end])
-        chunks.append(chunk)
-        start = end - overlap
-
-    return chunks
+"""
+Word-window chunking.
+
+Chunks are windows of words over the original text. Word boundaries are
+found with a regex scan, so chunks are slices of the text (keeping its
+whitespace) with their character offsets, and no word list or re-joined
+copy of the document is ever built.
+"""
+
+import re
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Tuple
+
+from ..models import Chunk
+from .base import Chunker
+
+_WORD = re.compile(r"\S+")
+
+
+def _iter_chunk_spans(texts: Iterable[str], max_tokens: int, overlap: int) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yield (text, start, end) for each chunk of the newline-joined texts.
+
+    Each chunk holds max_tokens words, the last one possibly fewer, and
+    consecutive chunks share overlap words. Offsets are character positions
+    in the joined text. Only the current text and the word spans of one
+    chunk are held in memory.
+
+    Raises:
+        ValueError: If the text needs more than one chunk and overlap is
+            not smaller than max_tokens
+    """
+    step = max_tokens - overlap
+    buffer = ""
+    # Document offset of buffer[0]
+    base = 0
+    # Spans (relative to buffer) of the words in the current window
+    window: Deque[Tuple[int, int]] = deque()
+    # Words in the window not yet part of an emitted chunk
+    unemitted = 0
+
+    for i, text in enumerate(texts):
+        if i == 0:
+            buffer = text
+        else:
+            # Drop what precedes the window before appending the next text
+            cut = window[0][0] if window else len(buffer)
+            base += cut
+            buffer = buffer[cut:] + "\n" + text
+            window = deque((start - cut, end - cut) for start, end in window)
+        offset = len(buffer) - len(text)
+
+        for match in _WORD.finditer(text):
+            if len(window) == max_tokens:
+                if step <= 0:
+                    raise ValueError("overlap must be smaller than max_tokens")
+                for _ in range(step):
+                    window.popleft()
+            window.append((match.start() + offset, match.end() + offset))
+            unemitted += 1
+            if len(window) == max_tokens:
+                start, end = window[0][0], window[-1][1]
+                yield buffer[start:end], base + start, base + end
+                unemitted = 0
+
+    if unemitted:
+        start, end = window[0][0], window[-1][1]
+        yield buffer[start:end], base + start, base + end
+
+
+class SemanticChunker(Chunker):
+    """Splits content into overlapping windows of words, keeping their character offsets."""
+
+    def iter_chunks(
+        self,
+        content: str,
+        document_id: int,
+        tenant_id: int,
+        metadata: Dict[str, Any],
+        chunk_size: int = 500,
+        chunk_overlap: int = 100,
+    ) -> Iterator[Chunk]:
+        """
+        Lazily split content into chunks.
+
+        Chunk texts are slices of content, so content[chunk.start_index:chunk.end_index]
+        is the chunk text. All chunks share the metadata dict.
+
+        Args:
+            content: Text content to chunk
+            document_id: ID of the source document
+            tenant_id: Tenant identifier for multi-tenancy
+            metadata: Additional metadata to attach to chunks
+            chunk_size: Words per chunk
+            chunk_overlap: Words shared by consecutive chunks
+
+        Yields:
+            Chunks in document order
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+
+        for index, (text, start, end) in enumerate(_iter_chunk_spans([content], chunk_size, chunk_overlap)):
+            yield Chunk(
+                text=text,
+                chunk_id=f"{document_id}-{index}",
+                document_id=document_id,
+                tenant_id=tenant_id,
+                metadata=metadata,
+                start_index=start,
+                end_index=end,
+            )
+
+    async def chunk(
+        self,
+        content: str,
+        document_id: int,
+        tenant_id: int,
+        metadata: Dict[str, Any],
+        chunk_size: int = 500,
+        chunk_overlap: int = 100,
+    ) -> List[Chunk]:
+        """Split content into chunks (see iter_chunks)."""
+        return list(self.iter_chunks(content, document_id, tenant_id, metadata, chunk_size, chunk_overlap))
+
+
+def semantic_chunk(text: str, max_tokens: int = 500, overlap: int = 100) -> List[str]:
+    """
+    Split text into overlapping windows of words.
+
+    Args:
+        text: Text to chunk
+        max_tokens: Words per chunk
+        overlap: Words shared by consecutive chunks
+
+    Returns:
+        Chunk texts in document order; an empty text gives one empty chunk
+    """
+    return [chunk for chunk, _, _ in _iter_chunk_spans([text], max_tokens, overlap)] or [""]
+
+
+def iter_semantic_chunks(texts: Iterable[str], max_tokens: int = 500, overlap: int = 100) -> Iterator[str]:
+    """
+    Chunk a stream of texts (e.g. pages) without joining them first.
+
+    Yields the same chunks as semantic_chunk on the newline-joined texts,
+    while only holding the current text and one chunk's worth of words.
+
+    Args:
+        texts: Texts in document order
+        max_tokens: Words per chunk
+        overlap: Words shared by consecutive chunks
+
+    Yields:
+        Chunk texts in document order
+    """
+    if max_tokens - overlap <= 0:
+        raise ValueError("overlap must be smaller than max_tokens")
+
+    for chunk, _, _ in _iter_chunk_spans(texts, max_tokens, overlap):
+        yield chunk
@@ -0,0 +1,256 @@
+"""
+Embedding-similarity chunking.
+
+The text is split into sentences, which are embedded in large batches.
+A chunk ends where the next sentence is unusually far (in cosine distance)
+from the previous one, i.e. where the topic shifts, within min/max token
+sizes. Sentence embeddings go through the chunk embedding cache, so
+re-ingesting a document doesn't embed its sentences again.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from core.tokenizer import Tokenizer, get_tokenizer
+
+from ..config import OPENAI_EMBEDDING_MODEL
+from ..embeddings.cache import embed_chunks
+from ..models import Chunk
+from .base import Chunker
+from .token import _SENTENCE_END, _iter_token_chunk_spans
+
+# Text without any sentence end is cut into pseudo-sentences of this many
+# characters so a page (or document) without punctuation isn't held whole
+_MAX_SENTENCE_CHARS = 20_000
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+def _iter_sentences(texts: Iterable[str]) -> Iterator[Tuple[str, int]]:
+    """
+    Split the newline-joined texts into sentences.
+
+    Yields:
+        (piece, start) pairs; a piece is a sentence with the whitespace
+        before it, so joined in order the pieces give the joined text
+        (except trailing whitespace). start is the piece's offset.
+    """
+    carry = ""
+    # Document offset of carry[0]
+    base = 0
+    for i, text in enumerate(texts):
+        buffer = carry + "\n" + text if i else text
+        last = 0
+        for match in _SENTENCE_END.finditer(buffer):
+            # Whitespace between sentence ends stays with the next sentence
+            end = match.end()
+            if buffer[last:end].strip():
+                yield buffer[last:end], base + last
+                last = end
+        while len(buffer) - last > _MAX_SENTENCE_CHARS:
+            end = last + _MAX_SENTENCE_CHARS
+            yield buffer[last:end], base + last
+            last = end
+        carry = buffer[last:]
+        base += last
+
+    if carry.strip():
+        yield carry, base
+
+
+def _split_long(piece: str, start: int, tokenizer: Tokenizer, max_tokens: int) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yield (piece, start, tokens) for a sentence, split on token boundaries if it exceeds max_tokens.
+
+    Split parts keep the whitespace between them, so they still join into
+    the original piece.
+    """
+    tokens = tokenizer.count(piece)
+    if tokens <= max_tokens:
+        yield piece, start, tokens
+        return
+
+    spans = list(_iter_token_chunk_spans([piece], tokenizer, max_tokens, 0))
+    cuts = [0] + [span_start for _, span_start, _ in spans[1:]] + [len(piece)]
+    for (text, _, _), part_start, part_end in zip(spans, cuts, cuts[1:]):
+        yield piece[part_start:part_end], start + part_start, tokenizer.count(text)
+
+
+def _sentence_distances(embeddings: np.ndarray) -> np.ndarray:
+    """Cosine distance between each pair of consecutive sentence embeddings."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = embeddings / np.maximum(norms, 1e-12)
+    return 1.0 - np.einsum("ij,ij->i", unit[:-1], unit[1:])
+
+
+def _iter_similarity_chunk_spans(
+    texts: Iterable[str],
+    tokenizer: Tokenizer,
+    max_tokens: int,
+    min_tokens: int,
+    percentile: float,
+    embed: Optional[EmbedFn],
+    window: int,
+) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yield (text, start, end) for each chunk of the newline-joined texts.
+
+    Sentences are embedded window sentences at a time. Within a window, the
+    distances above the given percentile are breakpoints; a chunk ends at a
+    breakpoint once it has min_tokens, and before any sentence that would
+    take it over max_tokens.
+    """
+    if min_tokens > max_tokens:
+        raise ValueError("min_tokens must not be larger than max_tokens")
+
+    # Sentences of the chunk being built: (piece, start) and its token count
+    group: List[Tuple[str, int]] = []
+    group_tokens = 0
+    # Embedding of the sentence before the current window
+    previous: Optional[np.ndarray] = None
+
+    def flush() -> Tuple[str, int, int]:
+        """Build the chunk from the grouped sentences, without surrounding whitespace."""
+        raw = "".join(piece for piece, _ in group)
+        text = raw.lstrip()
+        start = group[0][1] + len(raw) - len(text)
+        text = text.rstrip()
+        return text, start, start + len(text)
+
+    sentences = (
+        part for piece, start in _iter_sentences(texts) for part in _split_long(piece, start, tokenizer, max_tokens)
+    )
+    while batch := [sentence for _, sentence in zip(range(window), sentences)]:
+        embeddings, _ = embed_chunks([piece.strip() for piece, _, _ in batch], embed=embed)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if previous is not None:
+            vectors = np.vstack([previous, vectors])
+        distances = _sentence_distances(vectors)
+        if previous is None:
+            # The first sentence of the document has nothing before it
+            distances = np.concatenate([[0.0], distances])
+        breakpoints = distances > np.percentile(distances, percentile) if len(distances) > 1 else distances > 1.0
+        previous = vectors[-1:]
+
+        for (piece, start, tokens), breakpoint in zip(batch, breakpoints.tolist()):
+            if group and (group_tokens + tokens > max_tokens or (breakpoint and group_tokens >= min_tokens)):
+                yield flush()
+                group, group_tokens = [], 0
+            group.append((piece, start))
+            group_tokens += tokens
+
+    if group:
+        yield flush()
+
+
+def iter_similarity_chunks(
+    texts: Iterable[str],
+    max_tokens: int = 500,
+    min_tokens: int = 100,
+    percentile: float = 95.0,
+    tokenizer: Optional[Tokenizer] = None,
+    embed: Optional[EmbedFn] = None,
+    window: int = 1024,
+) -> Iterator[str]:
+    """
+    Chunk a stream of texts (e.g. pages) at topic shifts between sentences.
+
+    Args:
+        texts: Texts in document order
+        max_tokens: Maximum tokens per chunk
+        min_tokens: Tokens a chunk needs before it may end at a breakpoint
+        percentile: Sentence distances above this percentile are breakpoints
+        tokenizer: Tokenizer to count with (defaults to the embedding model's)
+        embed: Embeds sentences missing from the cache (defaults to embed_texts)
+        window: Sentences embedded per batch (and percentile window)
+
+    Yields:
+        Chunk texts in document order
+    """
+    tokenizer = tokenizer or get_tokenizer(OPENAI_EMBEDDING_MODEL)
+    spans = _iter_similarity_chunk_spans(texts, tokenizer, max_tokens, min_tokens, percentile, embed, window)
+    for chunk, _, _ in spans:
+        yield chunk
+
+
+class SimilarityChunker(Chunker):
+    """Splits content at topic shifts, found by comparing the embeddings of consecutive sentences."""
+
+    def __init__(
+        self,
+        tokenizer: Optional[Tokenizer] = None,
+        embed: Optional[EmbedFn] = None,
+        min_tokens: int = 100,
+        percentile: float = 95.0,
+        window: int = 1024,
+    ):
+        """
+        Initialize the chunker.
+
+        Args:
+            tokenizer: Tokenizer to count with (defaults to the embedding model's)
+            embed: Embeds sentences missing from the cache (defaults to embed_texts)
+            min_tokens: Tokens a chunk needs before it may end at a breakpoint
+            percentile: Sentence distances above this percentile are breakpoints
+            window: Sentences embedded per batch (and percentile window)
+        """
+        self.tokenizer = tokenizer
+        self.embed = embed
+        self.min_tokens = min_tokens
+        self.percentile = percentile
+        self.window = window
+
+    def iter_chunks(
+        self,
+        content: str,
+        document_id: int,
+        tenant_id: int,
+        metadata: Dict[str, Any],
+        chunk_size: int = 500,
+        chunk_overlap: int = 0,
+    ) -> Iterator[Chunk]:
+        """
+        Lazily split content into chunks.
+
+        Chunk texts are slices of content, so content[chunk.start_index:chunk.end_index]
+        is the chunk text. All chunks share the metadata dict.
+
+        Args:
+            content: Text content to chunk
+            document_id: ID of the source document
+            tenant_id: Tenant identifier for multi-tenancy
+            metadata: Additional metadata to attach to chunks
+            chunk_size: Maximum tokens per chunk
+            chunk_overlap: Unused; chunks end at topic shifts and don't overlap
+
+        Yields:
+            Chunks in document order
+        """
+        tokenizer = self.tokenizer or get_tokenizer(OPENAI_EMBEDDING_MODEL)
+        min_tokens = min(self.min_tokens, chunk_size)
+        spans = _iter_similarity_chunk_spans(
+            [content], tokenizer, chunk_size, min_tokens, self.percentile, self.embed, self.window
+        )
+        for index, (text, start, end) in enumerate(spans):
+            yield Chunk(
+                text=text,
+                chunk_id=f"{document_id}-{index}",
+                document_id=document_id,
+                tenant_id=tenant_id,
+                metadata=metadata,
+                start_index=start,
+                end_index=end,
+            )
+
+    async def chunk(
+        self,
+        content: str,
+        document_id: int,
+        tenant_id: int,
+        metadata: Dict[str, Any],
+        chunk_size: int = 500,
+        chunk_overlap: int = 0,
+    ) -> List[Chunk]:
+        """Split content into chunks (see iter_chunks)."""
+        return list(self.iter_chunks(content, document_id, tenant_id, metadata, chunk_size, chunk_overlap))
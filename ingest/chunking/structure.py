@@ -0,0 +1,198 @@
+"""
+Structure-aware chunking.
+
+Chunks never cross a page or a section: a page break or a heading always
+starts a new chunk. Within a section, whole paragraphs are packed into
+chunks up to the token budget; only paragraphs larger than the budget are
+split, at sentence ends where possible. Every chunk records its page, its
+section heading and its character offsets.
+"""
+
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.tokenizer import Tokenizer, get_tokenizer
+
+from ..config import OPENAI_EMBEDDING_MODEL
+from ..models import Chunk
+from .base import Chunker
+from .token import _iter_token_chunk_spans
+
+# Paragraphs are separated by blank lines
+_PARAGRAPH = re.compile(r"\S(?:.*?\S)?(?=\s*?\n[ \t]*\n|\s*\Z)", re.DOTALL)
+_BLANK_LINE = re.compile(r"\n[ \t]*\n")
+# PDF text extraction rarely produces blank lines; pages without any are
+# split into lines instead, which packing joins back up to the budget
+_LINE = re.compile(r"\S(?:[^\n]*\S)?")
+
+# Heading lines: Markdown headings, numbered headings ("2.1 Results") and
+# short all-caps lines. Lines ending in sentence punctuation are not headings.
+_MARKDOWN_HEADING = re.compile(r"#{1,6}[ \t]+(.+?)[ \t#]*")
+_NUMBERED_HEADING = re.compile(r"(?:\d+\.)*\d+\.?[ \t]+[A-Z][^\n]*")
+_CAPS_HEADING = re.compile(r"[A-Z][A-Z0-9 ,:&'()/-]+")
+_MAX_HEADING_CHARS = 80
+
+
+def _heading(paragraph: str) -> Optional[str]:
+    """Return the heading that opens a paragraph, if its first line is one."""
+    first_line, _, rest = paragraph.partition("\n")
+    first_line = first_line.strip()
+    if len(first_line) > _MAX_HEADING_CHARS or first_line.endswith((".", ",", ";", ":")):
+        return None
+
+    markdown = _MARKDOWN_HEADING.fullmatch(first_line)
+    if markdown:
+        return markdown.group(1)
+    # A numbered line followed by another one is a list, not a heading
+    if _NUMBERED_HEADING.fullmatch(first_line) and not _NUMBERED_HEADING.fullmatch(rest.partition("\n")[0].strip()):
+        return first_line
+    if _CAPS_HEADING.fullmatch(first_line) and sum(c.isalpha() for c in first_line) >= 3:
+        return first_line
+    return None
+
+
+def _iter_structured_spans(
+    pages: Iterable[str], tokenizer: Tokenizer, max_tokens: int, overlap: int
+) -> Iterator[Tuple[str, int, int, int, Optional[str]]]:
+    """
+    Yield (text, start, end, page, section) for each chunk of the pages.
+
+    Offsets are character positions in the newline-joined pages; pages are
+    numbered from 1. The section is the last heading seen (None before the
+    first one) and carries over to the following pages.
+    """
+    section: Optional[str] = None
+    # Document offset of the current page
+    base = 0
+
+    for page, text in enumerate(pages, 1):
+        # Span (within the page) and size of the chunk being built, and
+        # whether it is only a heading line
+        start = end = None
+        tokens = 0
+        heading_only = False
+
+        by_line = not _BLANK_LINE.search(text)
+        for match in (_LINE if by_line else _PARAGRAPH).finditer(text):
+            if by_line:
+                # The start of the next line tells a numbered heading from a list item
+                line_start = match.start()
+                context_end = match.end() + _MAX_HEADING_CHARS
+                heading = _heading(text[line_start:context_end])
+            else:
+                heading = _heading(match.group())
+            paragraph_tokens = tokenizer.count(match.group())
+
+            if paragraph_tokens > max_tokens:
+                # Too large for one chunk: split it, together with a heading right before it
+                if start is not None and not (heading_only and heading is None):
+                    yield text[start:end], base + start, base + end, page, section
+                    start = None
+                split_start = match.start() if start is None else start
+                section = heading or section
+                split_end = match.end()
+                spans = _iter_token_chunk_spans([text[split_start:split_end]], tokenizer, max_tokens, overlap)
+                for chunk, chunk_start, chunk_end in spans:
+                    yield chunk, base + split_start + chunk_start, base + split_start + chunk_end, page, section
+                start = None
+                continue
+
+            if start is not None and (heading is not None or tokens + paragraph_tokens > max_tokens):
+                yield text[start:end], base + start, base + end, page, section
+                start = None
+            section = heading or section
+            if start is None:
+                start = match.start()
+                tokens = 0
+                heading_only = heading is not None and "\n" not in match.group()
+            else:
+                heading_only = False
+            end = match.end()
+            tokens += paragraph_tokens
+
+        if start is not None:
+            yield text[start:end], base + start, base + end, page, section
+        base += len(text) + 1
+
+
+class StructureChunker(Chunker):
+    """Splits content along pages, sections and paragraphs, recording where each chunk comes from."""
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        """
+        Initialize the chunker.
+
+        Args:
+            tokenizer: Tokenizer to count with (defaults to the embedding model's)
+        """
+        self.tokenizer = tokenizer
+
+    def iter_page_chunks(
+        self,
+        pages: Iterable[str],
+        document_id: int,
+        tenant_id: int,
+        metadata: Dict[str, Any],
+        chunk_size: int = 500,
+        chunk_overlap: int = 100,
+    ) -> Iterator[Chunk]:
+        """
+        Lazily split a document, given page by page, into chunks.
+
+        Each chunk's metadata is the given metadata plus its page (from 1)
+        and section (heading text, or None before the first heading).
+        Offsets are positions in the newline-joined pages.
+
+        Args:
+            pages: Page texts in order
+            document_id: ID of the source document
+            tenant_id: Tenant identifier for multi-tenancy
+            metadata: Additional metadata to attach to chunks
+            chunk_size: Maximum tokens per chunk
+            chunk_overlap: Tokens shared by the chunks of a paragraph too
+                large for one chunk
+
+        Yields:
+            Chunks in document order
+        """
+        tokenizer = self.tokenizer or get_tokenizer(OPENAI_EMBEDDING_MODEL)
+        spans = _iter_structured_spans(pages, tokenizer, chunk_size, chunk_overlap)
+        for index, (text, start, end, page, section) in enumerate(spans):
+            yield Chunk(
+                text=text,
+                chunk_id=f"{document_id}-{index}",
+                document_id=document_id,
+                tenant_id=tenant_id,
+                metadata={**metadata, "page": page, "section": section},
+                start_index=start,
+                end_index=end,
+            )
+
+    def iter_chunks(
+        self,
+        content: str,
+        document_id: int,
+        tenant_id: int,
+        metadata: Dict[str, Any],
+        chunk_size: int = 500,
+        chunk_overlap: int = 100,
+    ) -> Iterator[Chunk]:
+        """
+        Lazily split content into chunks.
+
+        Pages are separated by form feeds (\\f); offsets are positions in
+        content.
+        """
+        return self.iter_page_chunks(content.split("\f"), document_id, tenant_id, metadata, chunk_size, chunk_overlap)
+
+    async def chunk(
+        self,
+        content: str,
+        document_id: int,
+        tenant_id: int,
+        metadata: Dict[str, Any],
+        chunk_size: int = 500,
+        chunk_overlap: int = 100,
+    ) -> List[Chunk]:
+        """Split content into chunks (see iter_chunks)."""
+        return list(self.iter_chunks(content, document_id, tenant_id, metadata, chunk_size, chunk_overlap))
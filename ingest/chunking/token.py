@@ -0,0 +1,214 @@
+"""
+Token-based chunking.
+
+Chunks are measured in the embedding model's tokens. The text is encoded
+once, segment by segment; chunks are cut on token boundaries, preferably at
+the end of a sentence, and are slices of the original text with their
+character offsets.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.tokenizer import Tokenizer, get_tokenizer
+
+from ..config import OPENAI_EMBEDDING_MODEL
+from ..models import Chunk
+from .base import Chunker
+
+# Texts are encoded in segments of about this many characters, so the
+# token offsets of a huge text are never all held at once
+_SEGMENT_CHARS = 1 << 20
+
+# Sentence ends: terminal punctuation (and closing quotes or brackets)
+# followed by whitespace, or the end of a paragraph
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'”’)\]]*(?=\s|\Z)|(?<=\S)(?=\n[ \t]*\n)")
+
+
+def _iter_segments(texts: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Split texts into segments of at most about _SEGMENT_CHARS characters.
+
+    Yields:
+        (separator, segment) pairs; joined in order they give the
+        newline-joined texts
+    """
+    for i, text in enumerate(texts):
+        separator = "\n" if i else ""
+        start = 0
+        while len(text) - start > _SEGMENT_CHARS:
+            # Split before whitespace so no token straddles two segments
+            end = max(text.rfind("\n", start, start + _SEGMENT_CHARS), text.rfind(" ", start, start + _SEGMENT_CHARS))
+            if end <= start:
+                end = start + _SEGMENT_CHARS
+            yield separator, text[start:end]
+            separator = ""
+            start = end
+        yield separator, text[start:] if start else text
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Narrow text[start:end] to exclude leading and trailing whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _iter_token_chunk_spans(
+    texts: Iterable[str], tokenizer: Tokenizer, max_tokens: int, overlap: int
+) -> Iterator[Tuple[str, int, int]]:
+    """
+    Yield (text, start, end) for each chunk of the newline-joined texts.
+
+    Each chunk has at most max_tokens tokens. It ends at the last sentence
+    end that keeps it at least half full, or at max_tokens otherwise. The
+    next chunk starts overlap tokens earlier, moved forward to the first
+    sentence start within the overlap if there is one. Offsets are character
+    positions in the joined text.
+    """
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+    min_tokens = max(max_tokens // 2, overlap + 1)
+
+    buffer = ""
+    # Document offset of buffer[0]
+    base = 0
+    # Token starts (relative to buffer), from the first token of the next chunk
+    offsets: List[int] = []
+    # Sentence ends (relative to buffer), ascending
+    ends: List[int] = []
+    # End of the last emitted chunk (relative to buffer)
+    emitted = 0
+
+    def cut() -> Tuple[str, int, int]:
+        """Emit the chunk starting at offsets[0] and drop the tokens the next chunk doesn't reuse."""
+        nonlocal emitted
+        stop = max_tokens
+        i = bisect_right(ends, offsets[max_tokens]) - 1
+        if i >= 0 and ends[i] > offsets[min_tokens]:
+            stop = bisect_left(offsets, ends[i], min_tokens, max_tokens)
+
+        start, end = _strip_span(buffer, offsets[0], offsets[stop])
+        emitted = offsets[stop]
+
+        next_start = stop - overlap
+        i = bisect_left(ends, offsets[next_start])
+        if i < len(ends):
+            sentence_start = bisect_left(offsets, ends[i], next_start, stop)
+            if sentence_start < stop:
+                next_start = sentence_start
+        del offsets[:next_start]
+        return buffer[start:end], base + start, base + end
+
+    for separator, segment in _iter_segments(texts):
+        # Drop the text before the next chunk before appending the segment
+        drop = min(offsets[0] if offsets else len(buffer), emitted)
+        if drop:
+            base += drop
+            buffer = buffer[drop:]
+            offsets = [offset - drop for offset in offsets]
+            ends = [end - drop for end in ends if end > drop]
+            emitted -= drop
+
+        shift = len(buffer) + len(separator)
+        buffer = buffer + separator + segment if buffer or separator else segment
+        offsets.extend(shift + offset for offset in tokenizer.offsets(segment))
+        ends.extend(shift + match.end() for match in _SENTENCE_END.finditer(segment))
+
+        while len(offsets) > max_tokens:
+            text, start, end = cut()
+            if text:
+                yield text, start, end
+
+    # The rest of the text, unless it's all part of the last chunk already
+    if offsets and buffer[emitted:].strip():
+        start, end = _strip_span(buffer, offsets[0], len(buffer))
+        yield buffer[start:end], base + start, base + end
+
+
+def iter_token_chunks(
+    texts: Iterable[str], max_tokens: int = 500, overlap: int = 100, tokenizer: Optional[Tokenizer] = None
+) -> Iterator[str]:
+    """
+    Chunk a stream of texts (e.g. pages) by model tokens.
+
+    Args:
+        texts: Texts in document order
+        max_tokens: Maximum tokens per chunk
+        overlap: Tokens shared by consecutive chunks (less when the overlap
+            is moved to a sentence start)
+        tokenizer: Tokenizer to count with (defaults to the embedding model's)
+
+    Yields:
+        Chunk texts in document order
+    """
+    tokenizer = tokenizer or get_tokenizer(OPENAI_EMBEDDING_MODEL)
+    for chunk, _, _ in _iter_token_chunk_spans(texts, tokenizer, max_tokens, overlap):
+        yield chunk
+
+
+class TokenChunker(Chunker):
+    """Splits content into chunks of model tokens, cutting at sentence ends where possible."""
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        """
+        Initialize the chunker.
+
+        Args:
+            tokenizer: Tokenizer to count with (defaults to the embedding model's)
+        """
+        self.tokenizer = tokenizer
+
+    def iter_chunks(
+        self,
+        content: str,
+        document_id: int,
+        tenant_id: int,
+        metadata: Dict[str, Any],
+        chunk_size: int = 500,
+        chunk_overlap: int = 100,
+    ) -> Iterator[Chunk]:
+        """
+        Lazily split content into chunks.
+
+        Chunk texts are slices of content, so content[chunk.start_index:chunk.end_index]
+        is the chunk text. All chunks share the metadata dict.
+
+        Args:
+            content: Text content to chunk
+            document_id: ID of the source document
+            tenant_id: Tenant identifier for multi-tenancy
+            metadata: Additional metadata to attach to chunks
+            chunk_size: Maximum tokens per chunk
+            chunk_overlap: Tokens shared by consecutive chunks
+
+        Yields:
+            Chunks in document order
+        """
+        tokenizer = self.tokenizer or get_tokenizer(OPENAI_EMBEDDING_MODEL)
+        spans = _iter_token_chunk_spans([content], tokenizer, chunk_size, chunk_overlap)
+        for index, (text, start, end) in enumerate(spans):
+            yield Chunk(
+                text=text,
+                chunk_id=f"{document_id}-{index}",
+                document_id=document_id,
+                tenant_id=tenant_id,
+                metadata=metadata,
+                start_index=start,
+                end_index=end,
+            )
+
+    async def chunk(
+        self,
+        content: str,
+        document_id: int,
+        tenant_id: int,
+        metadata: Dict[str, Any],
+        chunk_size: int = 500,
+        chunk_overlap: int = 100,
+    ) -> List[Chunk]:
+        """Split content into chunks (see iter_chunks)."""
+        return list(self.iter_chunks(content, document_id, tenant_id, metadata, chunk_size, chunk_overlap))
@@ -11,7 +11,86 @@ load_dotenv()
 # Qdrant Configuration
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
 QDRANT_COLLECTION = os.getenv("QDRANT_COLLECTION", "contexta_documents")
+# Talk to Qdrant over gRPC (binary vectors, HTTP/2) instead of JSON over REST
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+# Upserts are split into batches of this many points, sent this many at a time
+QDRANT_UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))
+QDRANT_UPSERT_PARALLEL = int(os.getenv("QDRANT_UPSERT_PARALLEL", "4"))
+# Multitenant HNSW: every search filters by tenant_id, so the global graph is
+# disabled (m=0) and a per-tenant graph is built instead (payload_m)
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", "0"))
+QDRANT_HNSW_PAYLOAD_M = int(os.getenv("QDRANT_HNSW_PAYLOAD_M", "16"))
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
+
+# Vector sizes of the supported embedding models
+EMBEDDING_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+# Streaming ingest: chunks embedded and stored per window. Memory use is
+# bounded by a few windows, independent of document size.
+INGEST_WINDOW_SIZE = int(os.getenv("INGEST_WINDOW_SIZE", "256"))
+
+# Chunking: "words" (windows of whitespace-separated words), "tokens"
+# (embedding model tokens, cut at sentence ends), "similarity" (cut where
+# consecutive sentence embeddings diverge, sized in tokens) or "structure"
+# (whole paragraphs within a page and section, sized in tokens, with page,
+# section and offsets stored per chunk). Sizes are in those units;
+# similarity and structure chunks don't overlap.
+CHUNKING_STRATEGY = os.getenv("CHUNKING_STRATEGY", "words")
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "500"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "100"))
+# Similarity chunking: minimum chunk size before a breakpoint can end it, and
+# the percentile of sentence distances above which a distance is a breakpoint
+CHUNK_MIN_SIZE = int(os.getenv("CHUNK_MIN_SIZE", "100"))
+CHUNK_BREAKPOINT_PERCENTILE = float(os.getenv("CHUNK_BREAKPOINT_PERCENTILE", "95"))
+
+# Near-duplicate suppression: a chunk whose MinHash similarity to a chunk of
+# another document of the same tenant reaches DEDUP_THRESHOLD is stored as a
+# reference to it instead of a new vector. Chunks of fewer than
+# DEDUP_MIN_WORDS words are always stored. Signatures are indexed in
+# DEDUP_INDEX_PATH; changing DEDUP_NUM_PERM, DEDUP_BANDS or
+# DEDUP_SHINGLE_SIZE makes the indexed signatures incomparable, so delete it.
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "false").lower() == "true"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", "20"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "5"))
+DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", ".cache/dedup.db")
+
+# PDF extraction: worker processes (0 extracts in-process), pages per task and
+# seconds allowed per page before it is skipped (0 disables the limit). The
+# processes form one pool per ingest process, shared by all documents.
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", "60"))
+
+# Chunk embedding cache (SQLite file, leave empty to disable)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/chunk_embeddings.db")
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(2 * 1024**3)))
+
+# Status callbacks: sent from a background sender with pooled keep-alive
+# connections. Callbacks to the same host within the coalesce delay go out
+# as one batch request to CALLBACK_BATCH_PATH (empty sends them one by one).
+CALLBACK_TIMEOUT = float(os.getenv("CALLBACK_TIMEOUT", "10"))
+CALLBACK_MAX_CONNECTIONS = int(os.getenv("CALLBACK_MAX_CONNECTIONS", "20"))
+CALLBACK_COALESCE_DELAY = float(os.getenv("CALLBACK_COALESCE_DELAY", "0.5"))
+CALLBACK_BATCH_PATH = os.getenv("CALLBACK_BATCH_PATH", "/api/documents/ingest-callbacks/")
+# Retries use exponential backoff with full jitter
+CALLBACK_MAX_ATTEMPTS = int(os.getenv("CALLBACK_MAX_ATTEMPTS", "5"))
+CALLBACK_RETRY_DELAY = float(os.getenv("CALLBACK_RETRY_DELAY", "1.0"))
+CALLBACK_MAX_RETRY_DELAY = float(os.getenv("CALLBACK_MAX_RETRY_DELAY", "60"))
+# Undeliverable callbacks are kept in this SQLite file
+CALLBACK_DEAD_LETTER_PATH = os.getenv("CALLBACK_DEAD_LETTER_PATH", ".cache/callback_dead_letters.db")
+
+# Bulk ingest: documents processed at the same time. Their embedding requests
+# are merged into shared batches, waiting up to the delay for others to join.
+BATCH_INGEST_CONCURRENCY = int(os.getenv("BATCH_INGEST_CONCURRENCY", "8"))
+BATCH_EMBEDDING_DELAY = float(os.getenv("BATCH_EMBEDDING_DELAY", "0.05"))
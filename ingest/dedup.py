@@ -0,0 +1,534 @@
+"""
+Near-duplicate chunk suppression.
+
+Each chunk gets a MinHash signature of its word shingles. Signatures of
+stored chunks are indexed per tenant with locality-sensitive hashing (LSH)
+in a SQLite file, so a new chunk is only compared with the few stored
+chunks that share a band with it. A chunk whose estimated Jaccard
+similarity to a chunk of another document of the same tenant reaches the
+threshold is not embedded or stored in the vector store: it is recorded
+as a reference to that chunk, with its own text and payload and the bytes
+and tokens it would have cost. When a referenced chunk is deleted, one of
+the chunks referring to it is embedded and stored in its place, and the
+others refer to that one instead.
+
+Running this module prints how much was saved.
+
+Usage:
+    python -m ingest.dedup [--tenant-id N]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ingest.config import (
+    DEDUP_BANDS,
+    DEDUP_ENABLED,
+    DEDUP_INDEX_PATH,
+    DEDUP_MIN_WORDS,
+    DEDUP_NUM_PERM,
+    DEDUP_SHINGLE_SIZE,
+    DEDUP_THRESHOLD,
+    EMBEDDING_DIMENSIONS,
+    OPENAI_EMBEDDING_MODEL,
+)
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_MAX_KEYS_PER_QUERY = 500
+
+_WORD = re.compile(r"\w+")
+
+# Hash permutations h(x) = (a * x + b) mod p over 32-bit shingle hashes
+_PRIME = 4294967291
+_SEED = 1
+
+
+class MinHasher:
+    """MinHash signatures of word shingles."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, min_words: int = 20):
+        """
+        Initialize the hasher.
+
+        Args:
+            num_perm: Hash permutations (signature length)
+            shingle_size: Words per shingle
+            min_words: Texts with fewer words get no signature
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        # a < 2**31 keeps a * x + b within 64 bits for 32-bit x
+        rng = np.random.default_rng(_SEED)
+        self._a = rng.integers(1, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a text.
+
+        Returns:
+            uint32 array of num_perm minimums, or None if the text is too
+            short to be compared reliably
+        """
+        words = _WORD.findall(text.lower())
+        if len(words) < max(self.min_words, 1):
+            return None
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[start:end]) for start, end in enumerate(range(size, len(words) + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+@dataclass
+class Reference:
+    """A chunk stored as a reference to a near-duplicate point, with what it takes to store it itself."""
+
+    point_id: str
+    document_id: int
+    chunk_index: int
+    canonical_id: str
+    similarity: float
+    text: str
+    tokens: int
+    payload: Dict[str, Any]
+    signature: np.ndarray
+
+
+class NearDuplicateIndex:
+    """Per-tenant LSH index of chunk signatures and the references that replaced near-duplicate chunks."""
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        min_words: int = 20,
+        timeout: float = 5.0,
+    ):
+        """
+        Open the index, creating the database file if needed.
+
+        Args:
+            path: Path to the SQLite database file
+            threshold: Minimum estimated Jaccard similarity of a near-duplicate
+            num_perm: Signature length
+            bands: LSH bands; num_perm must be a multiple of it. More bands
+                find less similar candidates, at the cost of more lookups.
+            shingle_size: Words per shingle
+            min_words: Chunks with fewer words are never deduplicated
+            timeout: Seconds to wait for a lock held by another process
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.hasher = MinHasher(num_perm, shingle_size, min_words)
+        self._rows = num_perm // bands
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Create the tables and indexes."""
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures (point_id TEXT PRIMARY KEY, tenant_id INTEGER NOT NULL, "
+            "document_id INTEGER NOT NULL, signature BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS signatures_document ON signatures (tenant_id, document_id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lsh_bands (tenant_id INTEGER NOT NULL, band INTEGER NOT NULL, "
+            "bucket INTEGER NOT NULL, point_id TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS lsh_bands_bucket ON lsh_bands (tenant_id, band, bucket)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS lsh_bands_point ON lsh_bands (point_id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS duplicates (point_id TEXT PRIMARY KEY, tenant_id INTEGER NOT NULL, "
+            "document_id INTEGER NOT NULL, chunk_index INTEGER NOT NULL, canonical_id TEXT NOT NULL, "
+            "similarity REAL NOT NULL, text_bytes INTEGER NOT NULL, tokens INTEGER NOT NULL, created_at REAL NOT NULL, "
+            "text TEXT, payload TEXT, signature BLOB)"
+        )
+        # References recorded before they kept their text can't be stored in
+        # place of a deleted point; they are reported as orphaned instead
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(duplicates)")}
+        for column, kind in (("text", "TEXT"), ("payload", "TEXT"), ("signature", "BLOB")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE duplicates ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS duplicates_document ON duplicates (tenant_id, document_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS duplicates_canonical ON duplicates (canonical_id)")
+
+    def _buckets(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        """(band, bucket) pairs of a signature; bucket is a signed 64-bit hash of the band's rows."""
+        buckets = []
+        for band in range(self.bands):
+            start = band * self._rows
+            end = start + self._rows
+            rows = signature[start:end]
+            digest = hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+            buckets.append((band, int.from_bytes(digest, "big", signed=True)))
+        return buckets
+
+    def signatures(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Signatures of texts (None for texts too short to deduplicate)."""
+        return [self.hasher.signature(text) for text in texts]
+
+    def find(
+        self, tenant_id: int, document_id: int, signatures: Sequence[Optional[np.ndarray]]
+    ) -> List[Optional[Tuple[str, float]]]:
+        """
+        Find the closest indexed chunk of another document for each signature.
+
+        Args:
+            tenant_id: Tenant whose chunks are searched
+            document_id: Document the signatures belong to; its own chunks are ignored
+            signatures: Signatures to look up (None entries are skipped)
+
+        Returns:
+            (point_id, similarity) of the most similar chunk at or above the
+            threshold, or None, for each signature
+        """
+        matches: List[Optional[Tuple[str, float]]] = []
+        with self._lock:
+            for signature in signatures:
+                if signature is None:
+                    matches.append(None)
+                    continue
+                buckets = self._buckets(signature)
+                rows = self._conn.execute(
+                    "SELECT DISTINCT s.point_id, s.signature FROM lsh_bands b JOIN signatures s "
+                    "ON s.point_id = b.point_id WHERE b.tenant_id = ? AND s.document_id != ? AND (b.band, b.bucket) "
+                    f"IN (VALUES {', '.join('(?, ?)' for _ in buckets)})",
+                    (tenant_id, document_id, *(value for bucket in buckets for value in bucket)),
+                ).fetchall()
+                candidates = [row for row in rows if len(row[1]) == signature.nbytes]
+                if not candidates:
+                    matches.append(None)
+                    continue
+                stored = np.frombuffer(b"".join(row[1] for row in candidates), dtype=np.uint32)
+                similarity = (stored.reshape(len(candidates), -1) == signature).mean(axis=1)
+                best = int(similarity.argmax())
+                if similarity[best] >= self.threshold:
+                    matches.append((candidates[best][0], float(similarity[best])))
+                else:
+                    matches.append(None)
+        return matches
+
+    def _insert_signatures(self, tenant_id: int, entries: Sequence[Tuple[str, int, np.ndarray]]) -> None:
+        """Index (point_id, document_id, signature) entries; the caller holds the lock and a transaction."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO signatures (point_id, tenant_id, document_id, signature) VALUES (?, ?, ?, ?)",
+            [(point_id, tenant_id, document_id, s.tobytes()) for point_id, document_id, s in entries],
+        )
+        self._conn.executemany("DELETE FROM lsh_bands WHERE point_id = ?", [(entry[0],) for entry in entries])
+        self._conn.executemany(
+            "INSERT INTO lsh_bands (tenant_id, band, bucket, point_id) VALUES (?, ?, ?, ?)",
+            [(tenant_id, band, bucket, point_id) for point_id, _, s in entries for band, bucket in self._buckets(s)],
+        )
+
+    def add(
+        self, tenant_id: int, document_id: int, point_ids: Sequence[str], signatures: Sequence[Optional[np.ndarray]]
+    ) -> None:
+        """Index the signatures of stored chunks (None entries are skipped)."""
+        entries = [(point_id, document_id, s) for point_id, s in zip(point_ids, signatures) if s is not None]
+        if not entries:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert_signatures(tenant_id, entries)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def add_references(self, tenant_id: int, references: Sequence[Reference]) -> None:
+        """Record chunks stored as references to a near-duplicate."""
+        if not references:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO duplicates (point_id, tenant_id, document_id, chunk_index, canonical_id, "
+                "similarity, text_bytes, tokens, created_at, text, payload, signature) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        r.point_id,
+                        tenant_id,
+                        r.document_id,
+                        r.chunk_index,
+                        r.canonical_id,
+                        r.similarity,
+                        len(r.text.encode()),
+                        r.tokens,
+                        now,
+                        r.text,
+                        json.dumps(r.payload),
+                        r.signature.tobytes(),
+                    )
+                    for r in references
+                ],
+            )
+
+    def clear_references(self, tenant_id: int, document_id: int) -> Dict[str, str]:
+        """
+        Forget a document's references, before it is ingested again.
+
+        Returns:
+            The removed references (point ID to canonical point ID)
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT point_id, canonical_id FROM duplicates WHERE tenant_id = ? AND document_id = ?",
+                    (tenant_id, document_id),
+                ).fetchall()
+                self._conn.execute(
+                    "DELETE FROM duplicates WHERE tenant_id = ? AND document_id = ?", (tenant_id, document_id)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dict(rows)
+
+    def document_points(self, tenant_id: int, document_id: int) -> List[str]:
+        """IDs of a document's indexed points."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT point_id FROM signatures WHERE tenant_id = ? AND document_id = ?", (tenant_id, document_id)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def references_to(self, point_ids: Sequence[str]) -> List[Reference]:
+        """References to the given points that can be stored in their place, in document order."""
+        references = []
+        with self._lock:
+            for start in range(0, len(point_ids), _MAX_KEYS_PER_QUERY):
+                end = start + _MAX_KEYS_PER_QUERY
+                batch = list(point_ids[start:end])
+                rows = self._conn.execute(
+                    "SELECT point_id, document_id, chunk_index, canonical_id, similarity, text, tokens, payload, "
+                    f"signature FROM duplicates WHERE canonical_id IN ({', '.join('?' for _ in batch)}) "
+                    "AND text IS NOT NULL AND signature IS NOT NULL",
+                    batch,
+                ).fetchall()
+                references.extend(
+                    Reference(*row[:7], payload=json.loads(row[7] or "{}"), signature=np.frombuffer(row[8], np.uint32))
+                    for row in rows
+                )
+        return sorted(references, key=lambda r: (r.document_id, r.chunk_index))
+
+    def plan_promotion(self, references: Sequence[Reference]) -> Tuple[List[Reference], Dict[str, Tuple[str, float]]]:
+        """
+        Choose which references to a deleted point replace it.
+
+        The first reference to each point is promoted; each following one
+        refers to an already promoted one of another document when it is
+        similar enough, and is promoted too otherwise.
+
+        Returns:
+            The references to store as points, and the new canonical point
+            and similarity of the others (by point ID)
+        """
+        groups: Dict[str, List[Reference]] = defaultdict(list)
+        for reference in references:
+            groups[reference.canonical_id].append(reference)
+
+        promoted: List[Reference] = []
+        repointed: Dict[str, Tuple[str, float]] = {}
+        for group in groups.values():
+            chosen: List[Reference] = []
+            for reference in group:
+                best: Optional[Tuple[str, float]] = None
+                for candidate in chosen:
+                    if candidate.document_id == reference.document_id:
+                        continue
+                    similarity = float((candidate.signature == reference.signature).mean())
+                    if similarity >= self.threshold and (best is None or similarity > best[1]):
+                        best = (candidate.point_id, similarity)
+                if best is None:
+                    chosen.append(reference)
+                else:
+                    repointed[reference.point_id] = best
+            promoted.extend(chosen)
+        return promoted, repointed
+
+    def promote(self, tenant_id: int, promoted: Sequence[Reference], repointed: Dict[str, Tuple[str, float]]) -> None:
+        """
+        Record that references were stored as points and others now refer to them.
+
+        Call once the promoted references are stored in the vector store.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert_signatures(tenant_id, [(r.point_id, r.document_id, r.signature) for r in promoted])
+                self._conn.executemany("DELETE FROM duplicates WHERE point_id = ?", [(r.point_id,) for r in promoted])
+                self._conn.executemany(
+                    "UPDATE duplicates SET canonical_id = ?, similarity = ? WHERE point_id = ?",
+                    [
+                        (canonical_id, similarity, point_id)
+                        for point_id, (canonical_id, similarity) in repointed.items()
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove_points(self, point_ids: Sequence[str]) -> List[int]:
+        """
+        Unindex deleted chunks and drop the references left to them.
+
+        References that can be stored instead should be promoted first (see
+        promote_references in ingest.pipeline); only those without their
+        text are left.
+
+        Returns:
+            IDs of the documents that lost references; their chunks are
+            only embedded again when they are next ingested
+        """
+        orphaned = set()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for start in range(0, len(point_ids), _MAX_KEYS_PER_QUERY):
+                    end = start + _MAX_KEYS_PER_QUERY
+                    batch = list(point_ids[start:end])
+                    placeholders = ", ".join("?" for _ in batch)
+                    orphaned.update(
+                        row[0]
+                        for row in self._conn.execute(
+                            f"SELECT DISTINCT document_id FROM duplicates WHERE canonical_id IN ({placeholders})",
+                            batch,
+                        )
+                    )
+                    self._conn.execute(f"DELETE FROM duplicates WHERE canonical_id IN ({placeholders})", batch)
+                    self._conn.execute(f"DELETE FROM lsh_bands WHERE point_id IN ({placeholders})", batch)
+                    self._conn.execute(f"DELETE FROM signatures WHERE point_id IN ({placeholders})", batch)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return sorted(orphaned)
+
+    def remove_document(self, tenant_id: int, document_id: int) -> List[int]:
+        """
+        Remove a deleted document's chunks and references.
+
+        Returns:
+            IDs of the other documents that lost references to its chunks
+        """
+        self.clear_references(tenant_id, document_id)
+        point_ids = self.document_points(tenant_id, document_id)
+        return [doc for doc in self.remove_points(point_ids) if doc != document_id]
+
+    def report(self, tenant_id: Optional[int] = None, dimensions: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Summarize what deduplication saved.
+
+        Args:
+            tenant_id: Only count this tenant's references (None counts all)
+            dimensions: Vector size used to estimate the vector bytes saved
+                (defaults to the embedding model's)
+
+        Returns:
+            Chunks stored as references, documents with references, indexed
+            chunks, and the text, vector and total bytes the vector store
+            didn't store and the embedding tokens saved
+        """
+        dimensions = dimensions or EMBEDDING_DIMENSIONS.get(OPENAI_EMBEDDING_MODEL, 3072)
+        where, params = ("WHERE tenant_id = ?", (tenant_id,)) if tenant_id is not None else ("", ())
+        with self._lock:
+            references, documents, text_bytes, tokens = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT document_id), COALESCE(SUM(text_bytes), 0), "
+                f"COALESCE(SUM(tokens), 0) FROM duplicates {where}",
+                params,
+            ).fetchone()
+            indexed = self._conn.execute(f"SELECT COUNT(*) FROM signatures {where}", params).fetchone()[0]
+        # Vectors are stored as float32
+        vector_bytes = references * dimensions * 4
+        return {
+            "tenant_id": tenant_id,
+            "references": references,
+            "documents": documents,
+            "indexed_chunks": indexed,
+            "text_bytes_saved": text_bytes,
+            "vector_bytes_saved": vector_bytes,
+            "bytes_saved": text_bytes + vector_bytes,
+            "tokens_saved": tokens,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+# Lazy initialization - the index is opened on first use
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def _get_dedup_index() -> Optional[NearDuplicateIndex]:
+    """Get or open the process-wide near-duplicate index (None when DEDUP_ENABLED is off)."""
+    global _index
+    if not DEDUP_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex(
+                DEDUP_INDEX_PATH,
+                threshold=DEDUP_THRESHOLD,
+                num_perm=DEDUP_NUM_PERM,
+                bands=DEDUP_BANDS,
+                shingle_size=DEDUP_SHINGLE_SIZE,
+                min_words=DEDUP_MIN_WORDS,
+            )
+        return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report what near-duplicate suppression saved")
+    parser.add_argument("--tenant-id", type=int, default=None, help="Only report this tenant (default: all)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    index = NearDuplicateIndex(
+        DEDUP_INDEX_PATH,
+        threshold=DEDUP_THRESHOLD,
+        num_perm=DEDUP_NUM_PERM,
+        bands=DEDUP_BANDS,
+        shingle_size=DEDUP_SHINGLE_SIZE,
+        min_words=DEDUP_MIN_WORDS,
+    )
+    print(json.dumps(index.report(args.tenant_id), indent=2))
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
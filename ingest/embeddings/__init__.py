@@ -3,6 +3,8 @@ Embedding generators for text vectorization.
 """
 
 from .base import Embedder
-from .openai import embed_texts
+from .batcher import EmbeddingBatcher
+from .cache import embed_chunks
+from .openai import aembed_texts, embed_texts
 
-__all__ = ["Embedder", "embed_texts"]
+__all__ = ["Embedder", "embed_texts", "aembed_texts", "embed_chunks", "EmbeddingBatcher"]
@@ -0,0 +1,91 @@
+"""
+Shared embedding batches for documents ingested concurrently.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+from .openai import EMBEDDING_BATCH_SIZE, embed_texts
+
+
+class EmbeddingBatcher:
+    """
+    Merges embedding requests from concurrent callers into shared batches.
+
+    A small document on its own sends a request with a handful of texts.
+    When many are ingested at once, the first caller waits up to max_delay
+    (or until max_texts texts are waiting) for others to join, then embeds
+    everyone's texts in one call. Each caller gets back its own embeddings.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], List[List[float]]] = embed_texts,
+        max_texts: int = EMBEDDING_BATCH_SIZE,
+        max_delay: float = 0.05,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embed: Embeds a list of texts
+            max_texts: Texts that trigger a batch without waiting further
+            max_delay: Seconds the first caller waits for others to join
+        """
+        self.embed = embed
+        self.max_texts = max_texts
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._full = threading.Condition(self._lock)
+        self._pending: List[Tuple[List[str], Future]] = []
+        self._pending_texts = 0
+        self._collecting = False
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts as part of a shared batch.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Embeddings in input order
+        """
+        if not texts:
+            return []
+
+        future: Future = Future()
+        with self._lock:
+            self._pending.append((texts, future))
+            self._pending_texts += len(texts)
+            leader = not self._collecting
+            if leader:
+                self._collecting = True
+            elif self._pending_texts >= self.max_texts:
+                self._full.notify()
+
+        if leader:
+            with self._lock:
+                self._full.wait_for(lambda: self._pending_texts >= self.max_texts, timeout=self.max_delay)
+                batch, self._pending = self._pending, []
+                self._pending_texts = 0
+                self._collecting = False
+            self._run(batch)
+
+        return future.result()
+
+    def _run(self, batch: List[Tuple[List[str], Future]]) -> None:
+        """Embed the texts of every request in the batch and hand out the results."""
+        try:
+            embeddings = self.embed([text for texts, _ in batch for text in texts])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for texts, future in batch:
+            end = offset + len(texts)
+            future.set_result(embeddings[offset:end])
+            offset = end
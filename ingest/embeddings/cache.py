@@ -0,0 +1,85 @@
+"""
+Chunk embedding with a persistent content-addressed cache.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.cache import ChunkEmbeddingCache, SQLiteVectorCache
+
+from ..config import EMBEDDING_CACHE_MAX_BYTES, EMBEDDING_CACHE_PATH, EMBEDDING_DIMENSIONS
+from .openai import _get_embedding_model, embed_texts
+
+logger = logging.getLogger(__name__)
+
+# Lazy initialization - the cache is opened only when needed
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache() -> Optional[ChunkEmbeddingCache]:
+    """Get or open the chunk embedding cache; None when disabled."""
+    global _cache
+    if not EMBEDDING_CACHE_PATH:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            model = _get_embedding_model()
+            store = SQLiteVectorCache(EMBEDDING_CACHE_PATH, max_bytes=EMBEDDING_CACHE_MAX_BYTES)
+            _cache = ChunkEmbeddingCache(model=model, dimensions=EMBEDDING_DIMENSIONS.get(model, 3072), store=store)
+            logger.info(f"Opened chunk embedding cache at {os.path.abspath(EMBEDDING_CACHE_PATH)}")
+        return _cache
+
+
+def embed_chunks(
+    texts: List[str], embed: Optional[Callable[[List[str]], List[List[float]]]] = None
+) -> Tuple[List[List[float]], Dict[str, Any]]:
+    """
+    Generate embeddings for document chunks, reusing cached ones.
+
+    Only chunks missing from the cache are sent to OpenAI (each distinct
+    text once); their embeddings are then added to the cache. Cache errors
+    are logged and fall back to embedding everything.
+
+    Args:
+        texts: Chunk texts
+        embed: Embeds the missing texts (defaults to embed_texts)
+
+    Returns:
+        Tuple of (embeddings in input order, stats with chunks, cache_hits,
+        embedded and hit_rate)
+    """
+    cache = None
+    cached: List[Optional[List[float]]] = [None] * len(texts)
+    try:
+        cache = _get_cache()
+        if cache is not None:
+            cached = cache.get_many(texts)
+    except Exception as e:
+        logger.warning(f"Chunk embedding cache unavailable, embedding all chunks: {e}")
+        cache = None
+
+    missing = list(dict.fromkeys(text for text, embedding in zip(texts, cached) if embedding is None))
+    new_embeddings = dict(zip(missing, (embed or embed_texts)(missing))) if missing else {}
+
+    if cache is not None and new_embeddings:
+        try:
+            cache.set_many(list(new_embeddings), list(new_embeddings.values()))
+        except Exception as e:
+            logger.warning(f"Could not store chunk embeddings in cache: {e}")
+
+    embeddings = [
+        embedding if embedding is not None else new_embeddings[text] for text, embedding in zip(texts, cached)
+    ]
+
+    hits = sum(embedding is not None for embedding in cached)
+    stats = {
+        "chunks": len(texts),
+        "cache_hits": hits,
+        "embedded": len(missing),
+        "hit_rate": hits / len(texts) if texts else 0.0,
+    }
+    return embeddings, stats
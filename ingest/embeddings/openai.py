@@ -1,28 +1,160 @@
+import asyncio
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, OpenAI, RateLimitError
+
+from core.tokenizer import get_tokenizer
 
 load_dotenv()
 
-# Lazy initialization - client is created only when needed
+logger = logging.getLogger(__name__)
+
+# Request limits: at most EMBEDDING_BATCH_SIZE inputs and EMBEDDING_BATCH_MAX_TOKENS
+# tokens per embeddings call (the API rejects requests above 2048 inputs / 300k tokens)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "2048"))
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "300000"))
+# Batches of one call are sent concurrently, at most EMBEDDING_CONCURRENCY at a time
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+# Attempts per batch for transient errors (rate limits, connection and server errors)
+EMBEDDING_MAX_ATTEMPTS = int(os.getenv("EMBEDDING_MAX_ATTEMPTS", "3"))
+EMBEDDING_RETRY_DELAY = float(os.getenv("EMBEDDING_RETRY_DELAY", "1.0"))
+
+_RETRYABLE_ERRORS = (APIConnectionError, InternalServerError, RateLimitError)
+
+# Lazy initialization - clients are created only when needed
 _client = None
+_async_client = None
+
+
+def _get_api_key() -> str:
+    """Read the OpenAI API key from the environment."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable is required")
+    return api_key
+
+
+def _get_embedding_model() -> str:
+    """Get the configured embedding model name."""
+    return os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
 
 
 def _get_client() -> OpenAI:
     """Get or create OpenAI client with lazy initialization."""
     global _client
     if _client is None:
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable is required")
-        _client = OpenAI(api_key=api_key)
+        _client = OpenAI(api_key=_get_api_key())
     return _client
 
 
-def embed_texts(texts: list[str]):
-    """Generate embeddings for a list of texts using OpenAI API."""
+def _get_async_client() -> AsyncOpenAI:
+    """Get or create async OpenAI client with lazy initialization."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(api_key=_get_api_key())
+    return _async_client
+
+
+def _count_tokens(text: str, model: str) -> int:
+    """Count the tokens of an embedding input."""
+    return get_tokenizer(model).count(text)
+
+
+def _batch_ranges(texts: List[str], model: str) -> List[Tuple[int, int]]:
+    """
+    Split texts into consecutive batches within the request limits.
+
+    Returns:
+        (start, end) index ranges into texts, in order
+    """
+    ranges = []
+    start = 0
+    batch_tokens = 0
+
+    for idx, text in enumerate(texts):
+        tokens = _count_tokens(text, model)
+        batch_full = idx - start >= EMBEDDING_BATCH_SIZE or batch_tokens + tokens > EMBEDDING_BATCH_MAX_TOKENS
+        if idx > start and batch_full:
+            ranges.append((start, idx))
+            start = idx
+            batch_tokens = 0
+        batch_tokens += tokens
+
+    if start < len(texts):
+        ranges.append((start, len(texts)))
+    return ranges
+
+
+def _retry_delay(attempt: int) -> float:
+    """Exponential backoff before retrying a batch."""
+    return EMBEDDING_RETRY_DELAY * (2 ** (attempt - 1))
+
+
+def _embed_batch(texts: List[str], model: str) -> List[List[float]]:
+    """Embed one batch, retrying transient errors."""
     client = _get_client()
-    embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-large")
-    response = client.embeddings.create(model=embedding_model, input=texts)
-    return [e.embedding for e in response.data]
+    for attempt in range(1, EMBEDDING_MAX_ATTEMPTS + 1):
+        try:
+            response = client.embeddings.create(model=model, input=texts)
+            return [e.embedding for e in response.data]
+        except _RETRYABLE_ERRORS as e:
+            if attempt == EMBEDDING_MAX_ATTEMPTS:
+                raise
+            delay = _retry_delay(attempt)
+            logger.warning(f"Embedding batch of {len(texts)} failed (attempt {attempt}), retrying in {delay}s: {e}")
+            time.sleep(delay)
+
+
+async def _aembed_batch(texts: List[str], model: str, semaphore: asyncio.Semaphore) -> List[List[float]]:
+    """Embed one batch without blocking the event loop, retrying transient errors."""
+    client = _get_async_client()
+    for attempt in range(1, EMBEDDING_MAX_ATTEMPTS + 1):
+        try:
+            async with semaphore:
+                response = await client.embeddings.create(model=model, input=texts)
+            return [e.embedding for e in response.data]
+        except _RETRYABLE_ERRORS as e:
+            if attempt == EMBEDDING_MAX_ATTEMPTS:
+                raise
+            delay = _retry_delay(attempt)
+            logger.warning(f"Embedding batch of {len(texts)} failed (attempt {attempt}), retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+
+
+def embed_texts(texts: list[str]):
+    """
+    Generate embeddings for a list of texts using OpenAI API.
+
+    Texts are split into batches bounded by input count and token total,
+    which are embedded concurrently (EMBEDDING_CONCURRENCY) and returned
+    in input order. Each batch is retried on its own.
+    """
+    if not texts:
+        return []
+
+    model = _get_embedding_model()
+    batches = [texts[start:end] for start, end in _batch_ranges(texts, model)]
+    if len(batches) == 1:
+        return _embed_batch(batches[0], model)
+
+    logger.info(f"Embedding {len(texts)} texts in {len(batches)} batches")
+    with ThreadPoolExecutor(max_workers=min(EMBEDDING_CONCURRENCY, len(batches))) as executor:
+        results = executor.map(lambda batch: _embed_batch(batch, model), batches)
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+
+
+async def aembed_texts(texts: list[str]):
+    """Generate embeddings for a list of texts without blocking the event loop (batched like embed_texts)."""
+    if not texts:
+        return []
+
+    model = _get_embedding_model()
+    batches = [texts[start:end] for start, end in _batch_ranges(texts, model)]
+    semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+    results = await asyncio.gather(*(_aembed_batch(batch, model, semaphore) for batch in batches))
+    return [embedding for batch_embeddings in results for embedding in batch_embeddings]
@@ -7,12 +7,15 @@ from typing import Optional
 
 from .base import DocumentLoader
 from .docx import DOCXLoader
-from .pdf import load_pdf
+from .pdf import PageTimeoutError, iter_pdf_pages, iter_pdf_pages_parallel, load_pdf
 from .txt import TXTLoader
 
 __all__ = [
     "DocumentLoader",
     "load_pdf",
+    "iter_pdf_pages",
+    "iter_pdf_pages_parallel",
+    "PageTimeoutError",
     "TXTLoader",
     "DOCXLoader",
     "get_loader",
@@ -1,7 +1,197 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
 from pypdf import PdfReader
 
+logger = logging.getLogger(__name__)
 
-def load_pdf(path: str) -> str:
+
+class PageTimeoutError(BaseException):
+    """
+    Raised when extracting a single page takes longer than allowed.
+
+    It is raised from a signal handler, anywhere inside pypdf, so it
+    derives from BaseException: pypdf's own `except Exception` blocks
+    would otherwise swallow it and keep extracting the page.
+    """
+
+
+def iter_pdf_pages(path: Union[str, BinaryIO]) -> Iterator[str]:
+    """Yield the text of a PDF (a path or a binary stream) one page at a time."""
     reader = PdfReader(path)
-    pages = [page.extract_text() for page in reader.pages]
-    return "\n".join(pages)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def load_pdf(path: str) -> str:
+    return "\n".join(iter_pdf_pages(path))
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """Raise PageTimeoutError if the block runs longer than seconds (main thread, Unix only)."""
+    if not seconds or not hasattr(signal, "setitimer"):
+        yield
+        return
+
+    def _on_timeout(signum, frame):
+        raise PageTimeoutError(f"Page extraction exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# Reader of the PDF last opened by this worker process, keyed by path and
+# modification time, so the tasks of one document don't each parse it again
+_worker_reader: Dict[Tuple[str, int], PdfReader] = {}
+
+
+def _open_reader(path: str, version: Optional[int]) -> PdfReader:
+    """Open a PDF, reusing this process's reader of the same file version if there is one."""
+    if version is None:
+        return PdfReader(path)
+    key = (path, version)
+    reader = _worker_reader.get(key)
+    if reader is None:
+        _worker_reader.clear()
+        reader = _worker_reader[key] = PdfReader(path)
+    return reader
+
+
+def _extract_page_range(
+    path: str, start: int, end: int, page_timeout: Optional[float], version: Optional[int] = None
+) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Extract pages [start, end) of a PDF in a worker process.
+
+    Args:
+        path: Path to the PDF file
+        start: First page (0-based)
+        end: Page after the last one
+        page_timeout: Seconds allowed per page (None disables the limit)
+        version: Modification time of the file; when given, the worker
+            keeps the parsed file for the document's next ranges
+
+    Returns:
+        (page number, text, error) triples; text is None for pages that timed out or failed
+    """
+    reader = _open_reader(path, version)
+    results = []
+    for page_number in range(start, end):
+        try:
+            with _time_limit(page_timeout):
+                text = reader.pages[page_number].extract_text() or ""
+        except PageTimeoutError as e:
+            results.append((page_number, None, str(e)))
+        except Exception as e:
+            results.append((page_number, None, str(e) or type(e).__name__))
+        else:
+            results.append((page_number, text, None))
+    return results
+
+
+# One extraction pool per process, shared by every document being ingested
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Get or start the process-wide extraction pool, shut down at exit.
+
+    Worker processes are started with forkserver (spawn where it isn't
+    available), never forked from this multithreaded process, whose
+    threads may hold locks a forked child would inherit. The pool is
+    sized by the first caller.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=multiprocessing.get_context(method))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next document starts a new one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pdf_pages_parallel(
+    path: str,
+    workers: int,
+    pages_per_task: int = 16,
+    page_timeout: Optional[float] = None,
+    skipped_pages: Optional[List[int]] = None,
+) -> Iterator[str]:
+    """
+    Yield the text of a PDF one page at a time, extracting pages in a process pool.
+
+    Page ranges are spread across the processes of a pool shared by all
+    documents and yielded in page order. At most two ranges per worker
+    are in flight for a document, so memory stays bounded for large
+    documents. Pages that take longer than page_timeout or fail to
+    extract are skipped and reported.
+
+    Args:
+        path: Path to the PDF file
+        workers: Number of worker processes (of the shared pool, when it
+            is started by this call)
+        pages_per_task: Pages extracted per task
+        page_timeout: Seconds allowed per page (None disables the limit)
+        skipped_pages: Optional list that receives the numbers (0-based) of skipped pages
+
+    Yields:
+        Page texts in page order
+    """
+    page_count = len(PdfReader(path).pages)
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    if not ranges:
+        return
+
+    version = os.stat(path).st_mtime_ns
+    pool = _get_pool(workers)
+    pending = deque()
+    try:
+        next_range = 0
+        while pending or next_range < len(ranges):
+            while next_range < len(ranges) and len(pending) < workers * 2:
+                start, end = ranges[next_range]
+                pending.append(pool.submit(_extract_page_range, path, start, end, page_timeout, version))
+                next_range += 1
+
+            for page_number, text, error in pending.popleft().result():
+                if text is None:
+                    logger.warning(f"Skipped page {page_number + 1} of {path}: {error}")
+                    if skipped_pages is not None:
+                        skipped_pages.append(page_number)
+                    # Keep the position of the page so later pages keep their numbers
+                    yield ""
+                    continue
+                yield text
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        # Don't extract pages nobody will read when the consumer stops early
+        for future in pending:
+            future.cancel()
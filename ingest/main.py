@@ -1,15 +1,33 @@
 import logging
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import List, Optional
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
-from ingest.tasks import ingest_document
+from ingest.config import BATCH_INGEST_CONCURRENCY
+from ingest.dedup import _get_dedup_index
+from ingest.tasks import delete_document
+from ingest.vectorstore.qdrant import _ensure_collection_exists
+from workers.queue import QueueFullError, enqueue, get_job
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Contexta Ingest Service")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Check the vector store collection once at startup."""
+    try:
+        _ensure_collection_exists()
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.warning(f"Could not check Qdrant collection at startup, will retry on first use: {e}")
+    yield
+
+
+app = FastAPI(title="Contexta Ingest Service", lifespan=lifespan)
 
 
 class IngestRequest(BaseModel):
@@ -21,30 +39,108 @@ class IngestRequest(BaseModel):
 
 
 @app.post("/ingest")
-def ingest(payload: IngestRequest, background_tasks: BackgroundTasks):
-    """Trigger document ingestion in background."""
+def ingest(payload: IngestRequest):
+    """Queue document ingestion for the workers."""
     try:
-        background_tasks.add_task(
-            ingest_document,
-            payload.document_id,
-            payload.file_path,
-            payload.metadata,
-            payload.tenant_id,
-            payload.callback_url,
+        job_id = enqueue(
+            "ingest_document",
+            {
+                "document_id": payload.document_id,
+                "file_path": payload.file_path,
+                "metadata": payload.metadata,
+                "tenant_id": payload.tenant_id,
+                "callback_url": payload.callback_url,
+            },
+            tenant=payload.tenant_id,
         )
 
-        logger.info(f"Ingestion task queued for document {payload.document_id} (tenant {payload.tenant_id})")
+        logger.info(f"Ingestion job {job_id} queued for document {payload.document_id} (tenant {payload.tenant_id})")
 
         return {
             "status": "accepted",
+            "job_id": job_id,
             "document_id": payload.document_id,
             "tenant_id": payload.tenant_id,
         }
+    except QueueFullError as e:
+        logger.warning(f"Rejected ingestion of document {payload.document_id} (tenant {payload.tenant_id}): {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
     except Exception as e:
         logger.error(f"Error queuing ingestion task: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class BatchIngestRequest(BaseModel):
+    # Files, directories or zip/tar archives on the ingest service's filesystem
+    paths: List[str]
+    tenant_id: int
+    metadata: dict = {}
+    concurrency: Optional[int] = None
+
+
+@app.post("/ingest/batch")
+def ingest_batch_endpoint(payload: BatchIngestRequest):
+    """Queue a bulk import for the workers as one job; poll GET /ingest/batch/{job_id} for its report."""
+    try:
+        job_id = enqueue(
+            "ingest_batch",
+            {
+                "paths": payload.paths,
+                "tenant_id": payload.tenant_id,
+                "metadata": payload.metadata,
+                "concurrency": payload.concurrency or BATCH_INGEST_CONCURRENCY,
+            },
+            tenant=payload.tenant_id,
+        )
+
+        logger.info(f"Batch ingestion job {job_id} queued for {len(payload.paths)} paths (tenant {payload.tenant_id})")
+
+        return {"status": "accepted", "job_id": job_id, "tenant_id": payload.tenant_id}
+    except QueueFullError as e:
+        logger.warning(f"Rejected batch ingestion (tenant {payload.tenant_id}): {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+    except Exception as e:
+        logger.error(f"Error queuing batch ingestion for tenant {payload.tenant_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/ingest/batch/{job_id}")
+def ingest_batch_status(job_id: str):
+    """Report a bulk import's status and, once completed, its per-file status and throughput."""
+    job = get_job(job_id)
+    if job is None or job["task"] != "ingest_batch":
+        raise HTTPException(status_code=404, detail=f"Batch ingestion job {job_id} not found (or its report expired)")
+
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "tenant_id": int(job["tenant"]),
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "result": job["result"],
+    }
+
+
+@app.delete("/documents/{document_id}")
+def delete(document_id: int, tenant_id: int):
+    """Delete a document's chunks from the vector store."""
+    try:
+        delete_document(document_id, tenant_id)
+        return {"status": "deleted", "document_id": document_id, "tenant_id": tenant_id}
+    except Exception as e:
+        logger.error(f"Error deleting document {document_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/dedup/report")
+def dedup_report(tenant_id: Optional[int] = None):
+    """Report the chunks stored as near-duplicate references and the bytes and tokens they saved."""
+    dedup = _get_dedup_index()
+    if dedup is None:
+        raise HTTPException(status_code=404, detail="Near-duplicate suppression is disabled (DEDUP_ENABLED)")
+    return dedup.report(tenant_id)
+
+
 @app.get("/health")
 def health():
     """Health check endpoint."""
@@ -0,0 +1,247 @@
+"""
+Streaming ingestion pipeline.
+
+Chunks are processed in fixed-size windows. While one window is embedded,
+the next one is extracted and chunked on a reader thread and the previous
+one is upserted on a writer thread, so the stages overlap and memory stays
+bounded by a few windows regardless of document size. With a near-duplicate
+index, new chunks that nearly repeat a chunk of another document are
+recorded as references to it instead of being embedded and stored, and
+are stored themselves if that chunk is deleted.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from core.tokenizer import get_tokenizer
+
+from .config import INGEST_WINDOW_SIZE, OPENAI_EMBEDDING_MODEL
+from .dedup import NearDuplicateIndex, Reference
+from .embeddings.cache import embed_chunks
+from .models import Chunk
+from .vectorstore.qdrant import chunk_point_ids, store_embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def _chunk_payload(chunk: Union[str, Chunk]) -> Optional[Dict[str, Any]]:
+    """Per-chunk payload of a Chunk (its metadata and offsets); None for plain texts."""
+    if isinstance(chunk, str):
+        return None
+    return {**chunk.metadata, "start_index": chunk.start_index, "end_index": chunk.end_index}
+
+
+def _iter_windows(chunks: Iterable[Union[str, Chunk]], size: int) -> Iterator[List[Union[str, Chunk]]]:
+    """Group chunks into lists of at most size chunks."""
+    iterator = iter(chunks)
+    while window := list(islice(iterator, size)):
+        yield window
+
+
+def ingest_chunks(
+    document_id: int,
+    chunks: Iterable[Union[str, Chunk]],
+    metadata: dict,
+    tenant_id: int,
+    existing: Dict[str, Optional[int]],
+    window_size: int = INGEST_WINDOW_SIZE,
+    embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    dedup: Optional[NearDuplicateIndex] = None,
+) -> Dict[str, Any]:
+    """
+    Embed and store a stream of chunks, skipping those already stored.
+
+    Args:
+        document_id: ID of the document
+        chunks: Chunk texts, or Chunks whose metadata and offsets are stored
+            with each point, in document order (typically a generator)
+        metadata: Additional metadata
+        tenant_id: Tenant identifier for multi-tenant isolation
+        existing: Points already stored for the document (point ID to chunk index)
+        window_size: Chunks embedded and stored per window
+        embed: Embeds chunks missing from the cache (defaults to embed_texts)
+        dedup: Near-duplicate index; new chunks close to another document's
+            chunk are recorded in it as references instead of being stored
+
+    Returns:
+        Dictionary with the chunk count, the IDs of every chunk point
+        (seen_ids), the kept points (kept_ids), the kept points whose index
+        changed (moved), the current per-chunk payload of kept Chunks
+        (payloads), the new and cache-hit chunk counts, and the chunks
+        stored as references (references, point ID to canonical point ID)
+        with the tokens they saved
+    """
+    occurrences: Dict[str, int] = {}
+    seen_ids = set()
+    kept_ids = []
+    moved = {}
+    payloads = {}
+    total = 0
+    new = 0
+    cache_hits = 0
+    references: Dict[str, str] = {}
+    tokens_saved = 0
+    tokenizer = get_tokenizer(OPENAI_EMBEDDING_MODEL) if dedup is not None else None
+
+    def store(signatures: List[Any], **kwargs: Any) -> None:
+        """Store a window, then index its signatures so later chunks can refer to it."""
+        store_embeddings(**kwargs)
+        if dedup is not None:
+            dedup.add(tenant_id, document_id, kwargs["point_ids"], signatures)
+
+    windows = _iter_windows(chunks, window_size)
+    with (
+        ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-read") as reader,
+        ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-store") as writer,
+    ):
+        next_window = reader.submit(next, windows, None)
+        pending_store = None
+
+        while (window := next_window.result()) is not None:
+            # Extract and chunk the next window while this one is embedded
+            next_window = reader.submit(next, windows, None)
+
+            texts = [chunk if isinstance(chunk, str) else chunk.text for chunk in window]
+            new_chunks, new_positions, new_ids, new_payloads = [], [], [], []
+            for offset, point_id in enumerate(chunk_point_ids(document_id, texts, tenant_id, occurrences)):
+                idx = total + offset
+                payload = _chunk_payload(window[offset])
+                seen_ids.add(point_id)
+                if point_id in existing:
+                    kept_ids.append(point_id)
+                    if existing[point_id] != idx:
+                        moved[point_id] = idx
+                    # Same text, but the page or offsets may have changed
+                    if payload is not None:
+                        payloads[point_id] = payload
+                else:
+                    new_chunks.append(texts[offset])
+                    new_positions.append(idx)
+                    new_ids.append(point_id)
+                    new_payloads.append(payload or {})
+            total += len(window)
+
+            signatures: List[Any] = [None] * len(new_chunks)
+            if dedup is not None and new_chunks:
+                signatures = dedup.signatures(new_chunks)
+                matches = dedup.find(tenant_id, document_id, signatures)
+                window_references = []
+                for i, match in enumerate(matches):
+                    if match is None:
+                        continue
+                    reference = Reference(
+                        point_id=new_ids[i],
+                        document_id=document_id,
+                        chunk_index=new_positions[i],
+                        canonical_id=match[0],
+                        similarity=match[1],
+                        text=new_chunks[i],
+                        tokens=tokenizer.count(new_chunks[i]),
+                        # Everything needed to store the chunk if its canonical point goes away
+                        payload={**metadata, **new_payloads[i]},
+                        signature=signatures[i],
+                    )
+                    window_references.append(reference)
+                    references[reference.point_id] = reference.canonical_id
+                    tokens_saved += reference.tokens
+                dedup.add_references(tenant_id, window_references)
+
+                unique = [i for i, match in enumerate(matches) if match is None]
+                new_chunks = [new_chunks[i] for i in unique]
+                new_positions = [new_positions[i] for i in unique]
+                new_ids = [new_ids[i] for i in unique]
+                new_payloads = [new_payloads[i] for i in unique]
+                signatures = [signatures[i] for i in unique]
+
+            if not new_chunks:
+                continue
+
+            embeddings, stats = embed_chunks(new_chunks, embed=embed)
+            new += len(new_chunks)
+            cache_hits += stats["cache_hits"]
+
+            # Store this window while the next one is embedded
+            if pending_store is not None:
+                pending_store.result()
+            pending_store = writer.submit(
+                store,
+                signatures,
+                document_id=document_id,
+                chunks=new_chunks,
+                embeddings=embeddings,
+                metadata=metadata,
+                tenant_id=tenant_id,
+                chunk_indexes=new_positions,
+                point_ids=new_ids,
+                payloads=new_payloads,
+            )
+            logger.debug(f"Document {document_id}: {total} chunks processed, {new} new")
+
+        if pending_store is not None:
+            pending_store.result()
+
+    return {
+        "chunks": total,
+        "new": new,
+        "cache_hits": cache_hits,
+        "seen_ids": seen_ids,
+        "kept_ids": kept_ids,
+        "moved": moved,
+        "payloads": payloads,
+        "references": references,
+        "tokens_saved": tokens_saved,
+    }
+
+
+def promote_references(
+    dedup: NearDuplicateIndex,
+    tenant_id: int,
+    point_ids: Sequence[str],
+    embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+) -> int:
+    """
+    Store the chunks that refer to points about to be deleted.
+
+    For each point, one referring chunk is embedded and stored under its
+    own document with its own payload; the other referring chunks refer
+    to it instead, or are stored too if they aren't similar enough to it.
+    Call before deleting the points so queries never miss the content.
+
+    Args:
+        dedup: Near-duplicate index
+        tenant_id: Tenant of the points
+        point_ids: IDs of the points about to be deleted
+        embed: Embeds chunks missing from the cache (defaults to embed_texts)
+
+    Returns:
+        Number of chunks stored
+    """
+    promoted, repointed = dedup.plan_promotion(dedup.references_to(point_ids))
+    if not promoted:
+        return 0
+
+    promoted.sort(key=lambda reference: (reference.document_id, reference.chunk_index))
+    embeddings, _ = embed_chunks([reference.text for reference in promoted], embed=embed)
+    start = 0
+    for document_id, group in groupby(promoted, key=lambda reference: reference.document_id):
+        document_references = list(group)
+        end = start + len(document_references)
+        store_embeddings(
+            document_id=document_id,
+            chunks=[reference.text for reference in document_references],
+            embeddings=embeddings[start:end],
+            metadata={},
+            tenant_id=tenant_id,
+            chunk_indexes=[reference.chunk_index for reference in document_references],
+            point_ids=[reference.point_id for reference in document_references],
+            payloads=[reference.payload for reference in document_references],
+        )
+        start = end
+    dedup.promote(tenant_id, promoted, repointed)
+    logger.info(
+        f"Stored {len(promoted)} near-duplicate chunks in place of deleted points (tenant {tenant_id}), "
+        f"{len(repointed)} references moved to them"
+    )
+    return len(promoted)
@@ -1,16 +1,29 @@
 import logging
-import socket
-import time
 from pathlib import Path
-from typing import Optional
-from urllib.parse import urlparse
-
-import httpx
-
-from ingest.chunking.semantic import semantic_chunk
-from ingest.embeddings.openai import embed_texts
-from ingest.loaders.pdf import load_pdf
-from ingest.vectorstore.qdrant import store_embeddings
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from ingest.callbacks import send_callback
+from ingest.chunking.semantic import iter_semantic_chunks
+from ingest.chunking.similarity import iter_similarity_chunks
+from ingest.chunking.structure import StructureChunker
+from ingest.chunking.token import iter_token_chunks
+from ingest.config import (
+    CHUNK_BREAKPOINT_PERCENTILE,
+    CHUNK_MIN_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    CHUNKING_STRATEGY,
+    PDF_EXTRACT_WORKERS,
+    PDF_PAGE_TIMEOUT,
+    PDF_PAGES_PER_TASK,
+)
+from ingest.dedup import _get_dedup_index
+from ingest.loaders.pdf import iter_pdf_pages, iter_pdf_pages_parallel
+from ingest.models import Chunk
+from ingest.pipeline import ingest_chunks, promote_references
+from ingest.vectorstore.qdrant import bump_corpus_version
+from ingest.vectorstore.qdrant import delete_document as delete_document_chunks
+from ingest.vectorstore.qdrant import get_document_points, update_document_points
 
 logger = logging.getLogger(__name__)
 
@@ -30,42 +43,154 @@ def _detect_file_type(file_path: str) -> str:
         raise ValueError(f"Unsupported file type: {extension}")
 
 
-def _load_txt(file_path: str) -> str:
-    """Load text file content."""
-    path = Path(file_path)
-    if not path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-
-    # Try different encodings
+def _decode_text(data: bytes, name: str) -> str:
+    """Decode text file content, trying common encodings."""
     encodings = ["utf-8", "latin-1", "cp1252"]
     for encoding in encodings:
         try:
-            with open(path, "r", encoding=encoding) as f:
-                return f.read()
+            return data.decode(encoding)
         except UnicodeDecodeError:
             continue
 
-    raise ValueError(f"Could not decode file: {file_path}")
+    raise ValueError(f"Could not decode file: {name}")
+
 
+def _load_txt(file_path: str) -> str:
+    """Load text file content."""
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
 
-def _load_document(file_path: str, file_type: str) -> str:
-    """Load document content based on file type."""
+    return _decode_text(path.read_bytes(), file_path)
+
+
+def _iter_document(file_path: str, file_type: str, skipped_pages: Optional[List[int]] = None) -> Iterator[str]:
+    """Yield document content based on file type, page by page where the format allows."""
     if file_type == "pdf":
-        return load_pdf(file_path)
+        if PDF_EXTRACT_WORKERS > 0:
+            yield from iter_pdf_pages_parallel(
+                file_path,
+                workers=PDF_EXTRACT_WORKERS,
+                pages_per_task=PDF_PAGES_PER_TASK,
+                page_timeout=PDF_PAGE_TIMEOUT or None,
+                skipped_pages=skipped_pages,
+            )
+        else:
+            yield from iter_pdf_pages(file_path)
     elif file_type == "txt":
-        return _load_txt(file_path)
+        yield _load_txt(file_path)
     elif file_type == "docx":
         raise NotImplementedError("DOCX loading not yet implemented")
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
 
 
+def _iter_chunks(
+    pages: Iterable[str],
+    document_id: int,
+    tenant_id: int,
+    embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+) -> Iterator[Union[str, Chunk]]:
+    """Chunk pages with the configured strategy."""
+    if CHUNKING_STRATEGY == "structure":
+        return StructureChunker().iter_page_chunks(
+            pages, document_id, tenant_id, {}, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+        )
+    if CHUNKING_STRATEGY == "similarity":
+        return iter_similarity_chunks(
+            pages,
+            max_tokens=CHUNK_SIZE,
+            min_tokens=CHUNK_MIN_SIZE,
+            percentile=CHUNK_BREAKPOINT_PERCENTILE,
+            embed=embed,
+        )
+    if CHUNKING_STRATEGY == "tokens":
+        return iter_token_chunks(pages, max_tokens=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+    return iter_semantic_chunks(pages, max_tokens=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+
+
+def ingest_pages(
+    document_id: int,
+    pages: Iterable[str],
+    metadata: dict,
+    tenant_id: int,
+    embed: Optional[Callable[[List[str]], List[List[float]]]] = None,
+    bump_version: bool = True,
+) -> Dict[str, Any]:
+    """
+    Chunk, embed and store a document's pages, replacing what was stored for it.
+
+    Chunks already stored for the document (same content, same IDs) are
+    kept; chunks that vanished are removed once the new ones are stored.
+    When near-duplicate suppression is enabled, new chunks that nearly
+    repeat another document's chunk are stored as references to it.
+
+    Args:
+        document_id: ID of the document
+        pages: Page texts in order (typically a generator)
+        metadata: Additional metadata
+        tenant_id: Tenant identifier for multi-tenant isolation
+        embed: Embeds texts missing from the cache (defaults to embed_texts)
+        bump_version: Invalidate the tenant's cached answers if anything changed
+
+    Returns:
+        The ingest_chunks result plus the number of removed chunks, the
+        number of chunks stored as near-duplicate references and whether
+        anything changed
+    """
+    dedup = _get_dedup_index()
+    # References are found again, against the chunks stored now
+    previous_references = dedup.clear_references(tenant_id, document_id) if dedup is not None else {}
+    stored_payloads: Dict[str, dict] = {}
+    existing = get_document_points(document_id, tenant_id, payloads=stored_payloads)
+    chunks = _iter_chunks(pages, document_id, tenant_id, embed=embed)
+    result = ingest_chunks(document_id, chunks, metadata, tenant_id, existing, embed=embed, dedup=dedup)
+
+    if not result["chunks"]:
+        raise ValueError(f"Document {document_id} is empty")
+
+    # Remove vanished chunks and re-index moved ones, after the new chunks
+    # are stored so queries never see a gap
+    vanished_ids = list(existing.keys() - result["seen_ids"])
+    if dedup is not None and vanished_ids:
+        # Chunks of other documents that refer to vanished ones are stored first
+        promote_references(dedup, tenant_id, vanished_ids, embed=embed)
+    update_document_points(
+        document_id=document_id,
+        tenant_id=tenant_id,
+        delete_ids=vanished_ids,
+        chunk_indexes=result["moved"],
+        metadata=metadata,
+        keep_ids=result["kept_ids"],
+        payloads=result["payloads"],
+        stored_payloads=stored_payloads,
+    )
+    if dedup is not None and vanished_ids:
+        _warn_orphaned(dedup.remove_points(vanished_ids), tenant_id)
+
+    logger.info(
+        f"Document {document_id} ingested successfully (tenant {tenant_id}): {result['chunks']} chunks, "
+        f"{result['new']} new ({result['cache_hits']} from embedding cache), "
+        f"{len(result['kept_ids'])} unchanged, {len(vanished_ids)} removed, "
+        f"{len(result['references'])} near-duplicates ({result['tokens_saved']} tokens saved)"
+    )
+    result["removed"] = len(vanished_ids)
+    result["duplicates"] = len(result["references"])
+    result["changed"] = bool(
+        result["new"] or vanished_ids or result["moved"] or result["references"] != previous_references
+    )
+    if bump_version and result["changed"]:
+        _bump_corpus_version(tenant_id)
+    return result
+
+
 def ingest_document(
     document_id: int,
     file_path: str,
     metadata: dict,
     tenant_id: int,
     callback_url: Optional[str] = None,
+    notify_failure: bool = True,
 ):
     """
     Ingest a document into the vector store.
@@ -76,56 +201,36 @@ def ingest_document(
         metadata: Additional metadata
         tenant_id: Tenant identifier for multi-tenant isolation
         callback_url: Optional URL to call when ingestion completes
+        notify_failure: Send the failed callback on unexpected errors. Workers
+            disable it while the job will still be retried.
     """
     try:
         logger.info(f"Starting ingestion for document {document_id} (tenant {tenant_id})")
 
-        # 1. Detect and load document
+        # 1. Detect document type
         file_type = _detect_file_type(file_path)
         logger.debug(f"Detected file type: {file_type}")
 
-        text = _load_document(file_path, file_type)
-        if not text or not text.strip():
-            raise ValueError(f"Document {document_id} is empty")
-        logger.debug(f"Loaded {len(text)} characters from document")
-
-        # 2. Chunk content
-        chunks = semantic_chunk(text)
-        logger.info(f"Created {len(chunks)} chunks from document {document_id}")
-
-        if not chunks:
-            raise ValueError(f"No chunks created from document {document_id}")
-
-        # 3. Generate embeddings
-        logger.debug(f"Generating embeddings for {len(chunks)} chunks")
-        embeddings = embed_texts(chunks)
-        logger.debug(f"Generated {len(embeddings)} embeddings")
-
-        if len(chunks) != len(embeddings):
-            raise ValueError("Mismatch between chunks and embeddings count")
-
-        # 4. Store in vector store
-        logger.debug(f"Storing {len(chunks)} chunks in vector store")
-        store_embeddings(
-            document_id=document_id,
-            chunks=chunks,
-            embeddings=embeddings,
-            metadata=metadata,
-            tenant_id=tenant_id,
-        )
+        # 2. Stream pages through chunking, embedding and storage
+        skipped_pages: List[int] = []
+        result = ingest_pages(document_id, _iter_document(file_path, file_type, skipped_pages), metadata, tenant_id)
 
-        logger.info(f"Document {document_id} ingested successfully (tenant {tenant_id})")
+        if skipped_pages:
+            logger.warning(
+                f"Document {document_id}: skipped {len(skipped_pages)} pages that could not be extracted: "
+                f"{[page + 1 for page in skipped_pages]}"
+            )
 
-        # 5. Callback if provided
+        # 3. Callback if provided (delivered in the background)
         if callback_url:
-            _send_callback_with_retry(
+            send_callback(
                 callback_url,
                 {
                     "document_id": document_id,
                     "status": "completed",
-                    "chunks_created": len(chunks),
+                    "chunks_created": result["chunks"],
+                    "skipped_pages": [page + 1 for page in skipped_pages],
                 },
-                document_id,
             )
 
     except FileNotFoundError as e:
@@ -145,74 +250,56 @@ def ingest_document(
             f"Unexpected error during ingestion of document {document_id}: {e}",
             exc_info=True,
         )
-        _send_failed_callback(callback_url, document_id)
+        if notify_failure:
+            _send_failed_callback(callback_url, document_id)
         raise
 
 
-def _send_failed_callback(callback_url: Optional[str], document_id: int):
-    """Send failed status callback if callback_url is provided."""
-    if callback_url:
-        _send_callback_with_retry(
-            callback_url,
-            {
-                "document_id": document_id,
-                "status": "failed",
-            },
-            document_id,
+def _bump_corpus_version(tenant_id: int):
+    """Invalidate answers cached from the tenant's previous corpus."""
+    try:
+        bump_corpus_version(tenant_id)
+    except Exception as e:
+        logger.error(f"Failed to bump corpus version for tenant {tenant_id}: {e}")
+
+
+def _warn_orphaned(document_ids: List[int], tenant_id: int):
+    """Log documents that lost near-duplicate references that could not be stored in their place."""
+    if document_ids:
+        logger.warning(
+            f"Documents {document_ids} (tenant {tenant_id}) referred to deleted near-duplicate chunks "
+            f"recorded without their text; ingest them again to store those chunks"
         )
 
 
-def _send_callback_with_retry(callback_url: str, payload: dict, document_id: int, max_retries: int = 3):
+def delete_document(document_id: int, tenant_id: int):
     """
-    Send callback with retry logic.
+    Remove a document from the vector store.
+
+    Chunks of other documents stored as references to the document's
+    chunks are embedded and stored first.
 
     Args:
-        callback_url: URL to send callback to
-        payload: JSON payload to send
-        document_id: Document ID for logging
-        max_retries: Maximum number of retry attempts
+        document_id: ID of the document
+        tenant_id: Tenant identifier for multi-tenant isolation
     """
-    logger.info(f"Attempting to send callback for document {document_id} to {callback_url}")
+    dedup = _get_dedup_index()
+    if dedup is not None:
+        promote_references(dedup, tenant_id, dedup.document_points(tenant_id, document_id))
+    delete_document_chunks(document_id=document_id, tenant_id=tenant_id)
+    if dedup is not None:
+        _warn_orphaned(dedup.remove_document(tenant_id, document_id), tenant_id)
+    logger.info(f"Document {document_id} deleted (tenant {tenant_id})")
+    _bump_corpus_version(tenant_id)
 
-    # Parse URL to get hostname
-    parsed = urlparse(callback_url)
-    hostname = parsed.hostname
-
-    # Test DNS resolution and connectivity
-    try:
-        ip = socket.gethostbyname(hostname)
-        logger.debug(f"Resolved {hostname} to {ip}")
-    except socket.gaierror as e:
-        logger.error(f"DNS resolution failed for {hostname}: {e}")
-        return
 
-    for attempt in range(max_retries):
-        try:
-            logger.debug(f"Sending callback attempt {attempt + 1}/{max_retries} for document {document_id}")
-            response = httpx.post(
-                callback_url,
-                json=payload,
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            logger.info(f"Callback sent successfully for document {document_id} (attempt {attempt + 1})")
-            return
-        except httpx.ConnectError as e:
-            if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 2  # Exponential backoff: 2s, 4s, 6s
-                logger.warning(
-                    f"Connection error sending callback for document {document_id} "
-                    f"(attempt {attempt + 1}/{max_retries}): {e}. Retrying in {wait_time}s..."
-                )
-                time.sleep(wait_time)
-            else:
-                logger.error(
-                    f"Failed to send callback for document {document_id} after {max_retries} attempts: {e}. "
-                    f"URL: {callback_url}, Hostname: {hostname}, IP: {ip}"
-                )
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP error sending callback for document {document_id}: {e}")
-            return  # Don't retry on HTTP errors (4xx, 5xx)
-        except Exception as e:
-            logger.error(f"Unexpected error sending callback for document {document_id}: {e}")
-            return  # Don't retry on unexpected errors
+def _send_failed_callback(callback_url: Optional[str], document_id: int):
+    """Send failed status callback if callback_url is provided."""
+    if callback_url:
+        send_callback(
+            callback_url,
+            {
+                "document_id": document_id,
+                "status": "failed",
+            },
+        )
@@ -3,6 +3,25 @@ Vector store implementations for storing and retrieving embeddings.
 """
 
 from .base import VectorStore
-from .qdrant import search, store_embeddings
+from .qdrant import (
+    afetch_payloads,
+    aget_corpus_version,
+    asearch,
+    asearch_batch,
+    bump_corpus_version,
+    delete_document,
+    search,
+    store_embeddings,
+)
 
-__all__ = ["VectorStore", "store_embeddings", "search"]
+__all__ = [
+    "VectorStore",
+    "store_embeddings",
+    "search",
+    "asearch",
+    "asearch_batch",
+    "afetch_payloads",
+    "delete_document",
+    "bump_corpus_version",
+    "aget_corpus_version",
+]
@@ -0,0 +1,125 @@
+"""
+Compare upsert throughput to Qdrant over REST and gRPC.
+
+Writes random points to a temporary collection with each transport and
+reports points per second. The collection is deleted afterwards.
+
+Usage:
+    python -m ingest.vectorstore.benchmark [--points N] [--dimensions D] [--batch-size B] [--parallel P]
+"""
+
+import argparse
+import logging
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from ingest.config import (
+    QDRANT_GRPC_PORT,
+    QDRANT_UPSERT_BATCH_SIZE,
+    QDRANT_UPSERT_PARALLEL,
+    QDRANT_URL,
+)
+
+from .qdrant import _expected_dimension, _forget_collection, upsert_points
+
+logger = logging.getLogger(__name__)
+
+
+def _random_points(count: int, dimensions: int) -> List[PointStruct]:
+    rng = random.Random(0)
+    return [
+        PointStruct(
+            id=str(uuid.uuid4()),
+            vector=[rng.uniform(-1.0, 1.0) for _ in range(dimensions)],
+            payload={"document_id": 0, "tenant_id": 0, "chunk_index": idx, "text": f"benchmark chunk {idx}"},
+        )
+        for idx in range(count)
+    ]
+
+
+def benchmark_upserts(
+    points: int = 10000,
+    dimensions: Optional[int] = None,
+    batch_size: int = QDRANT_UPSERT_BATCH_SIZE,
+    parallel: int = QDRANT_UPSERT_PARALLEL,
+) -> Dict[str, Any]:
+    """
+    Time the same batched upserts over REST and over gRPC.
+
+    Args:
+        points: Number of points to write per transport
+        dimensions: Vector size (defaults to the configured embedding model's)
+        batch_size: Points per request
+        parallel: Requests in flight
+
+    Returns:
+        Seconds and points per second for each transport
+    """
+    dimensions = dimensions or _expected_dimension()
+    data = _random_points(points, dimensions)
+    results: Dict[str, Any] = {"points": points, "dimensions": dimensions}
+
+    for transport, prefer_grpc in (("rest", False), ("grpc", True)):
+        client = QdrantClient(url=QDRANT_URL, prefer_grpc=prefer_grpc, grpc_port=QDRANT_GRPC_PORT)
+        collection = f"benchmark_{uuid.uuid4().hex[:8]}"
+        client.create_collection(
+            collection_name=collection,
+            vectors_config=VectorParams(size=dimensions, distance=Distance.COSINE),
+        )
+        try:
+            started = time.perf_counter()
+            upsert_points(
+                lambda start, end: data[start:end],
+                len(data),
+                collection=collection,
+                batch_size=batch_size,
+                parallel=parallel,
+                client=client,
+            )
+            elapsed = time.perf_counter() - started
+        finally:
+            client.delete_collection(collection)
+            _forget_collection(collection)
+            client.close()
+
+        results[transport] = {"seconds": round(elapsed, 3), "points_per_second": round(points / elapsed, 1)}
+        logger.info(f"{transport}: {points} points in {elapsed:.2f}s ({points / elapsed:.0f} points/s)")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Qdrant upsert throughput over REST and gRPC")
+    parser.add_argument("--points", type=int, default=10000, help="Points to write per transport (default: 10000)")
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        default=None,
+        help="Vector size (default: size of the configured embedding model)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=QDRANT_UPSERT_BATCH_SIZE,
+        help=f"Points per request (default: {QDRANT_UPSERT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=QDRANT_UPSERT_PARALLEL,
+        help=f"Requests in flight (default: {QDRANT_UPSERT_PARALLEL})",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = benchmark_upserts(args.points, args.dimensions, args.batch_size, args.parallel)
+    logger.info(f"Benchmark finished: {result}")
+
+
+if __name__ == "__main__":
+    main()
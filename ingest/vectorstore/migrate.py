@@ -0,0 +1,85 @@
+"""
+Apply payload indexes and HNSW settings to an existing Qdrant collection.
+
+Usage:
+    python -m ingest.vectorstore.migrate [--collection NAME]
+"""
+
+import argparse
+import logging
+from typing import Any, Dict
+
+from .qdrant import (
+    COLLECTION,
+    PAYLOAD_INDEXES,
+    _ensure_collection_exists,
+    _get_client,
+    _hnsw_config,
+    _missing_payload_indexes,
+    _outdated_payload_indexes,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_collection(collection: str = COLLECTION) -> Dict[str, Any]:
+    """
+    Bring a collection up to the current schema.
+
+    Creates the collection if it does not exist, adds missing payload
+    indexes, rebuilds payload indexes whose parameters differ from
+    PAYLOAD_INDEXES and applies the multitenant HNSW settings. Safe to run
+    repeatedly; up-to-date indexes are left untouched. Filtered search is
+    slower while an index is rebuilt.
+
+    Args:
+        collection: Collection name
+
+    Returns:
+        Summary of the changes applied
+    """
+    _ensure_collection_exists(collection)
+
+    client = _get_client()
+    info = client.get_collection(collection)
+
+    created_indexes = []
+    for field_name in _missing_payload_indexes(info):
+        logger.info(f"Creating payload index on {field_name} in {collection}")
+        client.create_payload_index(collection, field_name=field_name, field_schema=PAYLOAD_INDEXES[field_name])
+        created_indexes.append(field_name)
+
+    rebuilt_indexes = []
+    for field_name in _outdated_payload_indexes(info):
+        logger.info(f"Rebuilding payload index on {field_name} in {collection} with new parameters")
+        client.delete_payload_index(collection, field_name=field_name)
+        client.create_payload_index(collection, field_name=field_name, field_schema=PAYLOAD_INDEXES[field_name])
+        rebuilt_indexes.append(field_name)
+
+    hnsw_config = _hnsw_config()
+    current = info.config.hnsw_config
+    hnsw_updated = current.m != hnsw_config.m or current.payload_m != hnsw_config.payload_m
+    if hnsw_updated:
+        logger.info(f"Updating HNSW config of {collection}: m={hnsw_config.m}, payload_m={hnsw_config.payload_m}")
+        client.update_collection(collection_name=collection, hnsw_config=hnsw_config)
+
+    return {
+        "collection": collection,
+        "created_indexes": created_indexes,
+        "rebuilt_indexes": rebuilt_indexes,
+        "hnsw_updated": hnsw_updated,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply payload indexes and HNSW settings to a Qdrant collection")
+    parser.add_argument("--collection", default=COLLECTION, help=f"Collection name (default: {COLLECTION})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = migrate_collection(args.collection)
+    logger.info(f"Migration finished: {result}")
+
+
+if __name__ == "__main__":
+    main()
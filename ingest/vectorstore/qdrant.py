@@ -1,64 +1,398 @@
+import asyncio
+import hashlib
 import logging
+import threading
 import uuid
-from typing import Any, Dict, List
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
-from qdrant_client import QdrantClient
+import grpc
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.models import (
+    DeleteOperation,
     Distance,
     FieldCondition,
     Filter,
+    FilterSelector,
+    HnswConfigDiff,
+    IntegerIndexParams,
+    IntegerIndexType,
     MatchValue,
+    PayloadSelectorExclude,
+    PointIdsList,
     PointStruct,
+    QueryRequest,
+    SetPayload,
+    SetPayloadOperation,
     VectorParams,
 )
 
-from ..config import OPENAI_EMBEDDING_MODEL, QDRANT_COLLECTION, QDRANT_URL
+from ..config import (
+    EMBEDDING_DIMENSIONS,
+    OPENAI_EMBEDDING_MODEL,
+    QDRANT_COLLECTION,
+    QDRANT_GRPC_PORT,
+    QDRANT_HNSW_M,
+    QDRANT_HNSW_PAYLOAD_M,
+    QDRANT_PREFER_GRPC,
+    QDRANT_UPSERT_BATCH_SIZE,
+    QDRANT_UPSERT_PARALLEL,
+    QDRANT_URL,
+)
 
 logger = logging.getLogger(__name__)
 
-# Lazy initialization - client is created only when needed
+# Lazy initialization - clients are created only when needed
 _client = None
+_async_client = None
 
 
 def _get_client() -> QdrantClient:
     """Get or create Qdrant client with lazy initialization."""
     global _client
     if _client is None:
-        _client = QdrantClient(url=QDRANT_URL)
+        _client = QdrantClient(url=QDRANT_URL, prefer_grpc=QDRANT_PREFER_GRPC, grpc_port=QDRANT_GRPC_PORT)
     return _client
 
 
+def _get_async_client() -> AsyncQdrantClient:
+    """Get or create async Qdrant client with lazy initialization."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncQdrantClient(url=QDRANT_URL, prefer_grpc=QDRANT_PREFER_GRPC, grpc_port=QDRANT_GRPC_PORT)
+    return _async_client
+
+
 COLLECTION = QDRANT_COLLECTION
 
-# Embedding dimensions for different models
-EMBEDDING_DIMENSIONS = {
-    "text-embedding-3-small": 1536,
-    "text-embedding-3-large": 3072,
-    "text-embedding-ada-002": 1536,
+# Per-tenant corpus versions live in a small side collection so that every
+# query worker sees ingests and deletes made by the ingest service.
+VERSIONS_COLLECTION = f"{QDRANT_COLLECTION}_corpus_versions"
+
+# Points fetched per request when listing a document's points
+SCROLL_PAGE_SIZE = 1000
+
+# Payload fields used in search filters. Both hold integers matched exactly,
+# so only the lookup index is built (no range index). With m=0, Qdrant builds
+# an HNSW subgraph per value of every HNSW-enabled index: only tenant_id
+# needs one (searches always filter by tenant), and it is the principal
+# field so points are stored grouped by tenant. document_id filters only
+# select points (listing and deleting a document), so it gets no subgraph.
+PAYLOAD_INDEXES = {
+    "tenant_id": IntegerIndexParams(
+        type=IntegerIndexType.INTEGER, lookup=True, range=False, is_principal=True, enable_hnsw=True
+    ),
+    "document_id": IntegerIndexParams(type=IntegerIndexType.INTEGER, lookup=True, range=False, enable_hnsw=False),
 }
 
 
-def _ensure_collection_exists():
-    """Ensure the collection exists with correct configuration."""
+def _hnsw_config() -> HnswConfigDiff:
+    """HNSW settings for the documents collection (per-tenant graphs)."""
+    return HnswConfigDiff(m=QDRANT_HNSW_M, payload_m=QDRANT_HNSW_PAYLOAD_M)
+
+
+def _missing_payload_indexes(info) -> List[str]:
+    """Payload indexes the collection is missing."""
+    payload_schema = info.payload_schema or {}
+    return [field for field in PAYLOAD_INDEXES if field not in payload_schema]
+
+
+def _outdated_payload_indexes(info) -> List[str]:
+    """
+    Payload indexes built with other parameters than PAYLOAD_INDEXES.
+
+    Indexes whose parameters Qdrant doesn't report are not included.
+    """
+    payload_schema = info.payload_schema or {}
+    outdated = []
+    for field, expected in PAYLOAD_INDEXES.items():
+        params = getattr(payload_schema.get(field), "params", None)
+        if not isinstance(params, IntegerIndexParams):
+            continue
+        current = params.model_dump()
+        if any(current.get(key) != value for key, value in expected.model_dump(exclude_none=True).items()):
+            outdated.append(field)
+    return outdated
+
+
+def _warn_missing_payload_indexes(collection: str, info) -> None:
+    missing = _missing_payload_indexes(info)
+    if missing:
+        logger.warning(
+            f"Collection {collection} has no payload index on {', '.join(missing)}; "
+            f"filtered search will be slow. Run: python -m ingest.vectorstore.migrate"
+        )
+    outdated = _outdated_payload_indexes(info)
+    if outdated:
+        logger.warning(
+            f"Collection {collection} has outdated payload indexes on {', '.join(outdated)}. "
+            f"Run: python -m ingest.vectorstore.migrate"
+        )
+
+
+# Collections already checked (or created) by this process, with their vector size
+_known_collections: Dict[str, int] = {}
+_collections_lock = threading.Lock()
+# Serialize the query path's check-then-create, one lock per event loop
+_acollections_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def _get_acollections_lock() -> asyncio.Lock:
+    """Lock for the running event loop, created on first use (asyncio locks can't be shared across loops)."""
+    # A loop runs on one thread, so only that thread ever creates its lock
+    loop = asyncio.get_running_loop()
+    lock = _acollections_locks.get(loop)
+    if lock is None:
+        lock = _acollections_locks[loop] = asyncio.Lock()
+    return lock
+
+
+def _expected_dimension() -> int:
+    """Vector size produced by the configured embedding model."""
+    return EMBEDDING_DIMENSIONS.get(OPENAI_EMBEDDING_MODEL, 3072)
+
+
+def _validate_collection(collection: str, info, dimension: int) -> None:
+    """Check an existing collection's vector size against the expected one."""
+    vectors = info.config.params.vectors
+    size = vectors.size if isinstance(vectors, VectorParams) else None
+
+    if size != dimension:
+        raise ValueError(
+            f"Collection {collection} has vector size {size}, but {dimension} is expected "
+            f"(embedding model {OPENAI_EMBEDDING_MODEL})"
+        )
+
+
+def _ensure_collection_exists(
+    collection: str = COLLECTION,
+    dimension: Optional[int] = None,
+    distance: Distance = Distance.COSINE,
+):
+    """
+    Ensure a collection exists with the expected vector size.
+
+    The check runs once per process; afterwards the collection is served
+    from the in-process registry until _forget_collection() is called.
+
+    Args:
+        collection: Collection name
+        dimension: Expected vector size (defaults to the embedding model's)
+        distance: Distance metric used if the collection has to be created
+
+    Raises:
+        ValueError: If the collection exists with a different vector size
+    """
+    if collection in _known_collections:
+        return
+
+    dimension = dimension or _expected_dimension()
+
+    with _collections_lock:
+        if collection in _known_collections:
+            return
+
+        try:
+            client = _get_client()
+            if client.collection_exists(collection):
+                info = client.get_collection(collection)
+                _validate_collection(collection, info, dimension)
+                if collection == COLLECTION:
+                    _warn_missing_payload_indexes(collection, info)
+                logger.debug(f"Collection {collection} already exists")
+            else:
+                logger.info(f"Creating collection {collection} with dimension {dimension}")
+                client.create_collection(
+                    collection_name=collection,
+                    vectors_config=VectorParams(size=dimension, distance=distance),
+                    hnsw_config=_hnsw_config() if collection == COLLECTION else None,
+                )
+                if collection == COLLECTION:
+                    for field_name, field_schema in PAYLOAD_INDEXES.items():
+                        client.create_payload_index(collection, field_name=field_name, field_schema=field_schema)
+                logger.info(f"Collection {collection} created successfully")
+        except Exception as e:
+            logger.error(f"Error ensuring collection exists: {e}")
+            raise
+
+        _known_collections[collection] = dimension
+
+
+async def _aensure_collection_exists(
+    collection: str = COLLECTION,
+    dimension: Optional[int] = None,
+    distance: Distance = Distance.COSINE,
+):
+    """Async variant of _ensure_collection_exists for the query path."""
+    if collection in _known_collections:
+        return
+
+    dimension = dimension or _expected_dimension()
+
+    async with _get_acollections_lock():
+        if collection in _known_collections:
+            return
+
+        try:
+            client = _get_async_client()
+            if await client.collection_exists(collection):
+                info = await client.get_collection(collection)
+                _validate_collection(collection, info, dimension)
+                if collection == COLLECTION:
+                    _warn_missing_payload_indexes(collection, info)
+                logger.debug(f"Collection {collection} already exists")
+            else:
+                logger.info(f"Creating collection {collection} with dimension {dimension}")
+                try:
+                    await client.create_collection(
+                        collection_name=collection,
+                        vectors_config=VectorParams(size=dimension, distance=distance),
+                        hnsw_config=_hnsw_config() if collection == COLLECTION else None,
+                    )
+                    if collection == COLLECTION:
+                        for field_name, field_schema in PAYLOAD_INDEXES.items():
+                            await client.create_payload_index(
+                                collection, field_name=field_name, field_schema=field_schema
+                            )
+                    logger.info(f"Collection {collection} created successfully")
+                except Exception:
+                    # Another process may have created it concurrently
+                    if not await client.collection_exists(collection):
+                        raise
+        except Exception as e:
+            logger.error(f"Error ensuring collection exists: {e}")
+            raise
+
+        _known_collections[collection] = dimension
+
+
+def _forget_collection(collection: str = COLLECTION):
+    """Drop a collection from the registry so the next operation re-checks it."""
+    _known_collections.pop(collection, None)
+
+
+def _is_collection_not_found(error: Exception) -> bool:
+    """Whether an error means the collection does not exist (e.g. it was dropped)."""
+    if isinstance(error, UnexpectedResponse) and error.status_code == 404:
+        return True
+    # With prefer_grpc the client raises gRPC errors instead
+    if isinstance(error, grpc.RpcError) and callable(getattr(error, "code", None)):
+        if error.code() == grpc.StatusCode.NOT_FOUND:
+            return True
+
+    message = str(error).lower()
+    return "collection" in message and ("not found" in message or "doesn't exist" in message)
+
+
+def _with_collection(operation: Callable[[], Any], collection: str = COLLECTION, **ensure_kwargs) -> Any:
+    """
+    Run an operation against a registered collection.
+
+    If the operation fails because the collection is gone, the registry
+    entry is dropped, the collection is re-checked (and re-created), and
+    the operation is retried once.
+    """
+    _ensure_collection_exists(collection, **ensure_kwargs)
     try:
-        client = _get_client()
-        collection_list = client.get_collections().collections
-        collection_names = [c.name for c in collection_list]
+        return operation()
+    except Exception as e:
+        if not _is_collection_not_found(e):
+            raise
 
-        if COLLECTION not in collection_names:
-            dimension = EMBEDDING_DIMENSIONS.get(OPENAI_EMBEDDING_MODEL, 3072)
-            logger.info(f"Creating collection {COLLECTION} with dimension {dimension}")
+        logger.warning(f"Collection {collection} not found, re-checking and retrying: {e}")
+        _forget_collection(collection)
+        _ensure_collection_exists(collection, **ensure_kwargs)
+        return operation()
 
-            client.create_collection(
-                collection_name=COLLECTION,
-                vectors_config=VectorParams(size=dimension, distance=Distance.COSINE),
-            )
-            logger.info(f"Collection {COLLECTION} created successfully")
-        else:
-            logger.debug(f"Collection {COLLECTION} already exists")
+
+async def _awith_collection(operation: Callable[[], Awaitable[Any]], collection: str = COLLECTION) -> Any:
+    """Async variant of _with_collection for the query path."""
+    await _aensure_collection_exists(collection)
+    try:
+        return await operation()
     except Exception as e:
-        logger.error(f"Error ensuring collection exists: {e}")
-        raise
+        if not _is_collection_not_found(e):
+            raise
+
+        logger.warning(f"Collection {collection} not found, re-checking and retrying: {e}")
+        _forget_collection(collection)
+        await _aensure_collection_exists(collection)
+        return await operation()
+
+
+def _build_filter(tenant_id: int, filters: Dict[str, Any] = None) -> Filter:
+    """Build the tenant-scoped filter used by every search."""
+    conditions = [FieldCondition(key="tenant_id", match=MatchValue(value=tenant_id))]
+
+    # Add additional filters if provided
+    if filters:
+        for key, value in filters.items():
+            conditions.append(FieldCondition(key=key, match=MatchValue(value=value)))
+
+    return Filter(must=conditions)
+
+
+def _format_results(points) -> List[Dict[str, Any]]:
+    """Convert Qdrant scored points into plain result dictionaries."""
+    results = []
+    for point in points:
+        payload = point.payload or {}
+        results.append(
+            {
+                "id": str(point.id),
+                "score": float(point.score),
+                "payload": payload,
+                "text": payload.get("text", ""),
+                "document_id": payload.get("document_id"),
+                "chunk_index": payload.get("chunk_index"),
+                "page": payload.get("page"),
+                "section": payload.get("section"),
+            }
+        )
+    return results
+
+
+def _with_payload(payload_fields: Optional[List[str]]):
+    """Payload selector for a query: every field, or only the listed ones."""
+    return True if payload_fields is None else payload_fields
+
+
+def chunk_point_ids(
+    document_id: int,
+    chunks: List[str],
+    tenant_id: int,
+    occurrences: Optional[Dict[str, int]] = None,
+) -> List[str]:
+    """
+    Deterministic point IDs for a document's chunks.
+
+    Each ID is a UUIDv5 of the tenant, document and chunk content hash, so
+    re-ingesting unchanged chunks yields the same IDs. Repeated chunk texts
+    within a document are told apart by their occurrence number.
+
+    Args:
+        document_id: ID of the document
+        chunks: List of text chunks
+        tenant_id: Tenant identifier
+        occurrences: Occurrence counts carried over from earlier chunks of the
+            same document, when IDs are computed a few chunks at a time
+
+    Returns:
+        Point IDs in chunk order
+    """
+    occurrences = occurrences if occurrences is not None else {}
+    point_ids = []
+    for chunk in chunks:
+        chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+        occurrence = occurrences.get(chunk_hash, 0)
+        occurrences[chunk_hash] = occurrence + 1
+        point_ids.append(
+            str(uuid.uuid5(uuid.NAMESPACE_OID, f"contexta-chunk:{tenant_id}:{document_id}:{chunk_hash}:{occurrence}"))
+        )
+    return point_ids
 
 
 def store_embeddings(
@@ -67,52 +401,234 @@ def store_embeddings(
     embeddings: List[List[float]],
     metadata: dict,
     tenant_id: int,
+    chunk_indexes: Optional[List[int]] = None,
+    point_ids: Optional[List[str]] = None,
+    payloads: Optional[List[dict]] = None,
 ):
     """
     Store embeddings in Qdrant with multi-tenant support.
 
+    Points get deterministic IDs (see chunk_point_ids), so storing the same
+    chunks again overwrites them instead of adding copies.
+
     Args:
         document_id: ID of the document
         chunks: List of text chunks
         embeddings: List of embedding vectors
         metadata: Additional metadata
         tenant_id: Tenant identifier for multi-tenant isolation
+        chunk_indexes: Positions of the chunks in the document (defaults to 0..n-1)
+        point_ids: IDs of the points (defaults to chunk_point_ids of chunks)
+        payloads: Extra payload for each chunk (e.g. its page and offsets)
     """
-    _ensure_collection_exists()
-
     if len(chunks) != len(embeddings):
         raise ValueError("Chunks and embeddings must have the same length")
 
-    points = []
-    for idx, (chunk, vector) in enumerate(zip(chunks, embeddings)):
-        points.append(
+    chunk_indexes = chunk_indexes if chunk_indexes is not None else list(range(len(chunks)))
+    point_ids = point_ids if point_ids is not None else chunk_point_ids(document_id, chunks, tenant_id)
+
+    def build_points(start: int, end: int) -> List[PointStruct]:
+        return [
             PointStruct(
-                id=str(uuid.uuid4()),
-                vector=vector,
+                id=point_ids[idx],
+                vector=embeddings[idx],
                 payload={
                     "document_id": document_id,
                     "tenant_id": tenant_id,
-                    "text": chunk,
-                    "chunk_index": idx,
+                    "text": chunks[idx],
+                    "chunk_index": chunk_indexes[idx],
                     **metadata,
+                    **(payloads[idx] if payloads is not None else {}),
                 },
             )
-        )
+            for idx in range(start, end)
+        ]
 
     try:
-        client = _get_client()
-        client.upsert(collection_name=COLLECTION, points=points)
-        logger.info(f"Stored {len(points)} chunks for document {document_id} (tenant {tenant_id})")
+        upsert_points(build_points, len(chunks))
+        logger.info(f"Stored {len(chunks)} chunks for document {document_id} (tenant {tenant_id})")
     except Exception as e:
         logger.error(f"Error storing embeddings: {e}")
         raise
 
 
+def upsert_points(
+    build_points: Callable[[int, int], List[PointStruct]],
+    count: int,
+    collection: str = COLLECTION,
+    batch_size: Optional[int] = None,
+    parallel: Optional[int] = None,
+    client: Optional[QdrantClient] = None,
+):
+    """
+    Upsert points in batches with several batches in flight.
+
+    Batches are built only when sent, so at most `parallel` batches of
+    points exist at a time. All but the last batch are sent with
+    wait=False; the last one waits until it is applied. Qdrant applies
+    updates in order, so once it returns every batch is searchable.
+
+    Args:
+        build_points: Builds the points in [start, end)
+        count: Total number of points
+        collection: Collection name
+        batch_size: Points per request (defaults to QDRANT_UPSERT_BATCH_SIZE)
+        parallel: Requests in flight (defaults to QDRANT_UPSERT_PARALLEL)
+        client: Client to send with. Defaults to the shared client, with the
+            collection checked (and created) through the registry; a caller
+            passing its own client manages the collection itself.
+    """
+    batch_size = batch_size or QDRANT_UPSERT_BATCH_SIZE
+    parallel = parallel or QDRANT_UPSERT_PARALLEL
+    ranges = [(start, min(start + batch_size, count)) for start in range(0, count, batch_size)]
+    if not ranges:
+        return
+
+    shared = _get_client() if client is None else None
+
+    def send(start: int, end: int, wait: bool):
+        points = build_points(start, end)
+        if shared is None:
+            client.upsert(collection_name=collection, points=points, wait=wait)
+        else:
+            _with_collection(lambda: shared.upsert(collection_name=collection, points=points, wait=wait), collection)
+
+    *unacknowledged, last = ranges
+    if unacknowledged:
+        with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="qdrant-upsert") as executor:
+            pending = deque()
+            for start, end in unacknowledged:
+                if len(pending) >= parallel:
+                    pending.popleft().result()
+                pending.append(executor.submit(send, start, end, False))
+            for future in pending:
+                future.result()
+
+    # Final consistency wait
+    send(*last, True)
+
+
+def get_document_points(
+    document_id: int, tenant_id: int, payloads: Optional[Dict[str, dict]] = None
+) -> Dict[str, Optional[int]]:
+    """
+    List the points stored for a document.
+
+    Args:
+        document_id: ID of the document
+        tenant_id: Tenant identifier for multi-tenant isolation
+        payloads: If given, filled with each point's stored payload
+            (without its text)
+
+    Returns:
+        Mapping of point ID to its chunk index
+    """
+    scroll_filter = _build_filter(tenant_id, {"document_id": document_id})
+    with_payload = ["chunk_index"] if payloads is None else PayloadSelectorExclude(exclude=["text"])
+    client = _get_client()
+    points: Dict[str, Optional[int]] = {}
+    offset = None
+
+    try:
+        while True:
+            records, offset = _with_collection(
+                lambda: client.scroll(
+                    collection_name=COLLECTION,
+                    scroll_filter=scroll_filter,
+                    limit=SCROLL_PAGE_SIZE,
+                    offset=offset,
+                    with_payload=with_payload,
+                    with_vectors=False,
+                )
+            )
+            for record in records:
+                points[str(record.id)] = (record.payload or {}).get("chunk_index")
+                if payloads is not None:
+                    payloads[str(record.id)] = record.payload or {}
+            if offset is None:
+                return points
+    except Exception as e:
+        logger.error(f"Error listing points of document {document_id}: {e}")
+        raise
+
+
+def _payload_changed(stored: Optional[dict], payload: dict) -> bool:
+    """Whether setting a payload would change a point's stored payload (unknown counts as changed)."""
+    return stored is None or any(key not in stored or stored[key] != value for key, value in payload.items())
+
+
+def update_document_points(
+    document_id: int,
+    tenant_id: int,
+    delete_ids: List[str],
+    chunk_indexes: Dict[str, int],
+    metadata: Optional[dict] = None,
+    keep_ids: Optional[List[str]] = None,
+    payloads: Optional[Dict[str, dict]] = None,
+    stored_payloads: Optional[Dict[str, dict]] = None,
+):
+    """
+    Apply the non-embedding part of a re-ingest in one request.
+
+    Deletes vanished chunks, moves kept chunks to their new positions and
+    refreshes the metadata and per-chunk payload of kept chunks. Given the
+    stored payloads, kept chunks whose payload would not change are left
+    alone, so an unchanged re-ingest sends no payload updates.
+
+    Args:
+        document_id: ID of the document
+        tenant_id: Tenant identifier
+        delete_ids: IDs of points to delete
+        chunk_indexes: New chunk index for each moved point
+        metadata: Document metadata to set on the kept points
+        keep_ids: IDs of the kept points (required with metadata)
+        payloads: Per-chunk payload (e.g. page and offsets) to set on kept points
+        stored_payloads: Payload currently stored for each kept point (see
+            get_document_points); without it every payload is set
+    """
+    payloads = payloads or {}
+
+    def changed(point_id: str, payload: dict) -> bool:
+        return stored_payloads is None or _payload_changed(stored_payloads.get(point_id), payload)
+
+    operations = []
+    if delete_ids:
+        operations.append(DeleteOperation(delete=PointIdsList(points=delete_ids)))
+    for point_id, idx in chunk_indexes.items():
+        payload = {**payloads.get(point_id, {}), "chunk_index": idx}
+        operations.append(SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[point_id])))
+    refreshed = 0
+    for point_id, payload in payloads.items():
+        if point_id not in chunk_indexes and changed(point_id, payload):
+            operations.append(SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[point_id])))
+            refreshed += 1
+    if metadata and keep_ids:
+        stale_ids = [point_id for point_id in keep_ids if changed(point_id, metadata)]
+        if stale_ids:
+            operations.append(SetPayloadOperation(set_payload=SetPayload(payload=metadata, points=stale_ids)))
+            refreshed += len(stale_ids)
+
+    if not operations:
+        return
+
+    try:
+        client = _get_client()
+        _with_collection(lambda: client.batch_update_points(collection_name=COLLECTION, update_operations=operations))
+        logger.info(
+            f"Updated document {document_id} (tenant {tenant_id}): "
+            f"{len(delete_ids)} chunks deleted, {len(chunk_indexes)} moved, {refreshed} payloads refreshed"
+        )
+    except Exception as e:
+        logger.error(f"Error updating points of document {document_id}: {e}")
+        raise
+
+
 def search(
     query_embedding: List[float],
     tenant_id: int,
     top_k: int = 10,
     filters: Dict[str, Any] = None,
+    payload_fields: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Search for similar documents in Qdrant with tenant filtering.
@@ -122,48 +638,227 @@ def search(
         tenant_id: Tenant identifier for filtering
         top_k: Number of results to return
         filters: Additional metadata filters
+        payload_fields: Payload fields to return (None returns the full payload)
 
     Returns:
         List of search results with scores and metadata
     """
-    _ensure_collection_exists()
+    query_filter = _build_filter(tenant_id, filters)
 
-    # Build filter conditions
-    conditions = [FieldCondition(key="tenant_id", match=MatchValue(value=tenant_id))]
+    try:
+        client = _get_client()
 
-    # Add additional filters if provided
-    if filters:
-        for key, value in filters.items():
-            conditions.append(FieldCondition(key=key, match=MatchValue(value=value)))
+        # query_points accepts the raw vector as the query
+        query_result = _with_collection(
+            lambda: client.query_points(
+                collection_name=COLLECTION,
+                query=query_embedding,
+                query_filter=query_filter,
+                limit=top_k,
+                with_payload=_with_payload(payload_fields),
+            )
+        )
+
+        return _format_results(query_result.points)
+    except Exception as e:
+        logger.error(f"Error searching in Qdrant: {e}")
+        raise
 
-    query_filter = Filter(must=conditions) if conditions else None
+
+async def asearch(
+    query_embedding: List[float],
+    tenant_id: int,
+    top_k: int = 10,
+    filters: Dict[str, Any] = None,
+    payload_fields: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Search for similar documents without blocking the event loop.
+
+    Args:
+        query_embedding: Query embedding vector
+        tenant_id: Tenant identifier for filtering
+        top_k: Number of results to return
+        filters: Additional metadata filters
+        payload_fields: Payload fields to return (None returns the full payload)
+
+    Returns:
+        List of search results with scores and metadata
+    """
+    query_filter = _build_filter(tenant_id, filters)
 
     try:
-        client = _get_client()
+        client = _get_async_client()
+        query_result = await _awith_collection(
+            lambda: client.query_points(
+                collection_name=COLLECTION,
+                query=query_embedding,
+                query_filter=query_filter,
+                limit=top_k,
+                with_payload=_with_payload(payload_fields),
+            )
+        )
+
+        return _format_results(query_result.points)
+    except Exception as e:
+        logger.error(f"Error searching in Qdrant: {e}")
+        raise
+
 
-        # Use query_points - pass vector directly or use NamedVector
-        # For qdrant-client 1.7.0+, query can be a list of floats directly
-        query_result = client.query_points(
-            collection_name=COLLECTION,
-            query=query_embedding,  # Pass vector directly
-            query_filter=query_filter,
-            limit=top_k,
+async def asearch_batch(
+    query_embeddings: List[List[float]],
+    tenant_id: int,
+    top_k: int = 10,
+    filters: Dict[str, Any] = None,
+    payload_fields: Optional[List[str]] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Search for several query vectors in a single Qdrant round trip.
+
+    Args:
+        query_embeddings: Query embedding vectors
+        tenant_id: Tenant identifier for filtering
+        top_k: Number of results to return per query
+        filters: Additional metadata filters
+        payload_fields: Payload fields to return (None returns the full payload)
+
+    Returns:
+        One list of search results per query, in input order
+    """
+    if not query_embeddings:
+        return []
+
+    query_filter = _build_filter(tenant_id, filters)
+    requests = [
+        QueryRequest(
+            query=query_embedding, filter=query_filter, limit=top_k, with_payload=_with_payload(payload_fields)
         )
+        for query_embedding in query_embeddings
+    ]
 
-        # Extract points from query result
-        results = query_result.points
+    try:
+        client = _get_async_client()
+        responses = await _awith_collection(
+            lambda: client.query_batch_points(collection_name=COLLECTION, requests=requests)
+        )
 
-        return [
-            {
-                "id": str(result.id),
-                "score": float(result.score),
-                "payload": result.payload,
-                "text": result.payload.get("text", ""),
-                "document_id": result.payload.get("document_id"),
-                "chunk_index": result.payload.get("chunk_index"),
-            }
-            for result in results
-        ]
+        return [_format_results(response.points) for response in responses]
     except Exception as e:
-        logger.error(f"Error searching in Qdrant: {e}")
+        logger.error(f"Error batch searching in Qdrant: {e}")
+        raise
+
+
+async def afetch_payloads(point_ids: List[str], payload_fields: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch selected payload fields for known points.
+
+    Used after re-ranking to load large fields (e.g. the chunk text) only
+    for the results that survive.
+
+    Args:
+        point_ids: IDs of the points to fetch
+        payload_fields: Payload fields to return
+
+    Returns:
+        Mapping of point ID to its (partial) payload
+    """
+    if not point_ids:
+        return {}
+
+    try:
+        client = _get_async_client()
+        points = await _awith_collection(
+            lambda: client.retrieve(
+                collection_name=COLLECTION,
+                ids=point_ids,
+                with_payload=payload_fields,
+                with_vectors=False,
+            )
+        )
+
+        return {str(point.id): point.payload or {} for point in points}
+    except Exception as e:
+        logger.error(f"Error fetching payloads from Qdrant: {e}")
+        raise
+
+
+def delete_document(document_id: int, tenant_id: int):
+    """
+    Delete every chunk of a document from Qdrant.
+
+    Args:
+        document_id: ID of the document
+        tenant_id: Tenant identifier for multi-tenant isolation
+    """
+    points_selector = FilterSelector(filter=_build_filter(tenant_id, {"document_id": document_id}))
+
+    try:
+        client = _get_client()
+        _with_collection(lambda: client.delete(collection_name=COLLECTION, points_selector=points_selector))
+        logger.info(f"Deleted chunks for document {document_id} (tenant {tenant_id})")
+    except Exception as e:
+        logger.error(f"Error deleting document {document_id}: {e}")
         raise
+
+
+def _corpus_version_point_id(tenant_id: int) -> str:
+    """Stable point ID holding a tenant's corpus version."""
+    return str(uuid.uuid5(uuid.NAMESPACE_OID, f"contexta-corpus-version:{tenant_id}"))
+
+
+def bump_corpus_version(tenant_id: int) -> str:
+    """
+    Record that a tenant's corpus changed.
+
+    Called after every ingest or delete so caches derived from the corpus
+    (e.g. the query API answer cache) can detect stale entries.
+
+    Args:
+        tenant_id: Tenant identifier
+
+    Returns:
+        The new corpus version
+    """
+    client = _get_client()
+    version = uuid.uuid4().hex
+    point = PointStruct(
+        id=_corpus_version_point_id(tenant_id),
+        vector=[0.0],
+        payload={"tenant_id": tenant_id, "version": version},
+    )
+
+    _with_collection(
+        lambda: client.upsert(collection_name=VERSIONS_COLLECTION, points=[point]),
+        collection=VERSIONS_COLLECTION,
+        dimension=1,
+        distance=Distance.DOT,
+    )
+    logger.debug(f"Corpus version for tenant {tenant_id} is now {version}")
+    return version
+
+
+async def aget_corpus_version(tenant_id: int) -> Optional[str]:
+    """
+    Get a tenant's current corpus version.
+
+    Args:
+        tenant_id: Tenant identifier
+
+    Returns:
+        Corpus version, or None if the tenant's corpus never changed
+        since versions started being tracked
+    """
+    client = _get_async_client()
+    try:
+        points = await client.retrieve(
+            collection_name=VERSIONS_COLLECTION,
+            ids=[_corpus_version_point_id(tenant_id)],
+            with_payload=["version"],
+            with_vectors=False,
+        )
+    except Exception as e:
+        if _is_collection_not_found(e):
+            return None
+        raise
+
+    return points[0].payload.get("version") if points else None
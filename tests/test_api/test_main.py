@@ -4,13 +4,23 @@ Tests for main API endpoints.
 
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from api.main import app
+from core.llm import LLMResponse, LLMUsage
 
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Start every test with empty caches and a fixed corpus version."""
+    with patch('api.main._embedding_cache', None), patch('api.main._answer_cache', None):
+        with patch('api.main.aget_corpus_version', new_callable=AsyncMock, return_value="v1"), \
+                patch('api.main.afetch_payloads', new_callable=AsyncMock, return_value={}):
+            yield
+
+
 class TestAPIEndpoints:
     """Tests for API endpoints."""
     
@@ -22,11 +32,11 @@ class TestAPIEndpoints:
         data = response.json()
         assert "message" in data or "version" in data
     
-    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.qdrant._get_async_client')
     def test_health_endpoint(self, mock_get_client):
         """Test health check endpoint."""
         mock_qdrant_client = Mock()
-        mock_qdrant_client.get_collections.return_value = Mock(collections=[])
+        mock_qdrant_client.get_collections = AsyncMock(return_value=Mock(collections=[]))
         mock_get_client.return_value = mock_qdrant_client
         
         response = client.get("/health")
@@ -37,8 +47,8 @@ class TestAPIEndpoints:
     
     @patch('api.main._get_llm')
     @patch('api.main._get_reranker')
-    @patch('ingest.vectorstore.qdrant.search')
-    @patch('ingest.embeddings.openai.embed_texts')
+    @patch('api.main.asearch', new_callable=AsyncMock)
+    @patch('api.main.aembed_texts', new_callable=AsyncMock)
     def test_query_endpoint(
         self,
         mock_embed,
@@ -60,12 +70,15 @@ class TestAPIEndpoints:
             }
         ]
         
-        mock_reranker = Mock()
+        mock_reranker = Mock(required_fields=[])
         mock_reranker.rerank.return_value = mock_search.return_value
         mock_get_reranker.return_value = mock_reranker
         
         mock_llm = Mock()
-        mock_llm.generate.return_value = "This is a test answer"
+        mock_llm.acomplete = AsyncMock(return_value=LLMResponse(
+            text="This is a test answer",
+            usage=LLMUsage(prompt_tokens=1200, completion_tokens=20, cached_tokens=1024)
+        ))
         mock_get_llm.return_value = mock_llm
         
         # Make request
@@ -86,9 +99,15 @@ class TestAPIEndpoints:
         assert "sources" in data
         assert "query" in data
         assert data["answer"] == "This is a test answer"
+        assert data["usage"]["cached_tokens"] == 1024
+        
+        # System instruction first, then context, then the question
+        messages = mock_llm.acomplete.call_args[1]["prompt"]
+        assert [m["role"] for m in messages] == ["system", "user", "user"]
+        assert messages[-1]["content"] == "Question: What is a test?"
     
-    @patch('ingest.vectorstore.qdrant.search')
-    @patch('ingest.embeddings.openai.embed_texts')
+    @patch('api.main.asearch', new_callable=AsyncMock)
+    @patch('api.main.aembed_texts', new_callable=AsyncMock)
     def test_query_endpoint_no_results(self, mock_embed, mock_search):
         """Test query endpoint with no search results."""
         mock_embed.return_value = [[0.1] * 3072]
@@ -108,6 +127,166 @@ class TestAPIEndpoints:
         assert "couldn't find" in data["answer"].lower()
         assert len(data["sources"]) == 0
     
+    @patch('api.main._get_llm')
+    @patch('api.main.asearch', new_callable=AsyncMock)
+    @patch('api.main.aembed_texts', new_callable=AsyncMock)
+    def test_query_stream_endpoint(self, mock_embed, mock_search, mock_get_llm):
+        """Test streaming query endpoint sends sources first, then tokens."""
+        mock_embed.return_value = [[0.1] * 3072]
+        mock_search.return_value = [
+            {
+                "id": "test-1",
+                "score": 0.95,
+                "text": "Test result",
+                "document_id": 1,
+                "chunk_index": 0,
+                "payload": {}
+            }
+        ]
+        
+        async def fake_stream(**kwargs):
+            for token in ["This is", " a test"]:
+                yield token
+        
+        mock_llm = Mock()
+        mock_llm.agenerate_stream = fake_stream
+        mock_get_llm.return_value = mock_llm
+        
+        with client.stream(
+            "POST",
+            "/query/stream",
+            json={"query": "What is a test?", "tenant_id": 1}
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+        
+        events = [block.split("\n")[0] for block in body.strip().split("\n\n")]
+        assert events == ["event: sources", "event: token", "event: token", "event: done"]
+        assert '"document_id": 1' in body
+        assert '"text": " a test"' in body
+    
+    @patch('api.main.ANSWER_CACHE_ENABLED', False)
+    @patch('api.main._get_llm')
+    @patch('api.main.asearch', new_callable=AsyncMock)
+    @patch('api.main.aembed_texts', new_callable=AsyncMock)
+    def test_query_embedding_cache(self, mock_embed, mock_search, mock_get_llm):
+        """Test repeated queries reuse the cached query embedding."""
+        mock_embed.return_value = [[0.1] * 3072]
+        mock_search.return_value = []
+        
+        client.post("/query", json={"query": "What is a test?", "tenant_id": 1})
+        client.post("/query", json={"query": "what is a  test?", "tenant_id": 1})
+        
+        mock_embed.assert_awaited_once()
+        assert mock_search.await_count == 2
+        
+        stats = client.get("/cache/stats").json()["query_embedding"]
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+    
+    @patch('api.main._get_llm')
+    @patch('api.main.asearch', new_callable=AsyncMock)
+    @patch('api.main.aembed_texts', new_callable=AsyncMock)
+    def test_query_answer_cache(self, mock_embed, mock_search, mock_get_llm):
+        """Test similar queries reuse the answer until the corpus changes."""
+        mock_embed.side_effect = [[[1.0, 0.0, 0.0]], [[0.99, 0.01, 0.0]]]
+        mock_search.return_value = [
+            {"id": "test-1", "score": 0.9, "text": "Test result", "document_id": 1, "chunk_index": 0, "payload": {}}
+        ]
+        mock_llm = Mock()
+        mock_llm.acomplete = AsyncMock(return_value=LLMResponse(text="Cached answer"))
+        mock_get_llm.return_value = mock_llm
+        
+        first = client.post("/query", json={"query": "What is a test?", "tenant_id": 1})
+        second = client.post("/query", json={"query": "What's a test?", "tenant_id": 1})
+        
+        assert second.status_code == 200
+        assert second.json()["answer"] == first.json()["answer"] == "Cached answer"
+        assert second.json()["query"] == "What's a test?"
+        mock_llm.acomplete.assert_awaited_once()
+        
+        # The tenant ingested a document: the cached answer is no longer valid
+        with patch('api.main.aget_corpus_version', new_callable=AsyncMock, return_value="v2"):
+            client.post("/query", json={"query": "What is a test?", "tenant_id": 1})
+        
+        assert mock_llm.acomplete.await_count == 2
+        assert client.get("/cache/stats").json()["answer"]["hits"] == 1
+    
+    @patch('api.main._get_llm')
+    @patch('api.main.asearch_batch', new_callable=AsyncMock)
+    @patch('api.main.aembed_texts', new_callable=AsyncMock)
+    def test_query_batch_endpoint(self, mock_embed, mock_search_batch, mock_get_llm):
+        """Test batch queries share one embedding call and one search round trip."""
+        from api.main import afetch_payloads
+        mock_embed.return_value = [[1.0, 0.0], [0.0, 1.0]]
+        result = {"id": "test-1", "score": 0.9, "text": "", "document_id": 1, "chunk_index": 0, "payload": {}}
+        mock_search_batch.return_value = [[result], [], [result]]
+        
+        mock_llm = Mock()
+        mock_llm.acomplete = AsyncMock(side_effect=[LLMResponse(text="Answer A"), RuntimeError("LLM down")])
+        mock_get_llm.return_value = mock_llm
+        
+        response = client.post(
+            "/query/batch",
+            json={"queries": ["Question A", "Question B", "Question A"], "tenant_id": 1}
+        )
+        
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["query"] for r in results] == ["Question A", "Question B", "Question A"]
+        
+        # Duplicate queries are embedded once, in a single call
+        mock_embed.assert_awaited_once_with(["Question A", "Question B"])
+        mock_search_batch.assert_awaited_once()
+        assert len(mock_search_batch.call_args[1]["query_embeddings"]) == 3
+        
+        assert results[1]["answer"] == "I couldn't find any relevant information in the documents."
+        answers = {results[0]["answer"], results[2]["answer"]}
+        assert answers == {"Answer A", ""}
+        assert [r["error"] for r in results if r["answer"] == ""] == ["LLM down"]
+        
+        # Only the projected fields are searched; text is fetched once for all survivors
+        assert mock_search_batch.call_args[1]["payload_fields"] == ["document_id", "chunk_index"]
+        afetch_payloads.assert_awaited_once()
+    
+    @patch('api.main._get_llm')
+    @patch('api.main.asearch', new_callable=AsyncMock)
+    @patch('api.main.aembed_texts', new_callable=AsyncMock)
+    def test_query_fetches_text_after_rerank(self, mock_embed, mock_search, mock_get_llm):
+        """Test chunk text is only fetched for the re-ranked results."""
+        mock_embed.return_value = [[0.1] * 4]
+        mock_search.return_value = [
+            {"id": f"id{i}", "score": 1.0 - i / 10, "text": "", "document_id": 1, "chunk_index": i,
+             "payload": {"document_id": 1, "chunk_index": i}}
+            for i in range(5)
+        ]
+        mock_llm = Mock()
+        mock_llm.acomplete = AsyncMock(return_value=LLMResponse(text="Answer"))
+        mock_get_llm.return_value = mock_llm
+        
+        with patch('api.main.afetch_payloads', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = {
+                "id0": {"text": "First chunk", "page": 3, "section": "Intro"},
+                "id1": {"text": "Second chunk"},
+            }
+            response = client.post("/query", json={"query": "Test", "tenant_id": 1, "rerank_top_k": 2})
+        
+        assert response.status_code == 200
+        assert mock_search.call_args[1]["payload_fields"] == ["document_id", "chunk_index"]
+        mock_fetch.assert_awaited_once_with(["id0", "id1"], payload_fields=["text", "page", "section"])
+        sources = response.json()["sources"]
+        assert [s["text_preview"] for s in sources] == ["First chunk", "Second chunk"]
+        assert [(s["page"], s["section"]) for s in sources] == [(3, "Intro"), (None, None)]
+        messages = mock_llm.acomplete.call_args[1]["prompt"]
+        assert "First chunk" in messages[1]["content"]
+    
+    def test_query_batch_endpoint_validation(self):
+        """Test batch endpoint rejects empty batches."""
+        response = client.post("/query/batch", json={"queries": [], "tenant_id": 1})
+        
+        assert response.status_code == 400
+    
     def test_query_endpoint_validation(self):
         """Test query endpoint validates input."""
         # Missing required fields
@@ -118,3 +297,14 @@ class TestAPIEndpoints:
         
         assert response.status_code == 422  # Validation error
 
+    
+    def test_context_budget_prefers_client_limits(self):
+        """Test the server's token budget only applies when the client sets no context limit."""
+        from api.main import QueryRequest, _context_token_budget
+        
+        with patch('api.main.MAX_CONTEXT_TOKENS', 2000):
+            assert _context_token_budget(QueryRequest(query="q", tenant_id=1)) == 2000
+            assert _context_token_budget(QueryRequest(query="q", tenant_id=1, max_context_length=800)) is None
+            assert _context_token_budget(QueryRequest(query="q", tenant_id=1, max_context_tokens=100)) == 100
+        with patch('api.main.MAX_CONTEXT_TOKENS', 0):
+            assert _context_token_budget(QueryRequest(query="q", tenant_id=1)) is None
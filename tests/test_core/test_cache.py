@@ -0,0 +1,241 @@
+"""
+Tests for cache backends.
+"""
+
+import sqlite3
+import pytest
+from unittest.mock import patch
+from core.cache import ChunkEmbeddingCache, LRUTTLCache, QueryEmbeddingCache, SemanticAnswerCache, SQLiteVectorCache
+
+
+class TestLRUTTLCache:
+    """Tests for in-process LRU/TTL cache."""
+    
+    def test_evicts_least_recently_used(self):
+        """Test the least recently used entry is evicted first."""
+        cache = LRUTTLCache(max_entries=2)
+        
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+    
+    def test_expires_entries(self):
+        """Test entries expire after the TTL."""
+        cache = LRUTTLCache(max_entries=10, ttl=60)
+        
+        with patch('core.cache.memory.time.monotonic', return_value=1000.0):
+            cache.set("a", 1)
+        
+        with patch('core.cache.memory.time.monotonic', return_value=1059.0):
+            assert cache.get("a") == 1
+        
+        with patch('core.cache.memory.time.monotonic', return_value=1061.0):
+            assert cache.get("a") is None
+    
+    def test_invalid_size(self):
+        """Test cache rejects a non-positive size."""
+        with pytest.raises(ValueError, match="max_entries"):
+            LRUTTLCache(max_entries=0)
+
+
+class TestSQLiteVectorCache:
+    """Tests for SQLite vector cache."""
+    
+    def test_roundtrip_as_float32(self, tmp_path):
+        """Test vectors survive a roundtrip through the database file."""
+        path = str(tmp_path / "cache.db")
+        cache = SQLiteVectorCache(path)
+        cache.set("key", [0.5, 0.25, -1.0])
+        
+        # A second connection (e.g. another worker) sees the same data
+        other = SQLiteVectorCache(path)
+        assert other.get("key") == [0.5, 0.25, -1.0]
+        assert other.get("missing") is None
+    
+    def test_expires_entries(self, tmp_path):
+        """Test entries expire after the TTL."""
+        cache = SQLiteVectorCache(str(tmp_path / "cache.db"), ttl=60)
+        
+        with patch('core.cache.sqlite.time.time', return_value=1000.0):
+            cache.set("key", [1.0])
+        
+        with patch('core.cache.sqlite.time.time', return_value=1061.0):
+            assert cache.get("key") is None
+    
+    def test_evicts_least_recently_used_over_max_bytes(self, tmp_path):
+        """Test the least recently used vectors are evicted past the size limit."""
+        # Each vector is 4 float32 values = 16 bytes
+        cache = SQLiteVectorCache(str(tmp_path / "cache.db"), max_bytes=40)
+        
+        with patch('core.cache.sqlite.time.time', return_value=1000.0):
+            cache.set_many({"a": [1.0] * 4, "b": [2.0] * 4})
+        with patch('core.cache.sqlite.time.time', return_value=1001.0):
+            cache.get("a")  # "b" is now least recently used
+        with patch('core.cache.sqlite.time.time', return_value=1002.0):
+            cache.set_many({"c": [3.0] * 4, "d": [4.0] * 4})
+        
+        assert cache.size_bytes() <= 40
+        assert cache.get("b") is None
+        assert cache.get("d") == [4.0] * 4
+    
+    def test_size_total_tracks_writes(self, tmp_path):
+        """Test the stored size stays exact across replaces, deletes and other connections."""
+        path = str(tmp_path / "cache.db")
+        cache = SQLiteVectorCache(path)
+        other = SQLiteVectorCache(path)
+        
+        cache.set_many({"a": [1.0] * 4, "b": [2.0] * 4})
+        other.set("a", [1.0] * 2)  # Replaced by a smaller vector
+        cache.delete("b")
+        cache.delete("missing")
+        
+        assert cache.size_bytes() == other.size_bytes() == 8
+        
+        other.clear()
+        assert cache.size_bytes() == 0
+    
+    def test_size_total_computed_for_existing_database(self, tmp_path):
+        """Test a database written before the size total existed gets it on open."""
+        path = str(tmp_path / "cache.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)")
+        conn.execute("INSERT INTO vectors VALUES ('old', ?, 0)", (b"\0" * 12,))
+        conn.commit()
+        conn.close()
+        
+        cache = SQLiteVectorCache(path, max_bytes=20)
+        cache.set("new", [1.0] * 4)
+        
+        assert cache.size_bytes() == 16
+        assert cache.get("old") is None
+    
+    def test_get_many(self, tmp_path):
+        """Test looking up several vectors at once."""
+        cache = SQLiteVectorCache(str(tmp_path / "cache.db"))
+        cache.set_many({"a": [1.0], "b": [2.0]})
+        
+        assert cache.get_many(["a", "b", "missing"]) == {"a": [1.0], "b": [2.0]}
+
+
+class TestChunkEmbeddingCache:
+    """Tests for content-addressed chunk embedding cache."""
+    
+    def test_keys_include_model_and_dimensions(self, tmp_path):
+        """Test the same text under another model or size is a miss."""
+        store = SQLiteVectorCache(str(tmp_path / "cache.db"))
+        cache = ChunkEmbeddingCache(model="text-embedding-3-large", dimensions=3072, store=store)
+        cache.set_many(["chunk"], [[0.5, 0.25]])
+        
+        assert cache.get_many(["chunk", "other"]) == [[0.5, 0.25], None]
+        assert ChunkEmbeddingCache("text-embedding-3-small", 1536, store).get_many(["chunk"]) == [None]
+        assert ChunkEmbeddingCache("text-embedding-3-large", 256, store).get_many(["chunk"]) == [None]
+
+
+class TestQueryEmbeddingCache:
+    """Tests for two-tier query embedding cache."""
+    
+    def test_normalized_queries_share_entry(self):
+        """Test queries differing only in case/whitespace hit the same entry."""
+        cache = QueryEmbeddingCache(model="text-embedding-3-large", memory=LRUTTLCache())
+        
+        cache.set("What is  Contexta?", [0.1, 0.2])
+        
+        assert cache.get("  what is contexta? ") == [0.1, 0.2]
+    
+    def test_model_is_part_of_key(self):
+        """Test embeddings from another model are not reused."""
+        memory = LRUTTLCache()
+        QueryEmbeddingCache(model="text-embedding-3-large", memory=memory).set("query", [0.1])
+        
+        cache = QueryEmbeddingCache(model="text-embedding-3-small", memory=memory)
+        
+        assert cache.get("query") is None
+    
+    def test_shared_tier_hits_are_promoted(self, tmp_path):
+        """Test shared-tier hits are counted and copied to memory."""
+        shared = SQLiteVectorCache(str(tmp_path / "cache.db"))
+        QueryEmbeddingCache(model="m", memory=LRUTTLCache(), shared=shared).set("query", [0.5])
+        
+        cache = QueryEmbeddingCache(model="m", memory=LRUTTLCache(), shared=shared)
+        
+        assert cache.get("query") == [0.5]
+        assert cache.get("query") == [0.5]
+        assert cache.get("other") is None
+        
+        stats = cache.stats()
+        assert stats["shared_hits"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+class TestSemanticAnswerCache:
+    """Tests for tenant-scoped semantic answer cache."""
+    
+    def test_similar_query_hits(self):
+        """Test a query above the similarity threshold hits."""
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.store(1, [1.0, 0.0], "v1", "answer")
+        
+        assert cache.lookup(1, [0.95, 0.05], "v1") == "answer"
+        assert cache.lookup(1, [0.0, 1.0], "v1") is None
+    
+    def test_tenants_are_isolated(self):
+        """Test answers are never shared between tenants."""
+        cache = SemanticAnswerCache()
+        cache.store(1, [1.0, 0.0], "v1", "answer")
+        
+        assert cache.lookup(2, [1.0, 0.0], "v1") is None
+    
+    def test_params_must_match(self):
+        """Test answers built with other request parameters are not reused."""
+        cache = SemanticAnswerCache()
+        cache.store(1, [1.0, 0.0], "v1", "top5", params_key="5")
+        cache.store(1, [1.0, 0.0], "v1", "top3", params_key="3")
+        
+        assert cache.lookup(1, [1.0, 0.0], "v1", params_key="3") == "top3"
+    
+    def test_corpus_version_change_invalidates(self):
+        """Test a new corpus version drops the tenant's entries."""
+        cache = SemanticAnswerCache()
+        cache.store(1, [1.0, 0.0], "v1", "answer")
+        
+        assert cache.lookup(1, [1.0, 0.0], "v2") is None
+        assert cache.lookup(1, [1.0, 0.0], "v1") is None
+        assert cache.stats()["invalidations"] == 1
+    
+    def test_evicts_oldest_per_tenant(self):
+        """Test tenants are capped at max_entries_per_tenant."""
+        cache = SemanticAnswerCache(max_entries_per_tenant=2)
+        cache.store(1, [1.0, 0.0, 0.0], "v1", "a")
+        cache.store(1, [0.0, 1.0, 0.0], "v1", "b")
+        cache.store(1, [0.0, 0.0, 1.0], "v1", "c")
+        
+        assert cache.lookup(1, [1.0, 0.0, 0.0], "v1") is None
+        assert cache.lookup(1, [0.0, 0.0, 1.0], "v1") == "c"
+        assert cache.stats()["entries"] == 2
+    
+    def test_evicts_least_recently_used_tenants(self):
+        """Test the total entry count is capped across tenants, evicting the least recently used first."""
+        cache = SemanticAnswerCache(max_entries_per_tenant=2, max_entries=3)
+        cache.store(1, [1.0, 0.0], "v1", "a")
+        cache.store(2, [1.0, 0.0], "v1", "b")
+        cache.store(2, [0.0, 1.0], "v1", "c")
+        assert cache.lookup(1, [1.0, 0.0], "v1") == "a"
+        
+        cache.store(3, [1.0, 0.0], "v1", "d")
+        
+        # Tenant 2 was used least recently: its oldest entry made room
+        assert cache.lookup(2, [1.0, 0.0], "v1") is None
+        assert cache.lookup(2, [0.0, 1.0], "v1") == "c"
+        assert cache.lookup(1, [1.0, 0.0], "v1") == "a"
+        assert cache.stats()["entries"] == 3
+        
+        # Lookups from tenants with nothing cached keep no state
+        cache.lookup(4, [1.0, 0.0], "v1")
+        assert cache.stats()["tenants"] == 3
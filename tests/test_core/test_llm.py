@@ -3,7 +3,7 @@ Tests for LLM abstractions.
 """
 
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from core.llm.openai import OpenAILLM
 
 
@@ -65,6 +65,55 @@ class TestOpenAILLM:
             assert call_args[1]['temperature'] == 0.5
             assert call_args[1]['max_tokens'] == 100
     
+    @pytest.mark.asyncio
+    @patch('core.llm.openai.AsyncOpenAI')
+    @patch('core.llm.openai.OpenAI')
+    async def test_agenerate(self, mock_openai_class, mock_async_openai_class):
+        """Test async text generation uses the async client."""
+        mock_async_client = Mock()
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="Async text"))]
+        mock_async_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_async_openai_class.return_value = mock_async_client
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            llm = OpenAILLM()
+            result = await llm.agenerate("Test prompt", max_tokens=50)
+            
+            assert result == "Async text"
+            call_args = mock_async_client.chat.completions.create.call_args
+            assert call_args[1]['max_tokens'] == 50
+            mock_openai_class.return_value.chat.completions.create.assert_not_called()
+    
+    @pytest.mark.asyncio
+    @patch('core.llm.openai.AsyncOpenAI')
+    @patch('core.llm.openai.OpenAI')
+    async def test_acomplete_reports_cached_tokens(self, mock_openai_class, mock_async_openai_class):
+        """Test chat messages are sent as-is and cached prompt tokens are reported."""
+        mock_async_client = Mock()
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="Answer"))]
+        mock_response.usage = Mock(
+            prompt_tokens=1500,
+            completion_tokens=40,
+            prompt_tokens_details=Mock(cached_tokens=1280)
+        )
+        mock_async_client.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_async_openai_class.return_value = mock_async_client
+        messages = [
+            {"role": "system", "content": "Instruction"},
+            {"role": "user", "content": "Question"}
+        ]
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            llm = OpenAILLM()
+            result = await llm.acomplete(messages)
+            
+            assert result.text == "Answer"
+            assert result.usage.prompt_tokens == 1500
+            assert result.usage.cached_tokens == 1280
+            assert mock_async_client.chat.completions.create.call_args[1]['messages'] == messages
+    
     @patch('core.llm.openai.OpenAI')
     def test_generate_stream(self, mock_openai_class):
         """Test streaming text generation."""
@@ -83,6 +132,43 @@ class TestOpenAILLM:
             
             assert result == ["Hello", " world", "!"]
     
+    @pytest.mark.asyncio
+    @patch('core.llm.openai.AsyncOpenAI')
+    @patch('core.llm.openai.OpenAI')
+    async def test_agenerate_stream_closes_upstream(self, mock_openai_class, mock_async_openai_class):
+        """Test async streaming closes the upstream stream when stopped early."""
+        class FakeStream:
+            def __init__(self, chunks):
+                self._chunks = iter(chunks)
+                self.close = AsyncMock()
+            
+            def __aiter__(self):
+                return self
+            
+            async def __anext__(self):
+                try:
+                    return next(self._chunks)
+                except StopIteration:
+                    raise StopAsyncIteration
+        
+        stream = FakeStream([
+            Mock(choices=[Mock(delta=Mock(content="Hello"))]),
+            Mock(choices=[Mock(delta=Mock(content=" world"))]),
+        ])
+        mock_async_client = Mock()
+        mock_async_client.chat.completions.create = AsyncMock(return_value=stream)
+        mock_async_openai_class.return_value = mock_async_client
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            llm = OpenAILLM()
+            tokens = llm.agenerate_stream("Test prompt")
+            
+            assert await tokens.__anext__() == "Hello"
+            await tokens.aclose()
+            
+            stream.close.assert_awaited_once()
+            assert mock_async_client.chat.completions.create.call_args[1]['stream'] is True
+    
     @patch('core.llm.openai.OpenAI')
     def test_get_model_name(self, mock_openai_class):
         """Test get model name."""
@@ -3,7 +3,9 @@ Tests for prompt builders.
 """
 
 import pytest
+from unittest.mock import patch
 from core.prompts.rag import RAGPromptBuilder
+from core.tokenizer import SimpleTokenizer
 
 
 class TestRAGPromptBuilder:
@@ -108,4 +110,55 @@ class TestRAGPromptBuilder:
         
         assert "Question: Test question" in prompt
         assert "Answer:" in prompt
-
+    
+    def test_build_with_sources_fills_token_budget(self):
+        """Test a chunk that doesn't fit is skipped, not the rest of the context."""
+        builder = RAGPromptBuilder(tokenizer=SimpleTokenizer())
+        
+        context_chunks = [
+            {"text": "Short first chunk.", "document_id": 1, "chunk_index": 0},
+            {"text": "word " * 200, "document_id": 1, "chunk_index": 1},
+            {"text": "Short last chunk.", "document_id": 1, "chunk_index": 2},
+        ]
+        
+        prompt = builder.build_with_sources(
+            question="Test",
+            context_chunks=context_chunks,
+            max_context_tokens=50
+        )
+        
+        assert "Short first chunk." in prompt
+        assert "Chunk 1]" not in prompt
+        assert "Short last chunk." in prompt
+        assert prompt.index("Short first chunk.") < prompt.index("Short last chunk.")
+    
+    def test_build_with_sources_caches_token_counts(self):
+        """Test each chunk is only tokenized once across prompts."""
+        tokenizer = SimpleTokenizer()
+        builder = RAGPromptBuilder(tokenizer=tokenizer)
+        context_chunks = [{"text": "Repeated chunk.", "document_id": 1, "chunk_index": 0}]
+        
+        with patch.object(tokenizer, "count", wraps=tokenizer.count) as mock_count:
+            for _ in range(3):
+                builder.build_with_sources(question="Test", context_chunks=context_chunks, max_context_tokens=100)
+        
+        # One count for the chunk and one for the separator
+        assert mock_count.call_count == 2
+    
+    def test_build_messages_layout(self):
+        """Test messages put the stable parts first and context in document order."""
+        builder = RAGPromptBuilder(system_instruction="Instruction")
+        
+        context_chunks = [
+            {"text": "Later chunk.", "document_id": 1, "chunk_index": 3},
+            {"text": "Earlier chunk.", "document_id": 1, "chunk_index": 0},
+        ]
+        
+        messages = builder.build_messages(question="What is the test?", context_chunks=context_chunks)
+        reordered = builder.build_messages(question="Another question?", context_chunks=context_chunks[::-1])
+        
+        assert messages[0] == {"role": "system", "content": "Instruction"}
+        assert messages[1]["content"].index("Earlier chunk.") < messages[1]["content"].index("Later chunk.")
+        assert messages[2] == {"role": "user", "content": "Question: What is the test?"}
+        # Same chunks, different rank order: identical cacheable prefix
+        assert reordered[:2] == messages[:2]
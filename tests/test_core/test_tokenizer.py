@@ -0,0 +1,97 @@
+"""
+Tests for tokenizers.
+"""
+
+import pytest
+import tiktoken
+from unittest.mock import patch
+from core.tokenizer import SimpleTokenizer, TiktokenTokenizer, get_tokenizer
+
+
+class TestSimpleTokenizer:
+    """Tests for the approximate tokenizer."""
+    
+    def test_round_trip(self):
+        """Test decoding restores the original text."""
+        tokenizer = SimpleTokenizer()
+        text = "Hello,  world!\nTokenization is approximate."
+        
+        assert tokenizer.decode(tokenizer.encode(text)) == text
+    
+    def test_count_matches_encode(self):
+        """Test count agrees with the number of encoded tokens."""
+        tokenizer = SimpleTokenizer()
+        text = "Longer words are split into several pieces."
+        
+        assert tokenizer.count(text) == len(tokenizer.encode(text))
+        assert tokenizer.count("internationalization") == 5
+    
+    def test_offsets(self):
+        """Test token offsets point at each token's text."""
+        tokenizer = SimpleTokenizer()
+        text = "Hello,  world!\nTokenization"
+        
+        offsets = tokenizer.offsets(text)
+        
+        pieces = [text[start:end] for start, end in zip(offsets, offsets[1:] + [len(text)])]
+        assert pieces == [tokenizer.decode([token]) for token in tokenizer.encode(text)]
+
+
+class TestTiktokenTokenizer:
+    """Tests for the tiktoken-backed tokenizer."""
+    
+    def test_offsets_with_split_characters(self):
+        """Test tokens that split a multi-byte character start at that character."""
+        # Byte-level encoding: every byte is its own token
+        encoding = tiktoken.Encoding(
+            name="bytes", pat_str=r"\S+|\s+", mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={}
+        )
+        with patch('core.tokenizer.openai.tiktoken.encoding_for_model', return_value=encoding):
+            tokenizer = TiktokenTokenizer("test")
+        
+        offsets = tokenizer.offsets("aé b")
+        
+        assert offsets == [0, 1, 1, 2, 3]
+
+
+class TestGetTokenizer:
+    """Tests for tokenizer loading."""
+    
+    @pytest.fixture(autouse=True)
+    def reset_cache(self):
+        """Forget loaded tokenizers and failures around each test."""
+        from core.tokenizer import openai
+        
+        openai._tokenizers.clear()
+        openai._failures.clear()
+        yield
+        openai._tokenizers.clear()
+        openai._failures.clear()
+    
+    def test_falls_back_when_encoding_unavailable(self):
+        """Test a tokenizer is still returned when tiktoken can't load."""
+        with patch('core.tokenizer.openai.tiktoken.encoding_for_model', side_effect=OSError("offline")):
+            tokenizer = get_tokenizer("gpt-4o-mini")
+        
+        assert isinstance(tokenizer, SimpleTokenizer)
+    
+    def test_retries_after_failure_and_caches_success(self):
+        """Test a failed load is retried after the interval and only the tiktoken tokenizer is cached."""
+        encoding = tiktoken.Encoding(
+            name="bytes", pat_str=r"\S+|\s+", mergeable_ranks={bytes([i]): i for i in range(256)}, special_tokens={}
+        )
+        with patch('core.tokenizer.openai.time.monotonic', return_value=1000.0), \
+                patch('core.tokenizer.openai.tiktoken.encoding_for_model', side_effect=OSError("offline")):
+            assert isinstance(get_tokenizer("gpt-4o-mini"), SimpleTokenizer)
+        
+        with patch('core.tokenizer.openai.tiktoken.encoding_for_model', return_value=encoding) as load:
+            # Within the retry interval the load isn't attempted again
+            with patch('core.tokenizer.openai.time.monotonic', return_value=1010.0):
+                assert isinstance(get_tokenizer("gpt-4o-mini"), SimpleTokenizer)
+            load.assert_not_called()
+            
+            with patch('core.tokenizer.openai.time.monotonic', return_value=1061.0):
+                tokenizer = get_tokenizer("gpt-4o-mini")
+            assert isinstance(tokenizer, TiktokenTokenizer)
+            assert get_tokenizer("gpt-4o-mini") is tokenizer
+            assert load.call_count == 1
@@ -0,0 +1,98 @@
+"""
+Tests for bulk ingestion.
+"""
+
+import io
+import tarfile
+import zipfile
+import pytest
+from unittest.mock import patch
+from ingest.batch import document_id_for, ingest_batch, iter_sources
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """A directory with text files, a zip and a tar.gz archive."""
+    docs = tmp_path / "docs"
+    (docs / "sub").mkdir(parents=True)
+    (docs / "a.txt").write_text("alpha")
+    (docs / "sub" / "b.txt").write_text("beta")
+    (docs / "image.png").write_bytes(b"\x89PNG")
+    
+    with zipfile.ZipFile(tmp_path / "more.zip", "w") as archive:
+        archive.writestr("c.txt", "gamma")
+        archive.writestr("folder/", "")
+    
+    with tarfile.open(tmp_path / "more.tar.gz", "w:gz") as archive:
+        data = "delta".encode("utf-8")
+        info = tarfile.TarInfo("d.txt")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+    return tmp_path
+
+
+class TestIterSources:
+    """Tests for expanding batch inputs."""
+    
+    def test_expands_directories_and_archives(self, corpus):
+        """Test directories are walked and archive members are read in memory."""
+        sources = list(iter_sources([
+            str(corpus / "docs"), str(corpus / "more.zip"), str(corpus / "more.tar.gz")
+        ]))
+        
+        names = [s.name for s in sources]
+        assert names == [
+            f"{corpus}/docs/a.txt",
+            f"{corpus}/docs/image.png",
+            f"{corpus}/docs/sub/b.txt",
+            f"{corpus}/more.zip/c.txt",
+            f"{corpus}/more.tar.gz/d.txt",
+        ]
+        assert sources[3].data == b"gamma" and sources[3].path is None
+        assert sources[4].data == b"delta"
+    
+    def test_unreadable_archive_is_reported(self, tmp_path):
+        """Test a corrupt archive becomes an error entry instead of failing the batch."""
+        (tmp_path / "broken.zip").write_bytes(b"not a zip")
+        
+        (source,) = iter_sources([str(tmp_path / "broken.zip")])
+        
+        assert "Could not read archive" in source.error
+
+
+class TestIngestBatch:
+    """Tests for bulk ingestion."""
+    
+    @patch('ingest.batch._bump_corpus_version')
+    @patch('ingest.batch.ingest_pages')
+    def test_reports_per_file_status(self, mock_ingest, mock_bump, corpus):
+        """Test each file gets a status and throughput is reported."""
+        def ingest(document_id, pages, metadata, tenant_id, embed, bump_version):
+            text = "".join(pages)
+            if text == "beta":
+                raise ValueError("broken")
+            return {"chunks": len(text), "new": len(text), "duplicates": 0, "changed": True}
+        mock_ingest.side_effect = ingest
+        
+        result = ingest_batch([str(corpus / "docs"), str(corpus / "more.zip"), str(corpus / "missing.txt")], 7)
+        
+        statuses = {f["source"].rsplit("/", 1)[-1]: f["status"] for f in result["files"]}
+        assert statuses == {
+            "a.txt": "completed", "image.png": "skipped", "b.txt": "failed",
+            "c.txt": "completed", "missing.txt": "failed",
+        }
+        assert result["completed"] == 2
+        assert result["chunks"] == len("alpha") + len("gamma")
+        assert result["docs_per_second"] > 0
+        # Documents share one embedding batcher and the version is bumped once
+        batchers = {id(c[1]["embed"]) for c in mock_ingest.call_args_list}
+        assert len(batchers) == 1
+        assert all(c[1]["bump_version"] is False for c in mock_ingest.call_args_list)
+        mock_bump.assert_called_once_with(7)
+    
+    def test_document_ids_are_stable(self):
+        """Test the same source maps to the same document for a tenant."""
+        assert document_id_for("docs/a.txt", 1) == document_id_for("docs/a.txt", 1)
+        assert document_id_for("docs/a.txt", 1) != document_id_for("docs/a.txt", 2)
+        # Outside Django's (positive) document ID space
+        assert -2 ** 53 <= document_id_for("docs/a.txt", 1) < 0
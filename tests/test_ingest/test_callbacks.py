@@ -0,0 +1,168 @@
+"""
+Tests for callback delivery.
+"""
+
+import json
+import time
+import httpx
+import pytest
+from ingest.callbacks import CallbackSender, DeadLetterStore
+
+
+@pytest.fixture
+def dead_letters(tmp_path):
+    """Dead-letter store in a temporary database."""
+    return DeadLetterStore(str(tmp_path / "dead_letters.db"))
+
+
+def _sender(dead_letters, handler, **kwargs):
+    """Build a sender whose requests are answered by handler."""
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    options = {"coalesce_delay": 0.05, "retry_delay": 0.01, "max_retry_delay": 0.02}
+    options.update(kwargs)
+    return CallbackSender(dead_letters, client=client, **options)
+
+
+class TestCallbackSender:
+    """Tests for the background callback sender."""
+    
+    def test_delivers_single_callback(self, dead_letters):
+        """Test a lone callback is posted to its own URL."""
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200)
+        
+        sender = _sender(dead_letters, handler, batch_path="/batch/")
+        sender.send("http://django/api/documents/1/ingest-callback/", {"document_id": 1, "status": "completed"})
+        sender.close()
+        
+        assert len(requests) == 1
+        assert requests[0].url.path == "/api/documents/1/ingest-callback/"
+        assert json.loads(requests[0].content) == {"document_id": 1, "status": "completed"}
+    
+    def test_coalesces_callbacks_to_same_host(self, dead_letters):
+        """Test callbacks to one host within the delay go out as one batch."""
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            if request.url.path == "/batch/":
+                updates = json.loads(request.content)["updates"]
+                return httpx.Response(200, json={"results": {u["document_id"]: "ok" for u in updates}})
+            return httpx.Response(200)
+        
+        sender = _sender(dead_letters, handler, batch_path="/batch/", coalesce_delay=0.5)
+        for document_id in range(3):
+            sender.send(f"http://django/docs/{document_id}/", {"document_id": document_id, "status": "completed"})
+        sender.send("http://other/docs/9/", {"document_id": 9, "status": "failed"})
+        sender.close()
+        
+        by_host = {request.url.host: request for request in requests}
+        assert len(requests) == 2
+        assert by_host["django"].url.path == "/batch/"
+        assert [u["document_id"] for u in json.loads(by_host["django"].content)["updates"]] == [0, 1, 2]
+        assert by_host["other"].url.path == "/docs/9/"
+    
+    def test_falls_back_without_batch_endpoint(self, dead_letters):
+        """Test callbacks are sent one by one when the batch endpoint is missing."""
+        paths = []
+        
+        def handler(request):
+            paths.append(request.url.path)
+            return httpx.Response(404 if request.url.path == "/batch/" else 200)
+        
+        sender = _sender(dead_letters, handler, batch_path="/batch/", coalesce_delay=0.5)
+        sender.send("http://django/docs/1/", {"document_id": 1})
+        sender.send("http://django/docs/2/", {"document_id": 2})
+        sender.close()
+        
+        assert sorted(paths) == ["/batch/", "/docs/1/", "/docs/2/"]
+        assert dead_letters.count() == 0
+    
+    def test_batch_results_are_checked_per_update(self, dead_letters):
+        """Test updates the batch response doesn't report as applied are retried or dead-lettered."""
+        paths = []
+        
+        def handler(request):
+            paths.append(request.url.path)
+            if request.url.path == "/batch/":
+                # Document 3 is missing from the results, so it is sent again
+                return httpx.Response(200, json={"results": {"1": "ok", "2": "not_found"}})
+            return httpx.Response(200)
+        
+        sender = _sender(dead_letters, handler, batch_path="/batch/", coalesce_delay=0.2)
+        for document_id in (1, 2, 3):
+            sender.send(f"http://django/docs/{document_id}/", {"document_id": document_id, "status": "completed"})
+        deadline = time.time() + 5
+        while len(paths) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        sender.close()
+        
+        assert paths == ["/batch/", "/docs/3/"]
+        assert [c.payload["document_id"] for c in dead_letters.take()] == [2]
+    
+    def test_falls_back_when_batch_reports_no_results(self, dead_letters):
+        """Test a batch response without per-update results is not taken as delivered."""
+        paths = []
+        
+        def handler(request):
+            paths.append(request.url.path)
+            return httpx.Response(200)
+        
+        sender = _sender(dead_letters, handler, batch_path="/batch/", coalesce_delay=0.5)
+        sender.send("http://django/docs/1/", {"document_id": 1})
+        sender.send("http://django/docs/2/", {"document_id": 2})
+        sender.close()
+        
+        assert sorted(paths) == ["/batch/", "/docs/1/", "/docs/2/"]
+        assert dead_letters.count() == 0
+    
+    def test_retries_then_dead_letters(self, dead_letters):
+        """Test unavailable receivers are retried, then the callback is stored."""
+        attempts = []
+        
+        def handler(request):
+            attempts.append(request)
+            raise httpx.ConnectError("refused", request=request)
+        
+        sender = _sender(dead_letters, handler, max_attempts=3)
+        sender.send("http://django/docs/1/", {"document_id": 1})
+        # Let the retries run before shutting down
+        deadline = time.time() + 5
+        while dead_letters.count() == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        sender.close()
+        
+        assert len(attempts) == 3
+        callbacks = dead_letters.take()
+        assert [c.payload for c in callbacks] == [{"document_id": 1}]
+        assert dead_letters.count() == 0
+    
+    def test_rejected_callback_is_not_retried(self, dead_letters):
+        """Test client errors go straight to the dead-letter store."""
+        attempts = []
+        
+        def handler(request):
+            attempts.append(request)
+            return httpx.Response(400)
+        
+        sender = _sender(dead_letters, handler)
+        sender.send("http://django/docs/1/", {"document_id": 1})
+        sender.close()
+        
+        assert len(attempts) == 1
+        assert dead_letters.count() == 1
+    
+    def test_close_stores_callbacks_waiting_for_retry(self, dead_letters):
+        """Test shutdown makes one last attempt and keeps what still fails."""
+        def handler(request):
+            return httpx.Response(503)
+        
+        sender = _sender(dead_letters, handler, coalesce_delay=0.0, retry_delay=60, max_retry_delay=60)
+        sender.send("http://django/docs/1/", {"document_id": 1})
+        time.sleep(0.1)
+        sender.close()
+        
+        assert dead_letters.count() == 1
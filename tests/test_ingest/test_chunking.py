@@ -3,7 +3,12 @@ Tests for chunking strategies.
 """
 
 import pytest
-from ingest.chunking.semantic import semantic_chunk
+from unittest.mock import MagicMock, patch
+from core.tokenizer import SimpleTokenizer
+from ingest.chunking.similarity import SimilarityChunker, iter_similarity_chunks
+from ingest.chunking.structure import StructureChunker, _heading
+from ingest.chunking.token import TokenChunker, iter_token_chunks
+from ingest.chunking.semantic import SemanticChunker, iter_semantic_chunks, semantic_chunk
 
 
 class TestSemanticChunking:
@@ -54,3 +59,280 @@ class TestSemanticChunking:
         assert len(chunks) == 1
         assert chunks[0] == ""
 
+
+class TestStreamingChunking:
+    """Tests for chunking a stream of pages."""
+    
+    def test_matches_joined_text(self):
+        """Test streaming chunks equal chunking the joined pages."""
+        pages = [" ".join(f"p{p}w{i}" for i in range(37)) for p in range(5)]
+        
+        chunks = list(iter_semantic_chunks(pages, max_tokens=20, overlap=5))
+        
+        assert chunks == semantic_chunk("\n".join(pages), max_tokens=20, overlap=5)
+    
+    def test_invalid_overlap(self):
+        """Test an overlap that never advances is rejected."""
+        with pytest.raises(ValueError, match="overlap"):
+            list(iter_semantic_chunks(["text"], max_tokens=10, overlap=10))
+
+
+class TestSemanticChunker:
+    """Tests for the offset-based chunker."""
+    
+    def test_chunks_are_slices(self):
+        """Test chunk texts are the original text at their offsets."""
+        text = "Alpha beta,\n\tgamma   delta.\n\nEpsilon zeta eta theta iota kappa"
+        
+        chunks = list(SemanticChunker().iter_chunks(text, 1, 2, {"title": "t"}, chunk_size=4, chunk_overlap=1))
+        
+        assert [c.text for c in chunks] == [
+            "Alpha beta,\n\tgamma   delta.",
+            "delta.\n\nEpsilon zeta eta",
+            "eta theta iota kappa",
+        ]
+        for chunk in chunks:
+            assert text[chunk.start_index:chunk.end_index] == chunk.text
+        assert [c.chunk_id for c in chunks] == ["1-0", "1-1", "1-2"]
+        assert chunks[0].tenant_id == 2
+        assert chunks[0].metadata == {"title": "t"}
+    
+    def test_no_trailing_overlap_chunk(self):
+        """Test a text ending on a chunk boundary gets no extra overlap-only chunk."""
+        text = " ".join(f"w{i}" for i in range(90))
+        
+        chunks = semantic_chunk(text, max_tokens=50, overlap=10)
+        
+        assert [len(c.split()) for c in chunks] == [50, 50]
+    
+    def test_is_lazy(self):
+        """Test chunks are produced without scanning the whole text."""
+        chunks = SemanticChunker().iter_chunks("word " * 100000, 1, 1, {}, chunk_size=10, chunk_overlap=2)
+        
+        first = next(chunks)
+        
+        assert first.start_index == 0
+        assert first.end_index == len("word " * 10) - 1
+    
+    @pytest.mark.asyncio
+    async def test_chunk(self):
+        """Test the Chunker interface returns every chunk."""
+        text = "word " * 25
+        
+        chunks = await SemanticChunker().chunk(text, 1, 1, {}, chunk_size=10, chunk_overlap=0)
+        
+        assert [c.text for c in chunks] == semantic_chunk(text, max_tokens=10, overlap=0)
+    
+    def test_invalid_overlap(self):
+        """Test an overlap that never advances is rejected."""
+        with pytest.raises(ValueError, match="chunk_overlap"):
+            list(SemanticChunker().iter_chunks("text", 1, 1, {}, chunk_size=10, chunk_overlap=10))
+
+
+class TestTokenChunker:
+    """Tests for token-based chunking."""
+    
+    TEXT = " ".join(f"Sentence number {i} is short." for i in range(40))
+    
+    def test_chunks_fit_token_budget(self):
+        """Test chunks never exceed max tokens and end at sentence ends."""
+        tokenizer = SimpleTokenizer()
+        
+        chunks = list(TokenChunker(tokenizer).iter_chunks(self.TEXT, 1, 1, {}, chunk_size=50, chunk_overlap=0))
+        
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert tokenizer.count(chunk.text) <= 50
+            assert chunk.text.endswith("short.")
+            assert self.TEXT[chunk.start_index:chunk.end_index] == chunk.text
+        assert " ".join(chunk.text for chunk in chunks) == self.TEXT
+    
+    def test_overlap_starts_at_sentence(self):
+        """Test the overlap is moved to the start of a sentence."""
+        chunks = list(iter_token_chunks([self.TEXT], max_tokens=50, overlap=20, tokenizer=SimpleTokenizer()))
+        
+        assert all(chunk.startswith("Sentence") for chunk in chunks)
+        first_sentence = chunks[1].split(". ")[0]
+        assert f"{first_sentence}. " in chunks[0]
+    
+    def test_cuts_long_sentences_on_token_boundary(self):
+        """Test text without sentence ends is cut at max tokens."""
+        tokenizer = SimpleTokenizer()
+        text = "word " * 100
+        
+        chunks = list(iter_token_chunks([text], max_tokens=30, overlap=0, tokenizer=tokenizer))
+        
+        assert [tokenizer.count(chunk) for chunk in chunks] == [30, 30, 30, 10]
+    
+    def test_pages_match_joined_text(self, monkeypatch):
+        """Test pages and segmented encoding give the chunks of the joined text."""
+        tokenizer = SimpleTokenizer()
+        pages = [self.TEXT[:500], self.TEXT[500:]]
+        expected = list(iter_token_chunks(["\n".join(pages)], max_tokens=40, overlap=10, tokenizer=tokenizer))
+        
+        monkeypatch.setattr("ingest.chunking.token._SEGMENT_CHARS", 100)
+        chunks = list(iter_token_chunks(pages, max_tokens=40, overlap=10, tokenizer=tokenizer))
+        
+        assert chunks == expected
+    
+    def test_encodes_once(self):
+        """Test each part of the text is tokenized only once."""
+        tokenizer = SimpleTokenizer()
+        with patch.object(tokenizer, "offsets", wraps=tokenizer.offsets) as mock_offsets:
+            list(iter_token_chunks([self.TEXT], max_tokens=20, overlap=5, tokenizer=tokenizer))
+        
+        mock_offsets.assert_called_once_with(self.TEXT)
+    
+    def test_short_and_empty_text(self):
+        """Test short text gives one chunk and empty text none."""
+        tokenizer = SimpleTokenizer()
+        
+        assert list(iter_token_chunks(["  A short text.  "], tokenizer=tokenizer)) == ["A short text."]
+        assert list(iter_token_chunks(["", "  "], tokenizer=tokenizer)) == []
+
+
+TOPICS = {"cat": [1.0, 0.0, 0.0], "car": [0.0, 1.0, 0.0], "sea": [0.0, 0.0, 1.0]}
+
+
+def fake_embed(texts):
+    """Embed each sentence as the vector of its topic (its second word)."""
+    return [TOPICS[text.split()[1]] for text in texts]
+
+
+@pytest.fixture
+def no_cache():
+    """Disable the chunk embedding cache."""
+    with patch('ingest.embeddings.cache._get_cache', return_value=None):
+        yield
+
+
+class TestSimilarityChunker:
+    """Tests for embedding-similarity chunking."""
+    
+    TEXT = " ".join(
+        [f"The cat sat {i}." for i in range(4)]
+        + [f"The car sped {i}." for i in range(4)]
+        + [f"The sea rose {i}." for i in range(4)]
+    )
+    
+    def test_cuts_at_topic_shifts(self, no_cache):
+        """Test chunks end where consecutive sentences diverge."""
+        chunker = SimilarityChunker(SimpleTokenizer(), fake_embed, min_tokens=5, percentile=80)
+        
+        chunks = list(chunker.iter_chunks(self.TEXT, 1, 1, {}, chunk_size=200))
+        
+        assert [c.text.split()[1] for c in chunks] == ["cat", "car", "sea"]
+        assert chunks[1].text == "The car sped 0. The car sped 1. The car sped 2. The car sped 3."
+        for chunk in chunks:
+            assert self.TEXT[chunk.start_index:chunk.end_index] == chunk.text
+    
+    def test_min_and_max_tokens(self, no_cache):
+        """Test small topics are merged and large ones are split."""
+        tokenizer = SimpleTokenizer()
+        
+        merged = list(iter_similarity_chunks(
+            [self.TEXT], max_tokens=200, min_tokens=100, percentile=80, tokenizer=tokenizer, embed=fake_embed
+        ))
+        split = list(iter_similarity_chunks(
+            [self.TEXT], max_tokens=12, min_tokens=5, percentile=80, tokenizer=tokenizer, embed=fake_embed
+        ))
+        
+        assert merged == [self.TEXT]
+        assert len(split) > 3
+        assert all(tokenizer.count(chunk) <= 12 for chunk in split)
+    
+    def test_windows_and_pages(self, no_cache):
+        """Test sentences are embedded per window and pages join like one text."""
+        embed = MagicMock(side_effect=fake_embed)
+        pages = [self.TEXT[:40], self.TEXT[40:]]
+        
+        chunks = list(iter_similarity_chunks(
+            pages, min_tokens=5, percentile=80, tokenizer=SimpleTokenizer(), embed=embed, window=5
+        ))
+        
+        assert [len(call.args[0]) for call in embed.call_args_list] == [5, 5, 2]
+        assert [c.split()[1] for c in chunks] == ["cat", "car", "sea"]
+    
+    def test_reuses_cached_sentence_embeddings(self):
+        """Test sentence embeddings go through the chunk embedding cache."""
+        with patch('ingest.chunking.similarity.embed_chunks') as mock_embed:
+            mock_embed.side_effect = lambda texts, embed=None: (fake_embed(texts), {})
+            list(iter_similarity_chunks([self.TEXT], tokenizer=SimpleTokenizer()))
+        
+        mock_embed.assert_called_once()
+        assert mock_embed.call_args.args[0][0] == "The cat sat 0."
+
+
+class TestStructureChunker:
+    """Tests for structure-aware chunking."""
+    
+    PAGES = [
+        "# Introduction\n\nFirst paragraph.\n\nSecond paragraph.\n\n2.1 Methods\nWe measured things.",
+        "The end of the methods.\n\nRESULTS\n\n" + "It worked well. " * 20,
+    ]
+    
+    def chunks(self, **kwargs):
+        chunker = StructureChunker(SimpleTokenizer())
+        return list(chunker.iter_page_chunks(self.PAGES, 1, 1, {"title": "t"}, **kwargs))
+    
+    def test_respects_pages_and_sections(self):
+        """Test chunks never span a page or a heading and record where they come from."""
+        chunks = self.chunks(chunk_size=200, chunk_overlap=0)
+        
+        assert [(c.metadata["page"], c.metadata["section"]) for c in chunks] == [
+            (1, "Introduction"), (1, "2.1 Methods"), (2, "2.1 Methods"), (2, "RESULTS"),
+        ]
+        assert chunks[0].text == "# Introduction\n\nFirst paragraph.\n\nSecond paragraph."
+        assert chunks[0].metadata["title"] == "t"
+        document = "\n".join(self.PAGES)
+        for chunk in chunks:
+            assert document[chunk.start_index:chunk.end_index] == chunk.text
+    
+    def test_packs_and_splits_paragraphs(self):
+        """Test small paragraphs share a chunk and large ones are split with their heading."""
+        tokenizer = SimpleTokenizer()
+        
+        chunks = self.chunks(chunk_size=30, chunk_overlap=0)
+        
+        results = [c for c in chunks if c.metadata["section"] == "RESULTS"]
+        assert len(results) > 1
+        assert results[0].text.startswith("RESULTS\n\nIt worked well.")
+        assert all(tokenizer.count(c.text) <= 30 for c in chunks)
+    
+    def test_headings(self):
+        """Test heading detection."""
+        assert _heading("## Setup ##\nbody") == "Setup"
+        assert _heading("3.2 Evaluation") == "3.2 Evaluation"
+        assert _heading("1. Buy milk\n2. Buy eggs") is None
+        assert _heading("SUMMARY OF FINDINGS") == "SUMMARY OF FINDINGS"
+        assert _heading("A normal sentence.") is None
+    
+    def test_form_feed_pages(self):
+        """Test the Chunker interface reads form feeds as page breaks."""
+        content = "\f".join(self.PAGES)
+        
+        chunks = list(StructureChunker(SimpleTokenizer()).iter_chunks(content, 1, 1, {}, chunk_size=200))
+        
+        assert [c.metadata["page"] for c in chunks] == [1, 1, 2, 2]
+        assert all(content[c.start_index:c.end_index] == c.text for c in chunks)
+    
+    def test_pages_without_blank_lines(self):
+        """Test PDF-extracted pages, whose lines are joined by single newlines, still split at headings and lines."""
+        # What pypdf's extract_text returns for a page of wrapped lines
+        page = (
+            "1 Introduction\nRetrieval quality depends on how documents\nare split into chunks.\n"
+            "SHOPPING LIST\n1. Buy milk\n2. Buy eggs\n"
+            "2 Methods\nWe measured recall on ten\nthousand queries.\n"
+        )
+        
+        chunker = StructureChunker(SimpleTokenizer())
+        
+        chunks = list(chunker.iter_page_chunks([page], 1, 1, {}, chunk_size=20, chunk_overlap=0))
+        
+        assert [c.metadata["section"] for c in chunks] == [
+            "1 Introduction", "1 Introduction", "SHOPPING LIST", "2 Methods",
+        ]
+        assert chunks[1].text == "are split into chunks."
+        assert chunks[2].text == "SHOPPING LIST\n1. Buy milk\n2. Buy eggs"
+        assert all(SimpleTokenizer().count(c.text) <= 20 for c in chunks)
+        assert all(page[c.start_index:c.end_index] == c.text for c in chunks)
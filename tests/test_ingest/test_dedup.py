@@ -0,0 +1,122 @@
+"""
+Tests for near-duplicate chunk suppression.
+"""
+
+import pytest
+from ingest.dedup import MinHasher, NearDuplicateIndex, Reference
+
+
+def _text(seed, words=120):
+    """Build a text of distinct words (different seeds share no shingles)."""
+    return " ".join(f"w{seed}x{i}" for i in range(words))
+
+
+def _reference(point_id, document_id, canonical_id, text=None, text_bytes=None, tokens=25):
+    """Build a reference whose signature is that of its text."""
+    text = text if text is not None else "x" * (text_bytes or 100)
+    return Reference(
+        point_id=point_id, document_id=document_id, chunk_index=0, canonical_id=canonical_id, similarity=1.0,
+        text=text, tokens=tokens, payload={"title": f"doc {document_id}"},
+        signature=MinHasher(min_words=1).signature(text + " padding"),
+    )
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Near-duplicate index in a temporary database."""
+    index = NearDuplicateIndex(str(tmp_path / "dedup.db"), threshold=0.9, min_words=20)
+    yield index
+    index.close()
+
+
+class TestMinHasher:
+    """Tests for MinHash signatures."""
+    
+    def test_signature_estimates_similarity(self):
+        """Test signatures agree on about the Jaccard similarity of the shingles."""
+        hasher = MinHasher(num_perm=256)
+        base = _text(1)
+        
+        same = hasher.signature(base.upper())
+        edited = hasher.signature(base.rsplit(" ", 1)[0] + " changed")
+        other = hasher.signature(_text(2))
+        
+        signature = hasher.signature(base)
+        assert (signature == same).all()
+        assert (signature == edited).mean() > 0.9
+        assert (signature == other).mean() < 0.1
+    
+    def test_short_texts_have_no_signature(self):
+        """Test texts below the word minimum are never deduplicated."""
+        assert MinHasher(min_words=20).signature("Page 1 of 10") is None
+
+
+class TestNearDuplicateIndex:
+    """Tests for the per-tenant LSH index."""
+    
+    def test_finds_near_duplicates_of_other_documents(self, index):
+        """Test a near-duplicate of another document's chunk is found, dissimilar text is not."""
+        index.add(1, 10, ["p1", "p2"], index.signatures([_text(1), _text(2)]))
+        
+        edited = _text(1).rsplit(" ", 1)[0] + " changed"
+        matches = index.find(1, 20, index.signatures([edited, _text(3), "too short"]))
+        
+        assert matches[0][0] == "p1"
+        assert matches[0][1] >= 0.9
+        assert matches[1:] == [None, None]
+    
+    def test_ignores_own_document_and_other_tenants(self, index):
+        """Test chunks only match chunks of other documents of the same tenant."""
+        index.add(1, 10, ["p1"], index.signatures([_text(1)]))
+        
+        assert index.find(1, 10, index.signatures([_text(1)])) == [None]
+        assert index.find(2, 20, index.signatures([_text(1)])) == [None]
+    
+    def test_removing_canonical_orphans_references(self, index):
+        """Test deleting a document drops references to its chunks and reports who held them."""
+        index.add(1, 10, ["p1"], index.signatures([_text(1)]))
+        index.add_references(1, [_reference("r1", 20, "p1"), _reference("r2", 30, "p1")])
+        
+        assert index.remove_document(1, 10) == [20, 30]
+        assert index.find(1, 40, index.signatures([_text(1)])) == [None]
+        assert index.report(1)["references"] == 0
+    
+    def test_report(self, index):
+        """Test the report sums the bytes and tokens saved per tenant."""
+        index.add_references(1, [
+            _reference("r1", 20, "p1", text_bytes=100),
+            _reference("r2", 20, "p2", text_bytes=50, tokens=10),
+        ])
+        index.add_references(2, [_reference("r3", 30, "p3", text_bytes=70, tokens=15)])
+        
+        report = index.report(1, dimensions=4)
+        
+        assert report["references"] == 2
+        assert report["documents"] == 1
+        assert report["text_bytes_saved"] == 150
+        assert report["vector_bytes_saved"] == 2 * 4 * 4
+        assert report["bytes_saved"] == 150 + 32
+        assert report["tokens_saved"] == 35
+        assert index.report(dimensions=4)["references"] == 3
+        assert index.clear_references(1, 20) == {"r1": "p1", "r2": "p2"}
+        assert index.report(1)["references"] == 0
+    
+    def test_plan_promotion(self, index):
+        """Test one reference replaces a deleted point and similar ones from other documents refer to it."""
+        edited = _text(1).rsplit(" ", 1)[0] + " changed"
+        references = [
+            _reference("r1", 20, "p1", _text(1)),
+            _reference("r2", 30, "p1", edited),
+            _reference("r3", 30, "p1", _text(1)),
+            _reference("r4", 40, "p1", _text(2)),
+        ]
+        
+        promoted, repointed = index.plan_promotion(references)
+        
+        # r3 can't refer to r2 (same document) but refers to r1; r4 is similar to neither
+        assert [r.point_id for r in promoted] == ["r1", "r4"]
+        assert {point_id: canonical for point_id, (canonical, _) in repointed.items()} == {"r2": "r1", "r3": "r1"}
+        index.add_references(1, references)
+        index.promote(1, promoted, repointed)
+        assert [r.point_id for r in index.references_to(["r1"])] == ["r2", "r3"]
+        assert index.find(1, 50, index.signatures([_text(1)]))[0][0] == "r1"
@@ -2,9 +2,25 @@
 Tests for embedding generators.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 import pytest
-from unittest.mock import Mock, patch
-from ingest.embeddings.openai import embed_texts
+from openai import RateLimitError
+from unittest.mock import AsyncMock, Mock, patch
+from ingest.embeddings.openai import aembed_texts, embed_texts
+from ingest.embeddings.batcher import EmbeddingBatcher
+from ingest.embeddings.cache import embed_chunks
+from core.cache import ChunkEmbeddingCache, SQLiteVectorCache
+
+
+def _fake_embeddings(model, input):
+    """Embeddings whose single value encodes the input text, to check ordering."""
+    return Mock(data=[Mock(embedding=[float(text.split()[-1])]) for text in input])
+
+
+def _rate_limit_error():
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    return RateLimitError("Rate limited", response=httpx.Response(429, request=request), body=None)
 
 
 class TestOpenAIEmbeddings:
@@ -24,8 +40,8 @@ class TestOpenAIEmbeddings:
         mock_client.embeddings.create.return_value = mock_response
         mock_openai_class.return_value = mock_client
         
-        # Patch the module-level client
-        with patch('ingest.embeddings.openai.client', mock_client):
+        # Patch the lazily created client
+        with patch('ingest.embeddings.openai._get_client', return_value=mock_client):
             texts = ["text 1", "text 2"]
             embeddings = embed_texts(texts)
             
@@ -48,9 +64,138 @@ class TestOpenAIEmbeddings:
         mock_client.embeddings.create.return_value = mock_response
         mock_openai_class.return_value = mock_client
         
-        with patch('ingest.embeddings.openai.client', mock_client):
-            with patch('ingest.embeddings.openai.EMBEDDING_MODEL', 'text-embedding-3-small'):
-                embeddings = embed_texts(["test"])
-                
-                assert len(embeddings) == 1
+        with patch('ingest.embeddings.openai._get_client', return_value=mock_client):
+            embeddings = embed_texts(["test"])
+            
+            assert len(embeddings) == 1
+            call_args = mock_client.embeddings.create.call_args
+            assert call_args[1]['model'] == 'text-embedding-3-small'
+    
+    @pytest.mark.asyncio
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key', 'OPENAI_EMBEDDING_MODEL': 'text-embedding-3-large'})
+    async def test_aembed_texts(self):
+        """Test async embedding generation uses the async client."""
+        mock_client = Mock()
+        mock_response = Mock()
+        mock_response.data = [Mock(embedding=[0.1] * 3072)]
+        mock_client.embeddings.create = AsyncMock(return_value=mock_response)
+        
+        with patch('ingest.embeddings.openai._get_async_client', return_value=mock_client):
+            embeddings = await aembed_texts(["query"])
+            
+            assert len(embeddings) == 1
+            mock_client.embeddings.create.assert_awaited_once_with(
+                model="text-embedding-3-large",
+                input=["query"]
+            )
+    
+    @patch('ingest.embeddings.openai.EMBEDDING_BATCH_SIZE', 3)
+    @patch('ingest.embeddings.openai.EMBEDDING_BATCH_MAX_TOKENS', 1000)
+    @patch('ingest.embeddings.openai._count_tokens', return_value=1)
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    def test_embed_texts_batches_by_count(self, mock_count):
+        """Test large inputs are split into batches and reassembled in order."""
+        mock_client = Mock()
+        mock_client.embeddings.create.side_effect = _fake_embeddings
+        
+        with patch('ingest.embeddings.openai._get_client', return_value=mock_client):
+            embeddings = embed_texts([f"text {i}" for i in range(8)])
+        
+        assert embeddings == [[float(i)] for i in range(8)]
+        batch_sizes = sorted(len(c[1]['input']) for c in mock_client.embeddings.create.call_args_list)
+        assert batch_sizes == [2, 3, 3]
+    
+    @patch('ingest.embeddings.openai.EMBEDDING_BATCH_MAX_TOKENS', 10)
+    @patch('ingest.embeddings.openai._count_tokens', side_effect=lambda text, model: 4)
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    def test_embed_texts_batches_by_tokens(self, mock_count):
+        """Test batches stay within the token limit."""
+        mock_client = Mock()
+        mock_client.embeddings.create.side_effect = _fake_embeddings
+        
+        with patch('ingest.embeddings.openai._get_client', return_value=mock_client):
+            embeddings = embed_texts([f"text {i}" for i in range(5)])
+        
+        assert embeddings == [[float(i)] for i in range(5)]
+        # 4 tokens each, 10 per request: two texts per batch
+        assert mock_client.embeddings.create.call_count == 3
+    
+    @patch('ingest.embeddings.openai.EMBEDDING_BATCH_SIZE', 2)
+    @patch('ingest.embeddings.openai.EMBEDDING_RETRY_DELAY', 0)
+    @patch('ingest.embeddings.openai._count_tokens', return_value=1)
+    @pytest.mark.asyncio
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    async def test_aembed_texts_retries_failed_batch(self, mock_count):
+        """Test only the failed batch is retried."""
+        calls = []
+        
+        async def create(model, input):
+            calls.append(list(input))
+            if input == ["text 2", "text 3"] and calls.count(list(input)) == 1:
+                raise _rate_limit_error()
+            return _fake_embeddings(model, input)
+        
+        mock_client = Mock()
+        mock_client.embeddings.create = create
+        
+        with patch('ingest.embeddings.openai._get_async_client', return_value=mock_client):
+            embeddings = await aembed_texts([f"text {i}" for i in range(4)])
+        
+        assert embeddings == [[float(i)] for i in range(4)]
+        assert calls.count(["text 0", "text 1"]) == 1
+        assert calls.count(["text 2", "text 3"]) == 2
+
 
+class TestEmbedChunks:
+    """Tests for cached chunk embedding."""
+    
+    @patch('ingest.embeddings.cache.embed_texts')
+    def test_only_misses_are_embedded(self, mock_embed, tmp_path):
+        """Test cached chunks skip the API and hit rates are reported."""
+        cache = ChunkEmbeddingCache("text-embedding-3-large", 3072, SQLiteVectorCache(str(tmp_path / "cache.db")))
+        cache.set_many(["cached"], [[1.0]])
+        mock_embed.return_value = [[2.0]]
+        
+        with patch('ingest.embeddings.cache._get_cache', return_value=cache):
+            embeddings, stats = embed_chunks(["cached", "new", "new"])
+            
+            assert embeddings == [[1.0], [2.0], [2.0]]
+            mock_embed.assert_called_once_with(["new"])
+            assert stats == {"chunks": 3, "cache_hits": 1, "embedded": 1, "hit_rate": 1 / 3}
+            
+            # Re-ingesting the same chunks is served entirely from the cache
+            _, stats = embed_chunks(["cached", "new"])
+            assert stats["hit_rate"] == 1.0
+            mock_embed.assert_called_once()
+    
+    @patch('ingest.embeddings.cache.embed_texts', return_value=[[1.0]])
+    @patch('ingest.embeddings.cache._get_cache', side_effect=OSError("disk full"))
+    def test_cache_errors_fall_back(self, mock_get_cache, mock_embed):
+        """Test an unavailable cache doesn't fail the ingest."""
+        embeddings, stats = embed_chunks(["chunk"])
+        
+        assert embeddings == [[1.0]]
+        assert stats["cache_hits"] == 0
+
+
+class TestEmbeddingBatcher:
+    """Tests for shared embedding batches."""
+    
+    def test_merges_concurrent_requests(self):
+        """Test concurrent callers share one embedding call and get their own results."""
+        embed = Mock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+        batcher = EmbeddingBatcher(embed=embed, max_texts=5, max_delay=5.0)
+        
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            results = list(executor.map(batcher, [["a"], ["bb", "ccc"], ["dddd", "eeeee"]]))
+        
+        assert results == [[[1.0]], [[2.0], [3.0]], [[4.0], [5.0]]]
+        # The batch went out as soon as it was full, without waiting for the delay
+        embed.assert_called_once()
+    
+    def test_errors_reach_every_caller(self):
+        """Test a failed batch fails each request in it."""
+        batcher = EmbeddingBatcher(embed=Mock(side_effect=RuntimeError("down")), max_delay=0.01)
+        
+        with pytest.raises(RuntimeError, match="down"):
+            batcher(["a"])
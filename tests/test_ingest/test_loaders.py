@@ -2,10 +2,11 @@
 Tests for document loaders.
 """
 
+import time
 import pytest
 from pathlib import Path
 from unittest.mock import Mock, patch, mock_open
-from ingest.loaders.pdf import load_pdf
+from ingest.loaders.pdf import _extract_page_range, _get_pool, iter_pdf_pages_parallel, load_pdf
 from ingest.loaders import load_document, get_loader
 
 
@@ -32,6 +33,90 @@ class TestPDFLoader:
         assert "Page 2 content" in result
         mock_pdf_reader.assert_called_once_with("test.pdf")
 
+    
+    def test_parallel_extraction_keeps_page_order(self, tmp_path):
+        """Test pages extracted across processes come back in page order."""
+        path = tmp_path / "doc.pdf"
+        _write_pdf(path, [f"Page {i}" for i in range(7)])
+        
+        pages = list(iter_pdf_pages_parallel(str(path), workers=3, pages_per_task=2, page_timeout=30))
+        
+        assert [page.strip() for page in pages] == [f"Page {i}" for i in range(7)]
+    
+    def test_parallel_extraction_shares_one_pool(self, tmp_path):
+        """Test documents share one pool whose processes are not forked from this process."""
+        path = tmp_path / "doc.pdf"
+        _write_pdf(path, ["Page 0", "Page 1"])
+        
+        list(iter_pdf_pages_parallel(str(path), workers=2, pages_per_task=1))
+        pool = _get_pool(2)
+        list(iter_pdf_pages_parallel(str(path), workers=2, pages_per_task=1))
+        
+        assert _get_pool(2) is pool
+        assert pool._mp_context.get_start_method() != "fork"
+    
+    @patch('ingest.loaders.pdf.PdfReader')
+    def test_extract_page_range_skips_slow_pages(self, mock_pdf_reader):
+        """Test a page exceeding the time limit is reported instead of stalling."""
+        slow_page = Mock()
+        slow_page.extract_text.side_effect = lambda: time.sleep(5)
+        fast_page = Mock()
+        fast_page.extract_text.return_value = "Fast page"
+        mock_pdf_reader.return_value.pages = [fast_page, slow_page, fast_page]
+        
+        results = _extract_page_range("test.pdf", 0, 3, page_timeout=0.1)
+        
+        assert [(number, text) for number, text, _ in results] == [(0, "Fast page"), (1, None), (2, "Fast page")]
+        assert "exceeded" in results[1][2]
+    
+    @patch('ingest.loaders.pdf.PdfReader')
+    def test_page_timeout_escapes_broad_except(self, mock_pdf_reader):
+        """Test the time limit still applies when the extraction code catches Exception."""
+        def swallow_errors():
+            # Like pypdf's own error handling around malformed content
+            for _ in range(50):
+                try:
+                    time.sleep(0.1)
+                except Exception:
+                    pass
+            return "Never finished"
+        
+        slow_page = Mock()
+        slow_page.extract_text.side_effect = swallow_errors
+        mock_pdf_reader.return_value.pages = [slow_page]
+        
+        results = _extract_page_range("test.pdf", 0, 1, page_timeout=0.1)
+        
+        assert results[0][1] is None
+        assert "exceeded" in results[0][2]
+
+
+def _write_pdf(path, page_texts):
+    """Write a minimal PDF with one line of text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in page_texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"
+    
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(output)
+
 
 class TestLoaderFactory:
     """Tests for loader factory."""
@@ -0,0 +1,158 @@
+"""
+Tests for the streaming ingestion pipeline.
+"""
+
+import pytest
+from unittest.mock import patch
+from ingest.dedup import NearDuplicateIndex
+from ingest.models import Chunk
+from ingest.pipeline import ingest_chunks
+from ingest.tasks import delete_document
+from ingest.vectorstore.qdrant import chunk_point_ids
+
+
+def _fake_embed_chunks(chunks, embed=None):
+    return [[0.1]] * len(chunks), {"chunks": len(chunks), "cache_hits": 0, "embedded": len(chunks), "hit_rate": 0.0}
+
+
+class TestIngestChunks:
+    """Tests for windowed chunk ingestion."""
+    
+    @patch('ingest.pipeline.store_embeddings')
+    @patch('ingest.pipeline.embed_chunks', side_effect=_fake_embed_chunks)
+    def test_processes_stream_in_windows(self, mock_embed, mock_store):
+        """Test chunks are embedded and stored window by window, in order."""
+        chunks = ["a", "b", "a", "c", "d"]
+        consumed = []
+        
+        def stream():
+            for chunk in chunks:
+                consumed.append(chunk)
+                yield chunk
+        
+        result = ingest_chunks(document_id=1, chunks=stream(), metadata={}, tenant_id=1, existing={}, window_size=2)
+        
+        assert result["chunks"] == 5
+        assert result["new"] == 5
+        assert [c[0][0] for c in mock_embed.call_args_list] == [["a", "b"], ["a", "c"], ["d"]]
+        stored_indexes = [i for c in mock_store.call_args_list for i in c[1]["chunk_indexes"]]
+        assert stored_indexes == [0, 1, 2, 3, 4]
+        # IDs match those computed over the whole document at once
+        stored_ids = [i for c in mock_store.call_args_list for i in c[1]["point_ids"]]
+        assert stored_ids == chunk_point_ids(1, chunks, 1)
+    
+    @patch('ingest.pipeline.store_embeddings')
+    @patch('ingest.pipeline.embed_chunks', side_effect=_fake_embed_chunks)
+    def test_skips_stored_chunks(self, mock_embed, mock_store):
+        """Test chunks already stored are only re-indexed."""
+        old_ids = chunk_point_ids(1, ["a", "b"], 1)
+        
+        result = ingest_chunks(
+            document_id=1, chunks=iter(["new", "a", "b"]), metadata={}, tenant_id=1,
+            existing={old_ids[0]: 0, old_ids[1]: 1}, window_size=2
+        )
+        
+        mock_embed.assert_called_once_with(["new"], embed=None)
+        assert result["kept_ids"] == old_ids
+        assert result["moved"] == {old_ids[0]: 1, old_ids[1]: 2}
+    
+    @patch('ingest.pipeline.store_embeddings')
+    @patch('ingest.pipeline.embed_chunks', side_effect=_fake_embed_chunks)
+    def test_chunk_provenance(self, mock_embed, mock_store):
+        """Test Chunks store their page, section and offsets, and kept ones get them refreshed."""
+        old_ids = chunk_point_ids(1, ["a"], 1)
+        chunks = [
+            Chunk("new", "1-0", 1, 1, {"page": 1, "section": None}, start_index=0, end_index=3),
+            Chunk("a", "1-1", 1, 1, {"page": 2, "section": "Intro"}, start_index=4, end_index=5),
+        ]
+        
+        result = ingest_chunks(
+            document_id=1, chunks=iter(chunks), metadata={}, tenant_id=1, existing={old_ids[0]: 0}
+        )
+        
+        mock_embed.assert_called_once_with(["new"], embed=None)
+        assert mock_store.call_args[1]["payloads"] == [
+            {"page": 1, "section": None, "start_index": 0, "end_index": 3}
+        ]
+        assert result["payloads"] == {old_ids[0]: {"page": 2, "section": "Intro", "start_index": 4, "end_index": 5}}
+    
+    @patch('ingest.pipeline.store_embeddings')
+    @patch('ingest.pipeline.embed_chunks', side_effect=_fake_embed_chunks)
+    def test_reader_errors_propagate(self, mock_embed, mock_store):
+        """Test a failure while extracting pages fails the ingest."""
+        def stream():
+            yield "a"
+            raise FileNotFoundError("missing page")
+        
+        with pytest.raises(FileNotFoundError):
+            ingest_chunks(document_id=1, chunks=stream(), metadata={}, tenant_id=1, existing={}, window_size=1)
+    
+    @patch('ingest.pipeline.store_embeddings')
+    @patch('ingest.pipeline.embed_chunks', side_effect=_fake_embed_chunks)
+    def test_near_duplicates_stored_as_references(self, mock_embed, mock_store, tmp_path):
+        """Test chunks nearly repeating another document's chunk are not embedded or stored."""
+        dedup = NearDuplicateIndex(str(tmp_path / "dedup.db"), min_words=5)
+        boilerplate = " ".join(f"clause{i}" for i in range(100))
+        
+        first = ingest_chunks(
+            document_id=1, chunks=iter([boilerplate, "first document body " * 3]),
+            metadata={}, tenant_id=1, existing={}, dedup=dedup
+        )
+        second = ingest_chunks(
+            document_id=2, chunks=iter(["second document body " * 3, boilerplate + " extra"]),
+            metadata={}, tenant_id=1, existing={}, dedup=dedup
+        )
+        
+        assert first["references"] == {}
+        assert mock_embed.call_args_list[1][0][0] == ["second document body " * 3]
+        canonical_id = chunk_point_ids(1, [boilerplate], 1)[0]
+        assert second["references"] == {chunk_point_ids(2, ["x", boilerplate + " extra"], 1)[1]: canonical_id}
+        assert second["new"] == 1
+        assert second["tokens_saved"] > 0
+        assert dedup.report(1)["references"] == 1
+        dedup.close()
+    
+    def test_referencing_document_survives_canonical_deletion(self, tmp_path):
+        """Test deleting the canonical document stores the referencing chunk, so it can still be retrieved."""
+        dedup = NearDuplicateIndex(str(tmp_path / "dedup.db"), min_words=5)
+        boilerplate = " ".join(f"clause{i}" for i in range(100))
+        # Fake vector store: point ID to payload
+        points = {}
+        
+        def store(document_id, chunks, embeddings, metadata, tenant_id, chunk_indexes, point_ids, payloads):
+            for text, index, point_id, payload in zip(chunks, chunk_indexes, point_ids, payloads):
+                points[point_id] = {
+                    "document_id": document_id, "tenant_id": tenant_id, "text": text, "chunk_index": index,
+                    **metadata, **payload,
+                }
+        
+        def delete(document_id, tenant_id):
+            for point_id in [p for p, payload in points.items() if payload["document_id"] == document_id]:
+                del points[point_id]
+        
+        with patch('ingest.pipeline.store_embeddings', side_effect=store), \
+                patch('ingest.pipeline.embed_chunks', side_effect=_fake_embed_chunks), \
+                patch('ingest.tasks._get_dedup_index', return_value=dedup), \
+                patch('ingest.tasks.delete_document_chunks', side_effect=delete), \
+                patch('ingest.tasks.bump_corpus_version'):
+            ingest_chunks(
+                document_id=1, chunks=iter([boilerplate]), metadata={"title": "one"}, tenant_id=1, existing={},
+                dedup=dedup
+            )
+            second = ingest_chunks(
+                document_id=2, chunks=iter(["intro text of two", boilerplate + " extra"]),
+                metadata={"title": "two"}, tenant_id=1, existing={}, dedup=dedup
+            )
+            assert len(second["references"]) == 1
+            
+            delete_document(1, 1)
+        
+        retrieved = [payload for payload in points.values() if payload["text"] == boilerplate + " extra"]
+        assert retrieved == [{
+            "document_id": 2, "tenant_id": 1, "text": boilerplate + " extra", "chunk_index": 1, "title": "two",
+        }]
+        assert all(payload["document_id"] == 2 for payload in points.values())
+        assert dedup.report(1)["references"] == 0
+        # The stored chunk is now the one later near-duplicates refer to
+        assert dedup.find(1, 3, dedup.signatures([boilerplate]))[0][0] in points
+        dedup.close()
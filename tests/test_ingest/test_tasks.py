@@ -0,0 +1,77 @@
+"""
+Tests for the ingestion pipeline.
+"""
+
+import pytest
+from unittest.mock import patch
+from ingest.tasks import ingest_document
+from ingest.vectorstore.qdrant import chunk_point_ids
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    """Patch the pipeline's external calls and provide a text document."""
+    path = tmp_path / "doc.txt"
+    path.write_text("content")
+    with patch('ingest.tasks.iter_semantic_chunks') as mock_chunk, \
+            patch('ingest.pipeline.embed_chunks') as mock_embed, \
+            patch('ingest.tasks.get_document_points') as mock_existing, \
+            patch('ingest.pipeline.store_embeddings') as mock_store, \
+            patch('ingest.tasks.update_document_points') as mock_update, \
+            patch('ingest.tasks.bump_corpus_version') as mock_bump:
+        mock_embed.side_effect = lambda chunks, embed=None: (
+            [[0.1]] * len(chunks),
+            {"chunks": len(chunks), "cache_hits": 0, "embedded": len(chunks), "hit_rate": 0.0},
+        )
+        yield {
+            "path": str(path),
+            "chunk": mock_chunk,
+            "embed": mock_embed,
+            "existing": mock_existing,
+            "store": mock_store,
+            "update": mock_update,
+            "bump": mock_bump,
+        }
+
+
+class TestIngestDocument:
+    """Tests for document ingestion."""
+    
+    def test_reingest_only_embeds_changed_chunks(self, pipeline):
+        """Test re-ingesting embeds new chunks and deletes vanished ones."""
+        old_ids = chunk_point_ids(1, ["intro", "old paragraph", "outro"], 1)
+        pipeline["existing"].return_value = {old_ids[0]: 0, old_ids[1]: 1, old_ids[2]: 2}
+        pipeline["chunk"].return_value = ["intro", "new paragraph", "extra", "outro"]
+        
+        ingest_document(document_id=1, file_path=pipeline["path"], metadata={}, tenant_id=1)
+        
+        pipeline["embed"].assert_called_once_with(["new paragraph", "extra"], embed=None)
+        store_kwargs = pipeline["store"].call_args[1]
+        assert store_kwargs["chunk_indexes"] == [1, 2]
+        update_kwargs = pipeline["update"].call_args[1]
+        assert update_kwargs["delete_ids"] == [old_ids[1]]
+        assert update_kwargs["chunk_indexes"] == {old_ids[2]: 3}
+        pipeline["bump"].assert_called_once_with(1)
+    
+    def test_unchanged_document_is_not_reembedded(self, pipeline):
+        """Test re-ingesting an unchanged document stores nothing."""
+        chunks = ["intro", "outro"]
+        ids = chunk_point_ids(1, chunks, 1)
+        pipeline["existing"].return_value = {ids[0]: 0, ids[1]: 1}
+        pipeline["chunk"].return_value = chunks
+        
+        ingest_document(document_id=1, file_path=pipeline["path"], metadata={}, tenant_id=1)
+        
+        pipeline["embed"].assert_not_called()
+        pipeline["store"].assert_not_called()
+        pipeline["bump"].assert_not_called()
+    
+    def test_empty_document_fails(self, pipeline):
+        """Test a document without any chunks is rejected before touching stored points."""
+        pipeline["existing"].return_value = {}
+        pipeline["chunk"].return_value = []
+        
+        with pytest.raises(ValueError, match="empty"):
+            ingest_document(document_id=1, file_path=pipeline["path"], metadata={}, tenant_id=1)
+        
+        pipeline["update"].assert_not_called()
@@ -3,41 +3,120 @@ Tests for vector store implementations.
 """
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-from ingest.vectorstore.qdrant import store_embeddings, search, _ensure_collection_exists
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
+from qdrant_client.http.exceptions import UnexpectedResponse
+from ingest.vectorstore.qdrant import (
+    store_embeddings,
+    chunk_point_ids,
+    get_document_points,
+    update_document_points,
+    search,
+    asearch,
+    asearch_batch,
+    afetch_payloads,
+    delete_document,
+    bump_corpus_version,
+    aget_corpus_version,
+    _ensure_collection_exists,
+    COLLECTION,
+    PAYLOAD_INDEXES,
+)
+from qdrant_client.models import Distance, IntegerIndexParams, IntegerIndexType, VectorParams
+from ingest.vectorstore.migrate import migrate_collection
+
+
+@pytest.fixture(autouse=True)
+def reset_collection_registry():
+    """Start every test with an empty collection registry."""
+    with patch.dict('ingest.vectorstore.qdrant._known_collections', clear=True):
+        yield
+
+
+def _collection_info(size, payload_schema=None, hnsw_m=0, payload_m=16):
+    """Build collection info with the given vector size and payload indexes."""
+    return Mock(
+        config=Mock(
+            params=Mock(vectors=VectorParams(size=size, distance=Distance.COSINE)),
+            hnsw_config=Mock(m=hnsw_m, payload_m=payload_m),
+        ),
+        payload_schema=payload_schema if payload_schema is not None else {"tenant_id": {}, "document_id": {}},
+    )
 
 
 class TestQdrantVectorStore:
     """Tests for Qdrant vector store."""
     
-    @patch('ingest.vectorstore.qdrant.client')
-    def test_ensure_collection_exists_creates_new(self, mock_client):
+    @patch('ingest.vectorstore.qdrant._get_client')
+    def test_ensure_collection_exists_creates_new(self, mock_get_client):
         """Test collection creation when it doesn't exist."""
+        mock_client = mock_get_client.return_value
         # Mock: collection doesn't exist
-        mock_client.get_collections.return_value = Mock(collections=[])
+        mock_client.collection_exists.return_value = False
         
         _ensure_collection_exists()
         
         mock_client.create_collection.assert_called_once()
+        hnsw_config = mock_client.create_collection.call_args[1]['hnsw_config']
+        assert hnsw_config.m == 0
+        assert hnsw_config.payload_m == 16
+        indexed = {call[1]['field_name'] for call in mock_client.create_payload_index.call_args_list}
+        assert indexed == {"tenant_id", "document_id"}
     
-    @patch('ingest.vectorstore.qdrant.client')
-    def test_ensure_collection_exists_skips_existing(self, mock_client):
+    @patch('ingest.vectorstore.qdrant._get_client')
+    def test_ensure_collection_exists_skips_existing(self, mock_get_client):
         """Test skips creation when collection exists."""
+        mock_client = mock_get_client.return_value
         # Mock: collection already exists
-        mock_collection = Mock()
-        mock_collection.name = "contexta_documents"
-        mock_client.get_collections.return_value = Mock(
-            collections=[mock_collection]
-        )
+        mock_client.collection_exists.return_value = True
+        mock_client.get_collection.return_value = _collection_info(3072)
         
         _ensure_collection_exists()
         
         mock_client.create_collection.assert_not_called()
     
-    @patch('ingest.vectorstore.qdrant.client')
+    @patch('ingest.vectorstore.qdrant._get_client')
+    def test_ensure_collection_exists_checks_once(self, mock_get_client):
+        """Test the collection is only checked on first use."""
+        mock_client = mock_get_client.return_value
+        mock_client.collection_exists.return_value = True
+        mock_client.get_collection.return_value = _collection_info(3072)
+        
+        _ensure_collection_exists()
+        _ensure_collection_exists()
+        
+        mock_client.collection_exists.assert_called_once()
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    def test_ensure_collection_exists_dimension_mismatch(self, mock_get_client):
+        """Test an existing collection with another vector size is rejected."""
+        mock_client = mock_get_client.return_value
+        mock_client.collection_exists.return_value = True
+        mock_client.get_collection.return_value = _collection_info(1536)
+        
+        with pytest.raises(ValueError, match="vector size 1536"):
+            _ensure_collection_exists()
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    def test_search_rechecks_missing_collection(self, mock_get_client):
+        """Test a dropped collection is re-created and the search retried."""
+        mock_client = mock_get_client.return_value
+        mock_client.collection_exists.side_effect = [True, False]
+        mock_client.get_collection.return_value = _collection_info(3072)
+        mock_client.query_points.side_effect = [
+            UnexpectedResponse(404, "Not Found", b"Collection not found", None),
+            Mock(points=[]),
+        ]
+        
+        assert search(query_embedding=[0.1] * 3072, tenant_id=1) == []
+        
+        assert mock_client.query_points.call_count == 2
+        mock_client.create_collection.assert_called_once()
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
     @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
-    def test_store_embeddings(self, mock_ensure, mock_client):
+    def test_store_embeddings(self, mock_ensure, mock_get_client):
         """Test storing embeddings."""
+        mock_client = mock_get_client.return_value
         chunks = ["chunk1", "chunk2"]
         embeddings = [[0.1] * 3072, [0.2] * 3072]
         metadata = {"source": "test"}
@@ -62,9 +141,147 @@ class TestQdrantVectorStore:
         assert all(p.payload['tenant_id'] == tenant_id for p in points)
         assert all(p.payload['document_id'] == 1 for p in points)
     
-    @patch('ingest.vectorstore.qdrant.client')
+    def test_chunk_point_ids_are_deterministic(self):
+        """Test IDs depend only on tenant, document, content and repetition."""
+        ids = chunk_point_ids(document_id=1, chunks=["a", "b", "a"], tenant_id=1)
+        
+        assert ids == chunk_point_ids(document_id=1, chunks=["a", "b", "a"], tenant_id=1)
+        assert len(set(ids)) == 3
+        # Inserting a chunk doesn't change the IDs of the others
+        assert chunk_point_ids(document_id=1, chunks=["new", "a", "b"], tenant_id=1)[1:] == ids[:2]
+        assert chunk_point_ids(document_id=1, chunks=["a"], tenant_id=2) != ids[:1]
+        assert chunk_point_ids(document_id=2, chunks=["a"], tenant_id=1) != ids[:1]
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
+    def test_store_embeddings_reuses_ids(self, mock_ensure, mock_get_client):
+        """Test storing the same chunks twice overwrites the same points."""
+        mock_client = mock_get_client.return_value
+        
+        for _ in range(2):
+            store_embeddings(document_id=1, chunks=["a", "b"], embeddings=[[0.1], [0.2]], metadata={}, tenant_id=1)
+        
+        first, second = (c[1]['points'] for c in mock_client.upsert.call_args_list)
+        assert [p.id for p in first] == [p.id for p in second]
+    
+    @patch('ingest.vectorstore.qdrant.QDRANT_UPSERT_BATCH_SIZE', 2)
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
+    def test_store_embeddings_batches(self, mock_ensure, mock_get_client):
+        """Test points are upserted in batches and only the last one waits."""
+        mock_client = mock_get_client.return_value
+        chunks = [f"chunk{i}" for i in range(5)]
+        
+        store_embeddings(
+            document_id=1, chunks=chunks, embeddings=[[0.1]] * 5, metadata={}, tenant_id=1
+        )
+        
+        calls = mock_client.upsert.call_args_list
+        assert len(calls) == 3
+        assert sorted(len(c[1]['points']) for c in calls[:2]) == [2, 2]
+        assert all(c[1]['wait'] is False for c in calls[:2])
+        # The last batch is sent after the others and waits for all of them
+        assert calls[-1][1]['wait'] is True
+        assert [p.payload['chunk_index'] for p in calls[-1][1]['points']] == [4]
+    
+    @patch('ingest.vectorstore.benchmark.QdrantClient')
     @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
-    def test_store_embeddings_mismatch(self, mock_ensure, mock_client):
+    def test_benchmark_manages_its_own_collection(self, mock_ensure, mock_client_class):
+        """Test the benchmark upserts with its own client and any vector size, bypassing the registry."""
+        from ingest.vectorstore.benchmark import benchmark_upserts
+        from ingest.vectorstore.qdrant import _known_collections
+        mock_client = mock_client_class.return_value
+        
+        result = benchmark_upserts(points=5, dimensions=8, batch_size=2, parallel=2)
+        
+        assert result["dimensions"] == 8
+        assert mock_client.upsert.call_count == 2 * 3
+        mock_ensure.assert_not_called()
+        assert mock_client.delete_collection.call_count == 2
+        assert not any(name.startswith("benchmark_") for name in _known_collections)
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
+    def test_get_document_points_pages(self, mock_ensure, mock_get_client):
+        """Test every page of a document's points is listed."""
+        mock_client = mock_get_client.return_value
+        mock_client.scroll.side_effect = [
+            ([Mock(id="id1", payload={"chunk_index": 0})], "id2"),
+            ([Mock(id="id2", payload={"chunk_index": 1})], None),
+        ]
+        
+        assert get_document_points(document_id=1, tenant_id=1) == {"id1": 0, "id2": 1}
+        assert mock_client.scroll.call_args_list[1][1]['offset'] == "id2"
+        assert mock_client.scroll.call_args[1]['with_vectors'] is False
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
+    def test_update_document_points(self, mock_ensure, mock_get_client):
+        """Test deletes, moves and metadata go out in one batch request."""
+        mock_client = mock_get_client.return_value
+        
+        update_document_points(
+            document_id=1, tenant_id=1, delete_ids=["old"], chunk_indexes={"kept": 3},
+            metadata={"title": "Doc"}, keep_ids=["kept"]
+        )
+        update_document_points(document_id=1, tenant_id=1, delete_ids=[], chunk_indexes={})
+        
+        mock_client.batch_update_points.assert_called_once()
+        operations = mock_client.batch_update_points.call_args[1]['update_operations']
+        assert operations[0].delete.points == ["old"]
+        assert operations[1].set_payload.payload == {"chunk_index": 3}
+        assert operations[2].set_payload.points == ["kept"]
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
+    def test_update_document_points_payloads(self, mock_ensure, mock_get_client):
+        """Test per-chunk payloads are set on kept points, merged with their new index."""
+        mock_client = mock_get_client.return_value
+        
+        update_document_points(
+            document_id=1, tenant_id=1, delete_ids=[], chunk_indexes={"moved": 3},
+            payloads={"moved": {"page": 2}, "kept": {"page": 1}}
+        )
+        
+        operations = mock_client.batch_update_points.call_args[1]['update_operations']
+        assert [(op.set_payload.points, op.set_payload.payload) for op in operations] == [
+            (["moved"], {"page": 2, "chunk_index": 3}),
+            (["kept"], {"page": 1}),
+        ]
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
+    def test_update_document_points_skips_unchanged(self, mock_ensure, mock_get_client):
+        """Test only kept points whose stored payload differs are updated."""
+        mock_client = mock_get_client.return_value
+        mock_client.scroll.return_value = ([
+            Mock(id="same", payload={"chunk_index": 0, "title": "Doc", "page": 1}),
+            Mock(id="paged", payload={"chunk_index": 1, "title": "Doc", "page": 1}),
+        ], None)
+        stored = {}
+        
+        assert get_document_points(document_id=1, tenant_id=1, payloads=stored) == {"same": 0, "paged": 1}
+        assert mock_client.scroll.call_args[1]['with_payload'].exclude == ["text"]
+        
+        update_document_points(
+            document_id=1, tenant_id=1, delete_ids=[], chunk_indexes={}, metadata={"title": "Doc"},
+            keep_ids=["same", "paged"], payloads={"same": {"page": 1}, "paged": {"page": 2}}, stored_payloads=stored
+        )
+        
+        operations = mock_client.batch_update_points.call_args[1]['update_operations']
+        assert [(op.set_payload.points, op.set_payload.payload) for op in operations] == [(["paged"], {"page": 2})]
+        
+        # An unchanged re-ingest sends nothing
+        mock_client.batch_update_points.reset_mock()
+        update_document_points(
+            document_id=1, tenant_id=1, delete_ids=[], chunk_indexes={}, metadata={"title": "Doc"},
+            keep_ids=["same"], payloads={"same": {"page": 1}}, stored_payloads=stored
+        )
+        mock_client.batch_update_points.assert_not_called()
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
+    def test_store_embeddings_mismatch(self, mock_ensure, mock_get_client):
         """Test storing embeddings with mismatched lengths."""
         chunks = ["chunk1", "chunk2"]
         embeddings = [[0.1] * 3072]  # Only one embedding
@@ -78,12 +295,13 @@ class TestQdrantVectorStore:
                 tenant_id=1
             )
     
-    @patch('ingest.vectorstore.qdrant.client')
+    @patch('ingest.vectorstore.qdrant._get_client')
     @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
-    def test_search(self, mock_ensure, mock_client):
+    def test_search(self, mock_ensure, mock_get_client):
         """Test vector search."""
+        mock_client = mock_get_client.return_value
         # Mock search results
-        mock_client.search.return_value = [
+        mock_client.query_points.return_value.points = [
             Mock(
                 id="id1",
                 score=0.95,
@@ -119,13 +337,14 @@ class TestQdrantVectorStore:
         assert results[1]["score"] == 0.85
         
         mock_ensure.assert_called_once()
-        mock_client.search.assert_called_once()
+        mock_client.query_points.assert_called_once()
     
-    @patch('ingest.vectorstore.qdrant.client')
+    @patch('ingest.vectorstore.qdrant._get_client')
     @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
-    def test_search_with_filters(self, mock_ensure, mock_client):
+    def test_search_with_filters(self, mock_ensure, mock_get_client):
         """Test search with additional filters."""
-        mock_client.search.return_value = []
+        mock_client = mock_get_client.return_value
+        mock_client.query_points.return_value.points = []
         
         query_embedding = [0.1] * 3072
         search(
@@ -135,9 +354,242 @@ class TestQdrantVectorStore:
             filters={"document_id": 123}
         )
         
-        call_args = mock_client.search.call_args
+        call_args = mock_client.query_points.call_args
         query_filter = call_args[1]['query_filter']
         
         # Should have filters for both tenant_id and document_id
         assert query_filter is not None
-
+        assert len(query_filter.must) == 2
+    
+    @pytest.mark.asyncio
+    @patch('ingest.vectorstore.qdrant._get_async_client')
+    @patch('ingest.vectorstore.qdrant._aensure_collection_exists', new_callable=AsyncMock)
+    async def test_asearch(self, mock_ensure, mock_get_client):
+        """Test async vector search."""
+        mock_client = Mock()
+        mock_client.query_points = AsyncMock(return_value=Mock(points=[
+            Mock(
+                id="id1",
+                score=0.95,
+                payload={
+                    "text": "Result 1",
+                    "document_id": 1,
+                    "chunk_index": 0,
+                    "tenant_id": 1
+                }
+            )
+        ]))
+        mock_get_client.return_value = mock_client
+        
+        results = await asearch(query_embedding=[0.1] * 3072, tenant_id=1, top_k=5)
+        
+        assert len(results) == 1
+        assert results[0]["text"] == "Result 1"
+        assert results[0]["document_id"] == 1
+        mock_ensure.assert_awaited_once()
+        call_args = mock_client.query_points.call_args
+        assert call_args[1]['limit'] == 5
+        assert call_args[1]['query_filter'] is not None
+    
+    @pytest.mark.asyncio
+    @patch('ingest.vectorstore.qdrant._get_async_client')
+    @patch('ingest.vectorstore.qdrant._aensure_collection_exists', new_callable=AsyncMock)
+    async def test_asearch_payload_projection(self, mock_ensure, mock_get_client):
+        """Test search can return only selected payload fields."""
+        mock_client = Mock()
+        mock_client.query_points = AsyncMock(return_value=Mock(points=[
+            Mock(id="id1", score=0.9, payload={"document_id": 1, "chunk_index": 0})
+        ]))
+        mock_get_client.return_value = mock_client
+        
+        results = await asearch(
+            query_embedding=[0.1] * 4, tenant_id=1, payload_fields=["document_id", "chunk_index"]
+        )
+        
+        assert results[0]["text"] == ""
+        assert results[0]["document_id"] == 1
+        assert mock_client.query_points.call_args[1]['with_payload'] == ["document_id", "chunk_index"]
+    
+    @pytest.mark.asyncio
+    @patch('ingest.vectorstore.qdrant._get_async_client')
+    @patch('ingest.vectorstore.qdrant._aensure_collection_exists', new_callable=AsyncMock)
+    async def test_afetch_payloads(self, mock_ensure, mock_get_client):
+        """Test fetching payload fields for known point IDs."""
+        mock_client = Mock()
+        mock_client.retrieve = AsyncMock(return_value=[Mock(id="id1", payload={"text": "Chunk"})])
+        mock_get_client.return_value = mock_client
+        
+        payloads = await afetch_payloads(["id1"], payload_fields=["text"])
+        
+        assert payloads == {"id1": {"text": "Chunk"}}
+        call_args = mock_client.retrieve.call_args[1]
+        assert call_args['with_payload'] == ["text"]
+        assert call_args['with_vectors'] is False
+        assert await afetch_payloads([], payload_fields=["text"]) == {}
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.qdrant._ensure_collection_exists')
+    def test_delete_document(self, mock_ensure, mock_get_client):
+        """Test deleting a document only targets that tenant's chunks."""
+        mock_client = mock_get_client.return_value
+        
+        delete_document(document_id=7, tenant_id=1)
+        
+        selector = mock_client.delete.call_args[1]['points_selector']
+        keys = {condition.key: condition.match.value for condition in selector.filter.must}
+        assert keys == {"tenant_id": 1, "document_id": 7}
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    def test_bump_corpus_version(self, mock_get_client):
+        """Test bumping a corpus version writes a new version point."""
+        mock_client = mock_get_client.return_value
+        mock_client.collection_exists.return_value = False
+        
+        first = bump_corpus_version(tenant_id=1)
+        second = bump_corpus_version(tenant_id=1)
+        
+        assert first != second
+        mock_client.create_collection.assert_called()
+        points = mock_client.upsert.call_args[1]['points']
+        assert points[0].payload == {"tenant_id": 1, "version": second}
+    
+    @pytest.mark.asyncio
+    @patch('ingest.vectorstore.qdrant._get_async_client')
+    async def test_aensure_collection_exists_concurrently(self, mock_get_client):
+        """Test concurrent first requests create the collection once."""
+        import asyncio
+        from ingest.vectorstore.qdrant import _aensure_collection_exists
+        created = []
+        
+        async def create_collection(**kwargs):
+            await asyncio.sleep(0.01)
+            created.append(kwargs['collection_name'])
+        
+        mock_client = Mock()
+        mock_client.collection_exists = AsyncMock(side_effect=lambda name: name in created)
+        mock_client.create_collection = AsyncMock(side_effect=create_collection)
+        mock_client.create_payload_index = AsyncMock()
+        mock_get_client.return_value = mock_client
+        
+        await asyncio.gather(*[_aensure_collection_exists("test", dimension=4) for _ in range(3)])
+        
+        assert created == ["test"]
+        mock_client.collection_exists.assert_awaited_once()
+    
+    @patch('ingest.vectorstore.qdrant._get_async_client')
+    def test_aensure_collection_exists_across_event_loops(self, mock_get_client):
+        """Test the creation lock works in each event loop the process runs (e.g. one per test or worker)."""
+        import asyncio
+        from ingest.vectorstore.qdrant import _aensure_collection_exists, _forget_collection
+        
+        async def collection_exists(name):
+            await asyncio.sleep(0.01)
+            return True
+        
+        mock_client = Mock()
+        mock_client.collection_exists = AsyncMock(side_effect=collection_exists)
+        info = Mock()
+        info.config.params.vectors = VectorParams(size=4, distance=Distance.COSINE)
+        mock_client.get_collection = AsyncMock(return_value=info)
+        mock_get_client.return_value = mock_client
+        
+        async def first_requests():
+            await asyncio.gather(*[_aensure_collection_exists("test", dimension=4) for _ in range(3)])
+        
+        for _ in range(2):
+            # Contended in both loops, which a lock bound to the first loop would reject
+            asyncio.run(first_requests())
+            _forget_collection("test")
+        
+        assert mock_client.collection_exists.await_count == 2
+    
+    @pytest.mark.asyncio
+    @patch('ingest.vectorstore.qdrant._get_async_client')
+    async def test_aget_corpus_version_missing_collection(self, mock_get_client):
+        """Test a missing versions collection means no version yet."""
+        mock_client = Mock()
+        mock_client.retrieve = AsyncMock(
+            side_effect=UnexpectedResponse(404, "Not Found", b"", None)
+        )
+        mock_get_client.return_value = mock_client
+        
+        assert await aget_corpus_version(tenant_id=1) is None
+    
+    @pytest.mark.asyncio
+    @patch('ingest.vectorstore.qdrant._get_async_client')
+    async def test_aget_corpus_version_missing_collection_grpc(self, mock_get_client):
+        """Test the gRPC client's not-found error also means no version yet."""
+        from grpc import StatusCode
+        from grpc.aio import AioRpcError, Metadata
+        mock_client = Mock()
+        mock_client.retrieve = AsyncMock(side_effect=AioRpcError(
+            StatusCode.NOT_FOUND, Metadata(), Metadata(), details="Not found: Collection doesn't exist!"
+        ))
+        mock_get_client.return_value = mock_client
+        
+        assert await aget_corpus_version(tenant_id=1) is None
+        
+        mock_client.retrieve.side_effect = AioRpcError(StatusCode.UNAVAILABLE, Metadata(), Metadata())
+        with pytest.raises(AioRpcError):
+            await aget_corpus_version(tenant_id=1)
+    
+    @pytest.mark.asyncio
+    @patch('ingest.vectorstore.qdrant._get_async_client')
+    @patch('ingest.vectorstore.qdrant._aensure_collection_exists', new_callable=AsyncMock)
+    async def test_asearch_batch(self, mock_ensure, mock_get_client):
+        """Test batch search sends every query in one request."""
+        point = Mock(id="id1", score=0.9, payload={"text": "Result", "document_id": 1, "chunk_index": 0})
+        mock_client = Mock()
+        mock_client.query_batch_points = AsyncMock(return_value=[Mock(points=[point]), Mock(points=[])])
+        mock_get_client.return_value = mock_client
+        
+        results = await asearch_batch(query_embeddings=[[0.1] * 4, [0.2] * 4], tenant_id=1, top_k=3)
+        
+        assert len(results) == 2
+        assert results[0][0]["text"] == "Result"
+        assert results[1] == []
+        requests = mock_client.query_batch_points.call_args[1]['requests']
+        assert len(requests) == 2
+        assert all(r.limit == 3 for r in requests)
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.migrate._get_client')
+    def test_migrate_collection(self, mock_get_client, mock_get_registry_client):
+        """Test migration adds only missing indexes and applies HNSW settings."""
+        mock_client = mock_get_client.return_value
+        mock_get_registry_client.return_value = mock_client
+        mock_client.collection_exists.return_value = True
+        mock_client.get_collection.return_value = _collection_info(
+            3072, payload_schema={"document_id": {}}, hnsw_m=16, payload_m=None
+        )
+        
+        result = migrate_collection()
+        
+        assert result["created_indexes"] == ["tenant_id"]
+        assert result["hnsw_updated"] is True
+        mock_client.create_payload_index.assert_called_once()
+        hnsw_config = mock_client.update_collection.call_args[1]['hnsw_config']
+        assert (hnsw_config.m, hnsw_config.payload_m) == (0, 16)
+    
+    @patch('ingest.vectorstore.qdrant._get_client')
+    @patch('ingest.vectorstore.migrate._get_client')
+    def test_migrate_collection_rebuilds_outdated_indexes(self, mock_get_client, mock_get_registry_client):
+        """Test indexes built with other parameters are dropped and created again."""
+        mock_client = mock_get_client.return_value
+        mock_get_registry_client.return_value = mock_client
+        mock_client.collection_exists.return_value = True
+        old_params = IntegerIndexParams(type=IntegerIndexType.INTEGER, lookup=True, range=False)
+        mock_client.get_collection.return_value = _collection_info(
+            3072,
+            payload_schema={
+                "tenant_id": Mock(params=old_params),
+                "document_id": Mock(params=PAYLOAD_INDEXES["document_id"]),
+            },
+        )
+        
+        result = migrate_collection()
+        
+        assert result["rebuilt_indexes"] == ["tenant_id"]
+        mock_client.delete_payload_index.assert_called_once_with(COLLECTION, field_name="tenant_id")
+        assert mock_client.create_payload_index.call_args[1]["field_schema"] == PAYLOAD_INDEXES["tenant_id"]
+        assert PAYLOAD_INDEXES["document_id"].enable_hnsw is False
@@ -0,0 +1,246 @@
+"""
+Tests for the job queue and worker pool.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+from workers.queue import JobQueue, QueueFullError
+from workers.pool import WorkerPool
+
+
+@pytest.fixture
+def queue(tmp_path):
+    """Job queue in a temporary database."""
+    queue = JobQueue(str(tmp_path / "jobs.db"), visibility_timeout=60, max_attempts=2, retry_delay=10)
+    yield queue
+    queue.close()
+
+
+class TestJobQueue:
+    """Tests for the SQLite job queue."""
+    
+    def test_claims_jobs_in_order(self, queue):
+        """Test jobs are claimed oldest first, each only once."""
+        with patch('workers.queue.time.time', return_value=1000.0):
+            first = queue.enqueue("task", {"n": 1})
+        with patch('workers.queue.time.time', return_value=1001.0):
+            queue.enqueue("task", {"n": 2})
+            
+            job = queue.claim()
+            assert job.id == first
+            assert job.payload == {"n": 1}
+            assert job.attempts == 1
+            assert queue.claim().payload == {"n": 2}
+            assert queue.claim() is None
+    
+    def test_jobs_survive_reopening(self, tmp_path):
+        """Test queued jobs are still there after the process restarts."""
+        path = str(tmp_path / "jobs.db")
+        JobQueue(path).enqueue("task", {"n": 1})
+        
+        assert JobQueue(path).claim().payload == {"n": 1}
+    
+    def test_expired_lease_is_reclaimed(self, queue):
+        """Test a job whose worker stopped renewing the lease runs again."""
+        with patch('workers.queue.time.time', return_value=1000.0):
+            queue.enqueue("task", {})
+            job = queue.claim()
+        with patch('workers.queue.time.time', return_value=1030.0):
+            assert queue.extend(job) is True
+        with patch('workers.queue.time.time', return_value=1061.0):
+            assert queue.claim() is None
+        with patch('workers.queue.time.time', return_value=1091.0):
+            assert queue.claim().attempts == 2
+        with patch('workers.queue.time.time', return_value=2000.0):
+            # Lease expired on the last attempt
+            assert queue.claim() is None
+            assert queue.stats()["failed"] == 1
+    
+    def test_stale_claim_leaves_reclaimed_job_alone(self, queue):
+        """Test a worker whose lease expired can't complete, fail or renew the job another worker claimed."""
+        with patch('workers.queue.time.time', return_value=1000.0):
+            queue.enqueue("task", {})
+            stale = queue.claim()
+        with patch('workers.queue.time.time', return_value=1061.0):
+            live = queue.claim()
+            assert live.id == stale.id
+            
+            assert queue.complete(stale) is False
+            assert queue.fail(stale, "late error") is None
+            assert queue.extend(stale) is False
+            assert queue.stats()["running"] == 1
+            
+            assert queue.complete(live) is True
+            assert queue.stats() == {"queued": 0, "running": 0, "failed": 0, "completed": 0}
+    
+    def test_failed_job_retries_with_backoff(self, queue):
+        """Test a failed job is retried after the delay, then marked failed."""
+        with patch('workers.queue.time.time', return_value=1000.0):
+            queue.enqueue("task", {})
+            job = queue.claim()
+            assert queue.fail(job, "boom") is True
+            assert queue.claim() is None
+        with patch('workers.queue.time.time', return_value=1010.0):
+            job = queue.claim()
+            assert job.is_last_attempt
+            assert queue.fail(job, "boom") is False
+        
+        assert queue.stats() == {"queued": 0, "running": 0, "failed": 1, "completed": 0}
+    
+    def test_rejects_jobs_when_full(self, tmp_path):
+        """Test enqueue is refused once the queue or a tenant's share is full."""
+        queue = JobQueue(str(tmp_path / "jobs.db"), max_pending=3, max_pending_per_tenant=2, retry_after=15)
+        queue.enqueue("task", {}, tenant=1)
+        queue.enqueue("task", {}, tenant=1)
+        
+        with pytest.raises(QueueFullError) as exc_info:
+            queue.enqueue("task", {}, tenant=1)
+        assert exc_info.value.retry_after == 15
+        
+        queue.enqueue("task", {}, tenant=2)
+        with pytest.raises(QueueFullError, match="queue is full"):
+            queue.enqueue("task", {}, tenant=3)
+        
+        # Finished jobs free their slot
+        assert queue.complete(queue.claim()) is True
+        queue.enqueue("task", {}, tenant=3)
+    
+    def test_enqueue_many_is_all_or_nothing(self, tmp_path):
+        """Test jobs enqueued together are refused together when they don't all fit."""
+        queue = JobQueue(str(tmp_path / "jobs.db"), max_pending_per_tenant=3)
+        queue.enqueue("task", {}, tenant=1)
+        
+        with pytest.raises(QueueFullError):
+            queue.enqueue_many("task", [{"n": 1}, {"n": 2}, {"n": 3}], tenant=1)
+        assert queue.stats()["queued"] == 1
+        
+        job_ids = queue.enqueue_many("task", [{"n": 1}, {"n": 2}], tenant=1)
+        assert len(set(job_ids)) == 2
+        assert queue.stats()["queued"] == 3
+    
+    def test_rotates_across_tenants(self, queue):
+        """Test a tenant's single job is not stuck behind another tenant's bulk import."""
+        with patch('workers.queue.time.time', return_value=1000.0):
+            for n in range(5):
+                queue.enqueue("task", {"n": n}, tenant=1)
+        with patch('workers.queue.time.time', return_value=1001.0):
+            queue.enqueue("task", {"n": 0}, tenant=2)
+            queue.enqueue("task", {"n": 1}, tenant=2)
+            
+            order = [queue.claim().tenant for _ in range(4)]
+        
+        assert order == ["1", "2", "1", "2"]
+    
+    def test_idle_tenant_does_not_catch_up(self, queue):
+        """Test a tenant returning after a pause shares workers instead of taking them all."""
+        with patch('workers.queue.time.time', return_value=1000.0):
+            for _ in range(3):
+                queue.enqueue("task", {}, tenant=1)
+            for _ in range(3):
+                queue.claim()
+            for _ in range(3):
+                queue.enqueue("task", {}, tenant=1)
+                queue.enqueue("task", {}, tenant=2)
+            
+            order = [queue.claim().tenant for _ in range(4)]
+        
+        assert sorted(order) == ["1", "1", "2", "2"]
+    
+    def test_weighted_tenants(self, tmp_path):
+        """Test tenants with a higher weight get proportionally more claims."""
+        queue = JobQueue(str(tmp_path / "jobs.db"), tenant_weights={"1": 3.0})
+        with patch('workers.queue.time.time', return_value=1000.0):
+            for _ in range(8):
+                queue.enqueue("task", {}, tenant=1)
+                queue.enqueue("task", {}, tenant=2)
+            
+            order = [queue.claim().tenant for _ in range(8)]
+        
+        assert order.count("1") == 6
+        assert order.count("2") == 2
+    
+    def test_complete_removes_job(self, queue):
+        """Test completed jobs are deleted."""
+        queue.enqueue("task", {})
+        assert queue.complete(queue.claim()) is True
+        
+        assert queue.stats() == {"queued": 0, "running": 0, "failed": 0, "completed": 0}
+
+
+class TestWorkerPool:
+    """Tests for the worker pool."""
+    
+    def test_runs_job(self, queue):
+        """Test a claimed job is run and removed from the queue."""
+        task = Mock(return_value=None)
+        queue.enqueue("task", {"n": 1})
+        
+        assert WorkerPool(queue, {"task": task}).run_once() is True
+        
+        assert task.call_args[0][0].payload == {"n": 1}
+        assert queue.stats()["queued"] == 0
+        assert WorkerPool(queue, {"task": task}).run_once() is False
+    
+    def test_retries_transient_errors(self, queue):
+        """Test unexpected errors are retried."""
+        queue.enqueue("task", {})
+        
+        WorkerPool(queue, {"task": Mock(side_effect=ConnectionError("down"))}).run_once()
+        
+        assert queue.stats()["queued"] == 1
+    
+    def test_does_not_retry_permanent_errors(self, queue):
+        """Test errors that would fail again are not retried."""
+        queue.enqueue("task", {})
+        queue.enqueue("unknown", {})
+        pool = WorkerPool(queue, {"task": Mock(side_effect=FileNotFoundError("missing"))})
+        
+        pool.run_once()
+        pool.run_once()
+        
+        assert queue.stats()["failed"] == 2
+    
+    @patch('workers.tasks.ingest_document')
+    def test_ingest_task_notifies_failure_on_last_attempt(self, mock_ingest, queue):
+        """Test the failed callback is only sent when no retry is left."""
+        from workers.tasks import TASKS
+        queue.enqueue("ingest_document", {"document_id": 1, "file_path": "a.pdf", "metadata": {}, "tenant_id": 1})
+        pool = WorkerPool(queue, TASKS)
+        
+        pool.run_once()
+        
+        assert mock_ingest.call_args[1]['notify_failure'] is False
+    
+    @patch('workers.tasks.ingest_batch')
+    def test_ingest_batch_task(self, mock_batch, queue):
+        """Test queued bulk imports run the batch ingest with the job's arguments."""
+        from workers.tasks import TASKS
+        payload = {"paths": ["docs.zip"], "tenant_id": 1, "metadata": {}, "concurrency": 4}
+        mock_batch.return_value = {"files": []}
+        queue.enqueue("ingest_batch", payload, tenant=1)
+        
+        WorkerPool(queue, TASKS).run_once()
+        
+        mock_batch.assert_called_once_with(**payload)
+        assert queue.stats()["queued"] == 0
+    
+    @patch('workers.tasks.ingest_batch')
+    def test_ingest_batch_task_keeps_report(self, mock_batch, queue):
+        """Test a bulk import's report is kept as the job's result until it expires."""
+        from workers.tasks import TASKS
+        report = {"files": [{"path": "a.txt", "status": "completed"}], "docs_per_second": 2.5}
+        mock_batch.return_value = report
+        with patch('workers.queue.time.time', return_value=1000.0):
+            job_id = queue.enqueue("ingest_batch", {"paths": ["docs"], "tenant_id": 1}, tenant=1)
+            WorkerPool(queue, TASKS).run_once()
+        
+        job = queue.get(job_id)
+        assert job["status"] == "completed"
+        assert job["tenant"] == "1"
+        assert job["result"] == report
+        assert queue.get("unknown") is None
+        
+        with patch('workers.queue.time.time', return_value=1000.0 + queue.result_ttl + 1):
+            queue.enqueue("task", {})
+            queue.complete(queue.claim())
+        assert queue.get(job_id) is None
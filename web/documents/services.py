@@ -68,3 +68,38 @@ def trigger_ingestion(
             exc_info=True,
         )
         return False
+
+
+def trigger_deletion(document_id: int, user_id: int) -> bool:
+    """
+    Remove a document's chunks from the vector store via the ingest service.
+
+    Args:
+        document_id: ID of the document to delete
+        user_id: ID of the user (used as tenant_id)
+
+    Returns:
+        True if the deletion succeeded, False otherwise
+    """
+    ingest_service_url = getattr(settings, "INGEST_SERVICE_URL", "http://localhost:8001")
+    url = f"{ingest_service_url}/documents/{document_id}"
+
+    try:
+        logger.info(f"Triggering deletion for document {document_id} (tenant {user_id})")
+
+        with httpx.Client(timeout=10.0) as client:
+            response = client.delete(url, params={"tenant_id": user_id})
+            response.raise_for_status()
+
+        logger.info(f"Deletion completed for document {document_id}")
+        return True
+
+    except httpx.HTTPError as e:
+        logger.error(f"HTTP error triggering deletion for document {document_id}: {e}")
+        return False
+    except Exception as e:
+        logger.error(
+            f"Unexpected error triggering deletion for document {document_id}: {e}",
+            exc_info=True,
+        )
+        return False
@@ -2,12 +2,14 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import DocumentViewSet, ingest_callback
+from .views import DocumentViewSet, ingest_callback, ingest_callbacks
 
 router = DefaultRouter()
 router.register(r"", DocumentViewSet, basename="document")
 
 urlpatterns = [
+    # Before the router, whose detail route would otherwise match it
+    path("ingest-callbacks/", ingest_callbacks, name="document-ingest-callbacks"),
     *router.urls,
     path("<int:pk>/ingest-callback/", ingest_callback, name="document-ingest-callback"),
 ]
@@ -7,7 +7,7 @@ from rest_framework.response import Response
 
 from .models import Document
 from .serializers import DocumentSerializer
-from .services import trigger_ingestion
+from .services import trigger_deletion, trigger_ingestion
 
 logger = logging.getLogger(__name__)
 
@@ -74,6 +74,26 @@ class DocumentViewSet(viewsets.ModelViewSet):
 
         logger.info(f"Document {document.id} created, ingestion triggered")
 
+    def perform_destroy(self, instance):
+        """Delete document and remove its chunks from the vector store."""
+        if not trigger_deletion(document_id=instance.id, user_id=self.request.user.id):
+            logger.warning(f"Chunks for document {instance.id} could not be removed from the vector store")
+
+        instance.delete()
+
+
+INGEST_STATUSES = ("completed", "failed")
+
+
+def _apply_ingest_status(document, status_value):
+    """Store the ingestion status reported by the ingest service."""
+    document.status = status_value
+    document.save()
+    if status_value == "completed":
+        logger.info(f"Document {document.id} status updated to completed via callback")
+    else:
+        logger.warning(f"Document {document.id} status updated to failed via callback")
+
 
 @api_view(["POST"])
 @permission_classes([])  # No authentication required for callback
@@ -86,15 +106,8 @@ def ingest_callback(request, pk):
         document = Document.objects.get(pk=pk)
         status_value = request.data.get("status")
 
-        if status_value == "completed":
-            document.status = "completed"
-            document.save()
-            logger.info(f"Document {document.id} status updated to completed via callback")
-            return Response({"status": "ok"}, status=status.HTTP_200_OK)
-        elif status_value == "failed":
-            document.status = "failed"
-            document.save()
-            logger.warning(f"Document {document.id} status updated to failed via callback")
+        if status_value in INGEST_STATUSES:
+            _apply_ingest_status(document, status_value)
             return Response({"status": "ok"}, status=status.HTTP_200_OK)
         else:
             logger.warning(f"Invalid status value in callback: {status_value}")
@@ -106,3 +119,37 @@ def ingest_callback(request, pk):
     except Exception as e:
         logger.error(f"Error processing callback for document {pk}: {e}", exc_info=True)
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(["POST"])
+@permission_classes([])  # No authentication required for callback
+def ingest_callbacks(request):
+    """
+    Batch callback endpoint: several status updates in one request.
+    The ingest service sends this when callbacks to this host pile up.
+    Body: {"updates": [{"document_id": ..., "status": ...}, ...]}
+    """
+    updates = request.data.get("updates")
+    if not isinstance(updates, list):
+        return Response({"error": "updates must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        documents = Document.objects.in_bulk([update.get("document_id") for update in updates])
+        results = {}
+        for update in updates:
+            document_id = update.get("document_id")
+            document = documents.get(document_id)
+            if document is None:
+                logger.error(f"Document {document_id} not found for callback")
+                results[document_id] = "not_found"
+            elif update.get("status") not in INGEST_STATUSES:
+                logger.warning(f"Invalid status value in callback: {update.get('status')}")
+                results[document_id] = "invalid_status"
+            else:
+                _apply_ingest_status(document, update["status"])
+                results[document_id] = "ok"
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Error processing batch callback: {e}", exc_info=True)
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,2 +1,12 @@
-"""Celery workers."""
+"""
+Background job queue and workers.
+"""
 
+from .queue import Job, JobQueue, QueueFullError, enqueue
+
+__all__ = [
+    "Job",
+    "JobQueue",
+    "QueueFullError",
+    "enqueue",
+]
@@ -0,0 +1,39 @@
+"""
+Configuration for the background job workers.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# SQLite file holding the job queue, shared by the ingest service and the workers
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", ".cache/jobs.db")
+# Jobs run at the same time by one worker process
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+# Seconds an idle worker waits before polling the queue again
+WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "1.0"))
+# A claimed job whose lease is not renewed within this many seconds (e.g. the
+# worker died) becomes visible to other workers again
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+# Attempts before a job is marked failed; retries back off exponentially
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5.0"))
+JOB_MAX_RETRY_DELAY = float(os.getenv("JOB_MAX_RETRY_DELAY", "300.0"))
+# Seconds a completed job that returned a result (e.g. a bulk import's
+# report) is kept so clients can fetch it
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "604800"))
+# Admission control: /ingest answers 429 once this many jobs are queued or
+# running, in total or for one tenant (0 disables the limit)
+JOB_QUEUE_MAX_PENDING = int(os.getenv("JOB_QUEUE_MAX_PENDING", "1000"))
+JOB_QUEUE_MAX_PENDING_PER_TENANT = int(os.getenv("JOB_QUEUE_MAX_PENDING_PER_TENANT", "500"))
+# Retry-After (seconds) sent with the 429
+JOB_QUEUE_RETRY_AFTER = float(os.getenv("JOB_QUEUE_RETRY_AFTER", "30"))
+# Scheduling weights per tenant as "tenant:weight,..." (default weight 1)
+JOB_TENANT_WEIGHTS = {
+    tenant.strip(): float(weight)
+    for tenant, weight in (
+        item.split(":", 1) for item in os.getenv("JOB_TENANT_WEIGHTS", "").split(",") if item.strip()
+    )
+}
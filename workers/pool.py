@@ -0,0 +1,172 @@
+"""
+Run queued jobs in a pool of worker threads.
+
+Usage:
+    python -m workers.pool [--concurrency N]
+"""
+
+import argparse
+import logging
+import signal
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from workers.config import WORKER_CONCURRENCY, WORKER_POLL_INTERVAL
+from workers.queue import Job, JobQueue, _get_queue
+from workers.tasks import PERMANENT_ERRORS, TASKS
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    """
+    Claims jobs from a queue and runs them, up to `concurrency` at a time.
+
+    While a job runs, its lease is renewed in the background so that
+    long jobs are not handed to another worker. On stop, workers finish
+    their current job and exit; jobs are never abandoned mid-run by the
+    pool itself.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        tasks: Dict[str, Callable[[Job], Optional[Dict[str, Any]]]],
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            queue: Queue to claim jobs from
+            tasks: Mapping of task name to the function that runs it (and returns the job's result, if any)
+            concurrency: Jobs run at the same time
+            poll_interval: Seconds an idle worker waits before polling again
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        self.queue = queue
+        self.tasks = tasks
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._running: Dict[str, Job] = {}
+        self._running_lock = threading.Lock()
+
+    def run(self):
+        """Run workers until stop() is called."""
+        threads = [
+            threading.Thread(target=self._work, name=f"worker-{i}", daemon=True) for i in range(self.concurrency)
+        ]
+        heartbeat = threading.Thread(target=self._heartbeat, name="worker-heartbeat", daemon=True)
+        for thread in threads:
+            thread.start()
+        heartbeat.start()
+        logger.info(f"Worker pool started with {self.concurrency} workers")
+
+        for thread in threads:
+            thread.join()
+        self._done.set()
+        heartbeat.join()
+        logger.info("Worker pool stopped")
+
+    def stop(self):
+        """Ask the workers to exit after their current job."""
+        self._stop.set()
+
+    def run_once(self) -> bool:
+        """
+        Claim and run a single job.
+
+        Returns:
+            True if a job was run
+        """
+        job = self.queue.claim()
+        if job is None:
+            return False
+
+        with self._running_lock:
+            self._running[job.id] = job
+        try:
+            self._run(job)
+        finally:
+            with self._running_lock:
+                self._running.pop(job.id, None)
+        return True
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                if not self.run_once():
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                # Queue errors (e.g. the database is locked for too long)
+                logger.error(f"Worker error: {e}", exc_info=True)
+                self._stop.wait(self.poll_interval)
+
+    def _run(self, job: Job):
+        task = self.tasks.get(job.task)
+        if task is None:
+            logger.error(f"Job {job.id} has unknown task {job.task}")
+            self.queue.fail(job, f"Unknown task: {job.task}", retry=False)
+            return
+
+        try:
+            result = task(job)
+        except Exception as e:
+            retry = not isinstance(e, PERMANENT_ERRORS)
+            will_retry = self.queue.fail(job, f"{type(e).__name__}: {e}", retry=retry)
+            if will_retry is None:
+                logger.warning(f"Job {job.id} ({job.task}) failed after its lease was lost, ignoring: {e}")
+            elif will_retry:
+                logger.warning(f"Job {job.id} ({job.task}) failed on attempt {job.attempts}, will retry: {e}")
+            else:
+                logger.error(f"Job {job.id} ({job.task}) failed after {job.attempts} attempts: {e}")
+            return
+
+        if self.queue.complete(job, result):
+            logger.info(f"Job {job.id} ({job.task}) completed")
+        else:
+            logger.warning(f"Job {job.id} ({job.task}) completed after its lease was lost, ignoring")
+
+    def _heartbeat(self):
+        """Renew the leases of running jobs well before they expire, until all workers exit."""
+        interval = self.queue.visibility_timeout / 3
+        while not self._done.wait(interval):
+            with self._running_lock:
+                running = list(self._running.values())
+            for job in running:
+                try:
+                    if not self.queue.extend(job):
+                        logger.warning(f"Lease of job {job.id} was lost; another worker may be running it")
+                except Exception as e:
+                    logger.error(f"Could not renew lease of job {job.id}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued ingest jobs")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=WORKER_CONCURRENCY,
+        help=f"Jobs run at the same time (default: {WORKER_CONCURRENCY})",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    pool = WorkerPool(_get_queue(), TASKS, concurrency=args.concurrency, poll_interval=WORKER_POLL_INTERVAL)
+
+    def shutdown(signum, frame):
+        logger.info("Stopping workers after their current jobs")
+        pool.stop()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    pool.run()
+
+
+if __name__ == "__main__":
+    main()
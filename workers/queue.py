@@ -0,0 +1,492 @@
+"""
+Durable job queue stored in a SQLite file shared by the processes on one host.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from workers.config import (
+    JOB_MAX_ATTEMPTS,
+    JOB_MAX_RETRY_DELAY,
+    JOB_QUEUE_MAX_PENDING,
+    JOB_QUEUE_MAX_PENDING_PER_TENANT,
+    JOB_QUEUE_PATH,
+    JOB_QUEUE_RETRY_AFTER,
+    JOB_RESULT_TTL,
+    JOB_RETRY_DELAY,
+    JOB_TENANT_WEIGHTS,
+    JOB_VISIBILITY_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+FAILED = "failed"
+# Completed jobs that returned a result are kept with it for result_ttl seconds
+COMPLETED = "completed"
+# Row of tenant_passes holding the pass of the last scheduled claim
+_GLOBAL_PASS = "*"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is refused because the queue (or the tenant's share of it) is full."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """A job claimed from the queue."""
+
+    id: str
+    task: str
+    payload: Dict[str, Any]
+    tenant: str
+    # Attempt number of this run, starting at 1
+    attempts: int
+    max_attempts: int
+
+    @property
+    def is_last_attempt(self) -> bool:
+        return self.attempts >= self.max_attempts
+
+
+class JobQueue:
+    """
+    Job queue stored in a SQLite file.
+
+    Jobs survive restarts of the processes that enqueue and run them. A
+    claimed job is leased to its worker for visibility_timeout seconds;
+    if the lease is not renewed (the worker died or hung), the job
+    becomes claimable again. A claim is identified by its attempt number,
+    so a worker that lost its lease can no longer complete, fail or renew
+    the job. Failed jobs are retried with exponential backoff until
+    max_attempts, then kept with status "failed". Completed jobs are
+    deleted, unless their task returned a result: those are kept with
+    status "completed" and their result for result_ttl seconds.
+
+    Admission is bounded: once max_pending jobs (or max_pending_per_tenant
+    jobs of one tenant) are queued or running, enqueue raises
+    QueueFullError. Claims rotate across tenants by weighted round-robin
+    (stride scheduling): each tenant has a pass value that advances by
+    1/weight per claimed job, and the tenant with the lowest pass goes
+    next. A tenant that was idle resumes at the current pass, so a bulk
+    import and a single upload alternate instead of queuing behind each
+    other.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 3,
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 300.0,
+        timeout: float = 5.0,
+        max_pending: Optional[int] = None,
+        max_pending_per_tenant: Optional[int] = None,
+        retry_after: float = 30.0,
+        tenant_weights: Optional[Dict[str, float]] = None,
+        result_ttl: float = 7 * 24 * 3600,
+    ):
+        """
+        Initialize the queue, creating the database file if needed.
+
+        Args:
+            path: Path to the SQLite database file
+            visibility_timeout: Seconds a claimed job stays leased to its worker
+            max_attempts: Attempts before a job is marked failed
+            retry_delay: Delay before the first retry, doubled on each further retry
+            max_retry_delay: Upper bound on the retry delay
+            timeout: Seconds to wait for a lock held by another process
+            max_pending: Jobs queued or running before enqueue is refused (None disables)
+            max_pending_per_tenant: Same limit for a single tenant (None disables)
+            retry_after: Seconds clients are told to wait when the queue is full
+            tenant_weights: Share of the workers per tenant, relative to the default weight of 1
+            result_ttl: Seconds completed jobs are kept with their result
+        """
+        if visibility_timeout <= 0:
+            raise ValueError("visibility_timeout must be positive")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if tenant_weights and any(weight <= 0 for weight in tenant_weights.values()):
+            raise ValueError("tenant weights must be positive")
+
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_pending = max_pending
+        self.max_pending_per_tenant = max_pending_per_tenant
+        self.retry_after = retry_after
+        self.tenant_weights = tenant_weights or {}
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, task TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+            "available_at REAL NOT NULL, created_at REAL NOT NULL, last_error TEXT, tenant TEXT NOT NULL DEFAULT '', "
+            "result TEXT)"
+        )
+        # Scheduling pass of each tenant, plus the global pass
+        self._conn.execute("CREATE TABLE IF NOT EXISTS tenant_passes (tenant TEXT PRIMARY KEY, pass REAL NOT NULL)")
+        self._migrate()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_available ON jobs (status, available_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_tenant ON jobs (tenant, status, available_at)")
+
+    def _migrate(self) -> None:
+        """Add the columns missing from queues created by older versions."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "tenant" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN tenant TEXT NOT NULL DEFAULT ''")
+        if "result" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN result TEXT")
+
+    def enqueue(self, task: str, payload: Dict[str, Any], tenant: Optional[Any] = None) -> str:
+        """
+        Add a job to the queue.
+
+        Args:
+            task: Name of the task that runs the job
+            payload: JSON-serializable task arguments
+            tenant: Tenant the job is scheduled for (jobs without one share a slot)
+
+        Returns:
+            Job ID
+
+        Raises:
+            QueueFullError: If the queue or the tenant's share of it is full
+        """
+        return self.enqueue_many(task, [payload], tenant)[0]
+
+    def enqueue_many(self, task: str, payloads: List[Dict[str, Any]], tenant: Optional[Any] = None) -> List[str]:
+        """
+        Add several jobs of one tenant to the queue, all or none.
+
+        Args:
+            task: Name of the task that runs the jobs
+            payloads: JSON-serializable task arguments, one per job
+            tenant: Tenant the jobs are scheduled for (jobs without one share a slot)
+
+        Returns:
+            Job IDs, in payload order
+
+        Raises:
+            QueueFullError: If the jobs don't all fit in the queue or the tenant's share of it
+        """
+        job_ids = [uuid.uuid4().hex for _ in payloads]
+        tenant = "" if tenant is None else str(tenant)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._check_capacity(tenant, len(payloads))
+                self._conn.executemany(
+                    "INSERT INTO jobs (id, task, payload, status, max_attempts, available_at, created_at, tenant) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (job_id, task, json.dumps(payload), QUEUED, self.max_attempts, now, now, tenant)
+                        for job_id, payload in zip(job_ids, payloads)
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return job_ids
+
+    def _check_capacity(self, tenant: str, count: int = 1) -> None:
+        if self.max_pending is not None:
+            (pending,) = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()
+            if pending + count > self.max_pending:
+                raise QueueFullError(f"Ingest queue is full ({pending} pending jobs)", self.retry_after)
+
+        if self.max_pending_per_tenant is not None:
+            (pending,) = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE tenant = ? AND status IN (?, ?)", (tenant, QUEUED, RUNNING)
+            ).fetchone()
+            if pending + count > self.max_pending_per_tenant:
+                raise QueueFullError(f"Tenant {tenant} has {pending} pending jobs", self.retry_after)
+
+    def _weight(self, tenant: str) -> float:
+        return self.tenant_weights.get(tenant, 1.0)
+
+    def _next_tenant(self, now: float) -> Optional[str]:
+        """Pick the tenant with ready jobs and the lowest pass."""
+        ready = self._conn.execute(
+            "SELECT tenant, MIN(available_at) FROM jobs WHERE status IN (?, ?) AND available_at <= ? GROUP BY tenant",
+            (QUEUED, RUNNING, now),
+        ).fetchall()
+        if not ready:
+            return None
+
+        passes = dict(self._conn.execute("SELECT tenant, pass FROM tenant_passes").fetchall())
+        global_pass = passes.get(_GLOBAL_PASS, 0.0)
+
+        def current_pass(tenant: str) -> float:
+            # Idle tenants resume at the global pass instead of catching up
+            return max(passes.get(tenant, global_pass), global_pass)
+
+        # Ties go to the tenant whose oldest ready job has waited longest
+        _, _, tenant = min((current_pass(tenant), oldest, tenant) for tenant, oldest in ready)
+        return tenant
+
+    def claim(self) -> Optional[Job]:
+        """
+        Lease the oldest ready job of the tenant whose turn it is.
+
+        A job is ready when it is queued and its retry delay has passed, or
+        when it is running but its lease has expired.
+
+        Returns:
+            The claimed job, or None if no job is ready
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    tenant = self._next_tenant(now)
+                    if tenant is None:
+                        self._conn.execute("COMMIT")
+                        return None
+
+                    row = self._conn.execute(
+                        "SELECT id, task, payload, status, attempts, max_attempts FROM jobs "
+                        "WHERE tenant = ? AND status IN (?, ?) AND available_at <= ? ORDER BY available_at LIMIT 1",
+                        (tenant, QUEUED, RUNNING, now),
+                    ).fetchone()
+
+                    job_id, task, payload, status, attempts, max_attempts = row
+                    if status == RUNNING and attempts >= max_attempts:
+                        # The last attempt's worker died without reporting back
+                        logger.error(f"Job {job_id} ({task}) lease expired on its last attempt, marking failed")
+                        self._conn.execute(
+                            "UPDATE jobs SET status = ?, last_error = ? WHERE id = ?",
+                            (FAILED, "Lease expired", job_id),
+                        )
+                        continue
+
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = ?, available_at = ? WHERE id = ?",
+                        (RUNNING, attempts + 1, now + self.visibility_timeout, job_id),
+                    )
+                    self._advance_pass(tenant)
+                    break
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if attempts:
+            logger.info(f"Job {job_id} ({task}) claimed for attempt {attempts + 1}/{max_attempts}")
+        return Job(
+            id=job_id,
+            task=task,
+            payload=json.loads(payload),
+            tenant=tenant,
+            attempts=attempts + 1,
+            max_attempts=max_attempts,
+        )
+
+    def _advance_pass(self, tenant: str) -> None:
+        """Charge a claimed job to its tenant and move the global pass to the tenant's start."""
+        passes = dict(
+            self._conn.execute(
+                "SELECT tenant, pass FROM tenant_passes WHERE tenant IN (?, ?)", (tenant, _GLOBAL_PASS)
+            ).fetchall()
+        )
+        start = max(passes.get(tenant, 0.0), passes.get(_GLOBAL_PASS, 0.0))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO tenant_passes (tenant, pass) VALUES (?, ?)",
+            [(_GLOBAL_PASS, start), (tenant, start + 1.0 / self._weight(tenant))],
+        )
+
+    def extend(self, job: Job) -> bool:
+        """
+        Renew the lease of a running job.
+
+        Returns:
+            False if the claim is stale: the lease expired and the job was
+            claimed again (or finished) since
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET available_at = ? WHERE id = ? AND status = ? AND attempts = ?",
+                (time.time() + self.visibility_timeout, job.id, RUNNING, job.attempts),
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job: Job, result: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Record a job that ran successfully.
+
+        Args:
+            job: The job that ran
+            result: JSON-serializable task result, kept with the job (None
+                removes the job)
+
+        Returns:
+            False if the claim is stale, in which case the job is left to
+            the worker that holds it now
+        """
+        now = time.time()
+        with self._lock:
+            if result is None:
+                cursor = self._conn.execute(
+                    "DELETE FROM jobs WHERE id = ? AND status = ? AND attempts = ?", (job.id, RUNNING, job.attempts)
+                )
+            else:
+                # available_at holds the completion time from now on
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, available_at = ?, last_error = NULL "
+                    "WHERE id = ? AND status = ? AND attempts = ?",
+                    (COMPLETED, json.dumps(result), now, job.id, RUNNING, job.attempts),
+                )
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status = ? AND available_at < ?", (COMPLETED, now - self.result_ttl)
+            )
+        return cursor.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a job.
+
+        Returns:
+            The job's task, tenant, status, attempts, last error and result,
+            or None if there is no such job (it never existed, completed
+            without a result, or its result expired)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, task, tenant, status, attempts, max_attempts, last_error, result FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        job_id, task, tenant, status, attempts, max_attempts, error, result = row
+        return {
+            "id": job_id,
+            "task": task,
+            "tenant": tenant,
+            "status": status,
+            "attempts": attempts,
+            "max_attempts": max_attempts,
+            "error": error,
+            "result": json.loads(result) if result is not None else None,
+        }
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> Optional[bool]:
+        """
+        Record a failed attempt, scheduling a retry if attempts remain.
+
+        Args:
+            job: The job that failed
+            error: Error message kept with the job
+            retry: Whether the error is worth retrying
+
+        Returns:
+            True if the job will be retried, False if it failed for good,
+            None if the claim is stale (the job was left alone)
+        """
+        will_retry = retry and not job.is_last_attempt
+        with self._lock:
+            if will_retry:
+                delay = min(self.retry_delay * 2 ** (job.attempts - 1), self.max_retry_delay)
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, available_at = ?, last_error = ? "
+                    "WHERE id = ? AND status = ? AND attempts = ?",
+                    (QUEUED, time.time() + delay, error, job.id, RUNNING, job.attempts),
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = ?, last_error = ? WHERE id = ? AND status = ? AND attempts = ?",
+                    (FAILED, error, job.id, RUNNING, job.attempts),
+                )
+        if not cursor.rowcount:
+            return None
+        return will_retry
+
+    def stats(self) -> Dict[str, int]:
+        """Count jobs by status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {QUEUED: 0, RUNNING: 0, FAILED: 0, COMPLETED: 0, **dict(rows)}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def _get_queue() -> JobQueue:
+    """Lazily open the shared job queue."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(
+                JOB_QUEUE_PATH,
+                visibility_timeout=JOB_VISIBILITY_TIMEOUT,
+                max_attempts=JOB_MAX_ATTEMPTS,
+                retry_delay=JOB_RETRY_DELAY,
+                max_retry_delay=JOB_MAX_RETRY_DELAY,
+                max_pending=JOB_QUEUE_MAX_PENDING or None,
+                max_pending_per_tenant=JOB_QUEUE_MAX_PENDING_PER_TENANT or None,
+                retry_after=JOB_QUEUE_RETRY_AFTER,
+                tenant_weights=JOB_TENANT_WEIGHTS,
+                result_ttl=JOB_RESULT_TTL,
+            )
+    return _queue
+
+
+def enqueue(task: str, payload: Dict[str, Any], tenant: Optional[Any] = None) -> str:
+    """
+    Add a job to the shared queue.
+
+    Args:
+        task: Name of the task that runs the job
+        payload: JSON-serializable task arguments
+        tenant: Tenant the job is scheduled for
+
+    Returns:
+        Job ID
+
+    Raises:
+        QueueFullError: If the queue or the tenant's share of it is full
+    """
+    return _get_queue().enqueue(task, payload, tenant)
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up a job in the shared queue.
+
+    Returns:
+        The job's task, tenant, status, attempts, last error and result,
+        or None if there is no such job
+    """
+    return _get_queue().get(job_id)
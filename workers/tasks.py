@@ -0,0 +1,34 @@
+"""
+Tasks the workers know how to run, by name.
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+from ingest.batch import ingest_batch
+from ingest.tasks import ingest_document
+from workers.queue import Job
+
+# Errors that fail the same way however often the job is retried
+PERMANENT_ERRORS = (FileNotFoundError, ValueError, NotImplementedError)
+
+
+def run_ingest_document(job: Job):
+    """Ingest a document, sending the failed callback only when no retry is left."""
+    ingest_document(**job.payload, notify_failure=job.is_last_attempt)
+
+
+def run_ingest_batch(job: Job) -> Dict[str, Any]:
+    """
+    Ingest the files, directories and archives of a bulk import.
+
+    Failing documents don't fail the job; the per-file status and
+    throughput report is kept as the job's result.
+    """
+    return ingest_batch(**job.payload)
+
+
+# A task's return value (if not None) is kept as the job's result
+TASKS: Dict[str, Callable[[Job], Optional[Dict[str, Any]]]] = {
+    "ingest_document": run_ingest_document,
+    "ingest_batch": run_ingest_batch,
+}